@@ -22,4 +22,6 @@ if os.environ.get('DEBUG', False):
 
 from asset import Asset
 from asset import asset_from_path
+from asset import asset_from_paths
+from asset import get_toolchain
 from asset import set_logger
@@ -1,16 +1,17 @@
-from fileseq import FileSequence
 from pathlib import Path
 # from logger import Logger
 from errors import InvalidSequenceError, BrokenSequenceError
 import utils
 
-import subprocess
+# fileseq, yaml, subprocess, shutil and json are imported where they are
+# used, to keep the import of the module fast for short lived scripts
+import threading
 import logging
-import yaml
-import shutil
-import json
+import marshal
+import time
 import sys
 import os
+import stat as stat_
 import re
 
 ################################################################################
@@ -18,100 +19,527 @@ import re
 ################################################################################
 debug = False
 
-global config  # Module configuration from config.yml
-
 script_dir = os.path.dirname(os.path.realpath(__file__))
 config_file = Path(script_dir, 'config.yml')
 
-# Read the module configuration
-with config_file.open('r') as f:
-    config = yaml.load(f)
+# File keeping the parsed configuration between runs, such as
+# '~/.cache/asset/config.cache'. Empty by default, so that nothing is written
+# unless asked for. Set the ASSET_CONFIG_CACHE environmental variable, which
+# takes precedence, or this variable before the configuration is first read
+# to enable it
+config_cache_file = ''
 
-# Cache some configuration variables
-video_files_formats = config['video_files_formats']
-image_files_formats = config['image_files_formats']
+# A config.yml modified this recently (in seconds) is not cached, since a
+# filesystem with a coarse mtime resolution could change it again without
+# changing its mtime
+_CONFIG_RACY_SECONDS = 2.0
+
+_config = None
+_config_lock = threading.Lock()
 
 log = logging.getLogger(__name__)
 def set_logger(logger):
     global log
     log = logger
 
+_scan_cache = None
+_toolchain = None
+_toolchain_lock = threading.Lock()
+
+
+def get_config():
+    """
+    Get the module configuration from config.yml, read on first call.
+    If enabled, see config_cache_file, the parsed configuration is kept in
+    a cache file and used instead of config.yml as long as its mtime and
+    size are the same
+
+    :returns: (dict)
+    """
+    global _config
+    with _config_lock:
+        if _config is None:
+            cache_file = os.environ.get('ASSET_CONFIG_CACHE')
+            if cache_file is None:
+                cache_file = config_cache_file
+            _config = _load_config(str(config_file), cache_file)
+    return _config
+
+
+def _load_config(path, cache_file):
+    """
+    Read a configuration file through its cache file
+
+    :param path: (str) The YAML configuration file
+    :param cache_file: (str) The cache file, empty for none
+    :returns: (dict)
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime, st.st_size)
+
+    if cache_file:
+        cache_file = os.path.expanduser(cache_file)
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_key, config = marshal.load(f)
+            if cached_key == key:
+                return config
+        except (EnvironmentError, EOFError, ValueError, TypeError):
+            # Missing, unreadable or written by another version of python
+            pass
+
+    import yaml
+    with Path(path).open('r') as f:
+        config = yaml.load(f)
+
+    if cache_file and time.time() - st.st_mtime >= _CONFIG_RACY_SECONDS:
+        _write_config_cache(cache_file, key, config)
+    return config
+
+
+def _write_config_cache(cache_file, key, config):
+    """
+    Write the cache file of a configuration, replacing it at once so that
+    other processes never read it half written. Errors are only logged.
+    """
+    tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with open(tmp_file, 'wb') as f:
+            marshal.dump((key, config), f)
+        if sys.platform == 'win32' and os.path.exists(cache_file):
+            os.remove(cache_file)
+        os.rename(tmp_file, cache_file)
+    except (EnvironmentError, ValueError) as e:
+        log.debug('Can not write the configuration cache %s. %s' % (cache_file, e))
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
+
+class _LazyConfig(object):
+    """
+    Stand-in for the module configuration, or one of its values, read
+    through get_config on use. Keeps the config, video_files_formats and
+    image_files_formats module variables working without reading
+    config.yml at import. Note that it is not a dict or list instance.
+    """
+
+    def __init__(self, key=None):
+        self._key = key
+
+    def _get(self):
+        if self._key is None:
+            return get_config()
+        return get_config()[self._key]
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __setitem__(self, key, value):
+        self._get()[key] = value
+
+    def __contains__(self, item):
+        return item in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __eq__(self, other):
+        return self._get() == other
+
+    def __ne__(self, other):
+        return self._get() != other
+
+    def __repr__(self):
+        return repr(self._get())
+
+
+# Module configuration from config.yml, prefer get_config
+config = _LazyConfig()
+
+# Cache some configuration variables
+video_files_formats = _LazyConfig('video_files_formats')
+image_files_formats = _LazyConfig('image_files_formats')
+
+
+def find_sequences(path):
+    """
+    Find the file sequences in a folder, using the scan cache
+    from the ASSET_SCAN_CACHE environmental variable or config.yml
+    """
+    global _scan_cache
+    from fileseq import FileSequence, ScanCache
+
+    if _scan_cache is None:
+        cache_file = os.environ.get('ASSET_SCAN_CACHE')
+        if cache_file is None:
+            cache_file = get_config().get('scan_cache')
+        # An empty path disables the cache
+        _scan_cache = ScanCache(cache_file) if cache_file else False
+
+    if _scan_cache:
+        return _scan_cache.findSequencesOnDisk(str(path))
+    return FileSequence.findSequencesOnDisk(str(path))
+
+
+def get_toolchain():
+    """
+    Get the ffmpeg and ffprobe of all of the assets, found on first call
+    from the FFMPEG_DIR environmental variable or config.yml
+
+    :returns: (Toolchain)
+    """
+    global _toolchain
+    with _toolchain_lock:
+        if _toolchain is None:
+            platform = {'linux2': 'linux', 'darwin': 'mac', 'win32': 'win'}[sys.platform]
+
+            if os.environ.get('FFMPEG_DIR') is not None:
+                # From the environmental variable
+                ffmpeg_dir = os.environ['FFMPEG_DIR']
+            elif get_config()['ffmpeg_dir'][platform] is not None:
+                # From configuration file
+                ffmpeg_dir = get_config()['ffmpeg_dir'][platform]
+            else:
+                ffmpeg_dir = ''
+                log.info('Can not determine ffmpeg path. ')
+                log.warning(
+                    'Please set FFMPEG_DIR environmental variable '
+                    'or specify path in the config.yml. '
+                )
+                log.info('Using system ffprobe and ffmpeg.')
+
+            _toolchain = Toolchain(ffmpeg_dir)
+    return _toolchain
+
 ################################################################################
 # Factory functions
 ################################################################################
 
-def asset_from_path(path):
+def asset_from_path(path, tolerant=False, lazy=False, stat=None):
     """
     Factory method
+
+    :param path: (str, Path or DirEntry) Path to the asset. The type of a
+        DirEntry of os.scandir or the scandir package is taken from the
+        directory listing rather than from a new stat
+    :param tolerant: (bool) Accept image sequences with missing frames,
+        see ImageSequence.gap_report
+    :param lazy: (bool) Defer the scan of image sequence folders until
+        their frames are needed, see ImageSequence.validate
+    :param stat: (os.stat_result) Result of a stat of the path already at
+        hand, used instead of a new one
+    """
+    return _asset_from(_asset_path(path), stat, tolerant, lazy)
+
+
+def asset_from_paths(paths, workers=8, ordered=True, tolerant=False, lazy=False):
+    """
+    Factory method for many paths at once. The paths are classified and
+    their assets built concurrently by a pool of threads, with a single
+    stat per path
+
+    :param paths: (iterable) Paths or DirEntry objects to build assets from,
+        read as the results are consumed
+    :param workers: (int) Number of paths handled at once
+    :param ordered: (bool) Yield the results in the order of paths rather
+        than as soon as they are ready
+    :param tolerant: (bool) See asset_from_path
+    :param lazy: (bool) See asset_from_path
+    :returns: (generator) (path, asset, error) tuples, where asset is None
+        and error is the exception asset_from_path raises for the path when
+        it can not be turned into an asset
+    :raises: ValueError if workers is less than 1
+    """
+    # Checked here rather than in the generator,
+    # so that the call itself raises
+    if workers < 1:
+        raise ValueError('workers must be at least 1, got %s' % workers)
+
+    return _yield_assets(paths, workers, ordered, tolerant, lazy)
+
+
+def _yield_assets(paths, workers, ordered, tolerant, lazy):
+    """
+    Generator of asset_from_paths, with its arguments checked
+    """
+    from Queue import Queue
+
+    tasks = Queue()
+    results = Queue()
+    stop = threading.Event()
+    threads = []
+    for _ in xrange(workers):
+        thread = threading.Thread(
+            target=_build_assets, args=(tasks, results, stop, tolerant, lazy))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    paths = iter(paths)
+    exhausted = False
+    queued = 0
+    pending = 0
+    # Results received ahead of their turn when ordered, by index
+    ready = {}
+    next_index = 0
+    limit = workers * 2
+    try:
+        while True:
+            # Keep the threads busy without reading all of the paths up
+            # front. When ordered, the results waiting for a slow one count
+            # as well, so that they do not pile up while it runs
+            while not exhausted and (queued - next_index if ordered else pending) < limit:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                tasks.put((queued, path))
+                queued += 1
+                pending += 1
+            if not pending:
+                break
+
+            index, result = results.get()
+            pending -= 1
+            if not ordered:
+                yield result
+                continue
+            ready[index] = result
+            while next_index in ready:
+                yield ready.pop(next_index)
+                next_index += 1
+    finally:
+        # Let the threads skip whatever is left and wait for them, so that
+        # none is still running when the caller moves on
+        stop.set()
+        for _ in threads:
+            tasks.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def _build_assets(tasks, results, stop, tolerant, lazy):
     """
+    Loop of the threads of asset_from_paths, building the asset of each
+    (index, path) task until given None, skipping them once stop is set
+    """
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        if stop.is_set():
+            continue
+        index, path = task
+        try:
+            asset = _asset_from(_asset_path(path), None, tolerant, lazy)
+        except Exception as e:
+            results.put((index, (path, None, e)))
+        else:
+            results.put((index, (path, asset, None)))
+
+
+def _is_dir_entry(path):
+    """
+    :returns: (bool) True if path is a DirEntry of os.scandir or of the
+        scandir package
+    """
+    return hasattr(path, 'inode') and hasattr(path, 'is_dir')
+
+
+def _asset_path(path):
+    """
+    :returns: (Path or DirEntry) Path of the asset of a path, DirEntry
+        objects are returned as they are
+    """
+    if _is_dir_entry(path):
+        return path
     path = Path(path)
 
     # If path represent an image sequence
     # use its parent folder instead
     if '%' in str(path.name):
         path = path.parent
+    return path
+
 
-    if not path.exists():
-        log.error('Path %s does not exists' % path)
-        raise Exception
+def _asset_from(path, st, tolerant, lazy):
+    """
+    Build the asset of an existing path
 
-    if path.is_dir():
-        asset = ImageSequence(path)
-    elif path.suffix.lstrip('.') in video_files_formats:
-        asset = VideoFile(path)
-    elif path.suffix.lstrip('.') in image_files_formats:
-        asset = ImageFile(path)
-    elif path.is_file():
-        asset = LocalFile(path)
-    else:
-        log.error('Path is not a file or directory')
-        raise Exception
+    :param path: (Path or DirEntry) Path to the asset, see _asset_path
+    :param st: (os.stat_result) Result of the stat of path, made here if
+        None and path is not a DirEntry
+    """
+    if _is_dir_entry(path):
+        # is_dir and is_file follow links as os.stat does, and are answered
+        # from the directory listing on most platforms
+        entry = path
+        if entry.is_dir() or entry.is_file():
+            return _build_asset(
+                Path(entry.path), entry.is_dir(), entry.is_file(),
+                tolerant, lazy, entry if st is None else st)
+        # A broken link or a special file, stat it as its path would be
+        # so that it gets the same asset or error
+        path = Path(entry.path)
+
+    if st is None:
+        try:
+            st = os.stat(str(path))
+        except OSError:
+            log.error('Path %s does not exists' % path)
+            raise Exception('Path %s does not exists' % path)
+    return _build_asset(
+        path, stat_.S_ISDIR(st.st_mode), stat_.S_ISREG(st.st_mode),
+        tolerant, lazy, st)
 
-    return asset
+
+def _build_asset(path, is_dir, is_file, tolerant, lazy, st):
+    """
+    Build the asset of the type matching a path
+
+    :param st: (os.stat_result or DirEntry) Passed on to the asset
+    """
+    config = get_config()
+    suffix = path.suffix.lstrip('.')
+    if is_dir:
+        return ImageSequence(path, tolerant=tolerant, lazy=lazy, stat=st)
+    elif suffix in config['video_files_formats']:
+        return VideoFile(path, stat=st)
+    elif suffix in config['image_files_formats']:
+        return ImageFile(path, stat=st)
+    elif is_file:
+        return LocalFile(path, stat=st)
+
+    log.error('Path is not a file or directory')
+    raise Exception('Path is not a file or directory: %s' % path)
 
 ################################################################################
 # Classes
 ################################################################################
 
 
+class Toolchain(object):
+    """
+    The ffmpeg and ffprobe executables used by the assets.
+    Do not instantiate directly, all of the assets share the one
+    returned by get_toolchain.
+    """
+
+    def __init__(self, ffmpeg_dir):
+        """
+        :param ffmpeg_dir: (str) Folder containing ffmpeg and ffprobe, empty
+            to use the ones of the system
+        """
+        self.ffmpeg_dir = ffmpeg_dir
+        self._ffmpeg = Path(ffmpeg_dir, 'ffmpeg')
+        self._ffprobe = Path(ffmpeg_dir, 'ffprobe')
+        self._versions = None
+        self._lock = threading.Lock()
+
+    @property
+    def ffmpeg(self):
+        """
+        :returns: (Path) The ffmpeg executable, validated on first use
+        """
+        self.validate()
+        return self._ffmpeg
+
+    @property
+    def ffprobe(self):
+        """
+        :returns: (Path) The ffprobe executable, validated on first use
+        """
+        self.validate()
+        return self._ffprobe
+
+    def validate(self):
+        """
+        Run ffmpeg and ffprobe once to get their versions, and warn
+        about the ones which can not be run
+
+        :returns: (dict) Version of each tool by name, None for the
+            ones which can not be run
+        """
+        with self._lock:
+            if self._versions is None:
+                self._versions = {}
+                for name, executable in (('ffmpeg', self._ffmpeg),
+                                         ('ffprobe', self._ffprobe)):
+                    version = self._get_version(executable)
+                    if version is None:
+                        log.warning('Can not run %s' % executable)
+                    else:
+                        log.debug('Using %s version %s' % (executable, version))
+                    self._versions[name] = version
+        return dict(self._versions)
+
+    def _get_version(self, executable):
+        """
+        :returns: (str) Version printed by executable -version, or None
+            if it can not be run
+        """
+        import subprocess
+        try:
+            with open(os.devnull, 'w') as devnull:
+                output = subprocess.check_output(
+                    [str(executable), '-version'], stderr=devnull)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+        # e.g. ffmpeg version 4.2.2-static https://johnvansickle.com/ffmpeg/
+        match = re.search(r'version (\S+)', output)
+        if match is None:
+            return ''
+        return match.group(1)
+
+
 class Asset(object):
     """
     Base class for all of the local assets
     Do not instantiate directly. Use factory methods such as asset_from_path.
     """
-    def __init__(self, path):
+
+    _version_patterns = None
+
+    def __init__(self, path, stat=None):
+        """
+        :param stat: (os.stat_result or DirEntry) Result of a stat of the
+            path, or its DirEntry from a directory listing. The path is then
+            not checked for existence again, unless the entry is neither a
+            file nor a directory such as a broken link, and the stat is kept
+            for the size and mtime of the asset
+        """
 
         path = Path(path)
-        platform = {'linux2': 'linux', 'darwin': 'mac', 'win32': 'win'}[sys.platform]
 
-        if not path.exists():
+        if stat is None:
+            checked = False
+        elif _is_dir_entry(stat):
+            checked = stat.is_dir() or stat.is_file()
+        else:
+            checked = True
+        if not checked and not path.exists():
             raise Exception('Specified path does not exist: %s' % path)
         self._path = path
-
-        # Regular expression pattern to use
-        # for retrieving version number from a file name
-        self.version_patterns = config['versions_regex']
-
-        # Determine ffmpeg and ffprobe paths
-        ffmpeg_dir = os.environ.get('FFMPEG_DIR')
-
-        if os.environ.get('FFMPEG_DIR') is not None:
-            # From the environmental variable
-            ffmpeg_dir = os.environ.get('FFMPEG_DIR')
-        elif config['ffmpeg_dir'][platform] is not None:
-            # From configuration file
-            ffmpeg_dir = config['ffmpeg_dir'][platform]
+        if stat is not None and _is_dir_entry(stat):
+            # The entry makes the stat on first use and keeps it
+            self._entry = stat
+            self._stat = None
         else:
-            ffmpeg_dir = ''
-            log.info('Can not determine ffmpeg path. ')
-            log.warning(
-                'Please set FFMPEG_DIR environmental variable '
-                'or specify path in the config.yml. '
-            )
-            log.info('Using system ffprobe and ffmpeg.')
-
-        self._ffmpeg = Path(ffmpeg_dir, 'ffmpeg')
-        self._ffprobe = Path(ffmpeg_dir, 'ffprobe')
+            self._entry = None
+            self._stat = stat
 
         # Corresponding shotgun metadata for this asset
         self.sg_data = {}
@@ -128,10 +556,60 @@ class Asset(object):
     def type(self):
         return self.__class__.__name__
 
+    @property
+    def toolchain(self):
+        """
+        :returns: (Toolchain) The ffmpeg and ffprobe shared by all of the assets
+        """
+        return get_toolchain()
+
+    @property
+    def version_patterns(self):
+        """
+        :returns: (list) Regular expression patterns to use for retrieving
+            version number from a file name, from config.yml unless set
+            on the asset. A copy, set the property to change them
+        """
+        if self._version_patterns is None:
+            return list(get_config()['versions_regex'])
+        return list(self._version_patterns)
+
+    @version_patterns.setter
+    def version_patterns(self, patterns):
+        self._version_patterns = patterns
+
     @property
     def path(self):
         return Path(self._path)
 
+    def stat(self):
+        """
+        Stat the file, or the folder of an image sequence, once and keep the
+        result, or use the one given to the constructor
+
+        :returns: (os.stat_result)
+        """
+        if self._stat is None:
+            if self._entry is not None:
+                self._stat = self._entry.stat()
+            else:
+                self._stat = os.stat(str(self._path))
+        return self._stat
+
+    @property
+    def size(self):
+        """
+        :returns: (int) Size in bytes, see stat
+        """
+        return self.stat().st_size
+
+    @property
+    def mtime(self):
+        """
+        :returns: (float) Time of the last modification, see stat
+        """
+        return self.stat().st_mtime
+
     @property
     def version(self):
         """
@@ -263,8 +741,10 @@ class Asset(object):
         return fields
 
     def get_media_info(self, path):
+        import json
+        import subprocess
         cmd = [
-            str(self._ffprobe), '-v', 'quiet', '-select_streams', 'v',
+            str(self.toolchain.ffprobe), '-v', 'quiet', '-select_streams', 'v',
             '-show_streams', '-print_format', 'json', str(path)
         ]
 
@@ -297,6 +777,7 @@ class Asset(object):
         return stream
 
     def copy(self, dst, dry_run=False):
+        import shutil
 
         dst = Path(dst)
 
@@ -327,31 +808,64 @@ class ImageSequence(Asset):
     Do not instantiate directly. Use factory methods such as asset_from_path.
     """
 
-    def __init__(self, path):
-        super(self.__class__, self).__init__(path)
-        path = Path(path)
-        seqs = FileSequence.findSequencesOnDisk(str(path))
+    def __init__(self, path, tolerant=False, lazy=False, stat=None):
+        """
+        :param tolerant: (bool) Do not raise BrokenSequenceError for
+            missing frames, report them with gap_report instead
+        :param lazy: (bool) Do not scan the folder until the sequence is
+            first needed, call validate to get the errors up front
+        :param stat: (os.stat_result) See Asset
+        """
+        super(self.__class__, self).__init__(path, stat=stat)
+        self._tolerant = tolerant
+        self._seq = None
 
         self.sequence_data = None
 
+        if not lazy:
+            self.validate()
+
+    @property
+    def seq(self):
+        """
+        :returns: (FileSequence) The sequence of the folder, scanned on
+            first access
+        """
+        if self._seq is None:
+            self.validate()
+        return self._seq
+
+    @seq.setter
+    def seq(self, seq):
+        self._seq = seq
+
+    def validate(self):
+        """
+        Scan the folder and check that it holds a single sequence
+
+        :raises: InvalidSequenceError if the folder holds no sequence
+            or several ones
+        :raises: BrokenSequenceError if the sequence has missing frames,
+            unless the asset is tolerant
+        """
+        seqs = find_sequences(self._path)
+
         if len(seqs) == 1:
-            self.seq = seqs[0]
+            seq = seqs[0]
 
             # Check for broken sequence
-            if self._is_broken(self.seq):
+            if not self._tolerant and self._is_broken(seq):
                 raise BrokenSequenceError(
                     'Sequence broken and has missing frames: %s'
-                    % self.seq.frameSet()
+                    % seq.frameSet()
                 )
+            self._seq = seq
         elif len(seqs) > 1:
             # Case where the folder contains two
             # sequences with two different names
-            seq_paths = '\n'
-            for i in seqs:
-                seq_paths = seq_paths + '\n' + i.path()
             raise InvalidSequenceError('Multiple file sequences error!')
         elif len(seqs) == 0:
-            raise InvalidSequenceError('No sequences found in the folder %s' % path)
+            raise InvalidSequenceError('No sequences found in the folder %s' % self._path)
 
     def _is_broken(self, seq):
         """
@@ -360,27 +874,44 @@ class ImageSequence(Asset):
         :param seq: FileSequence object
         :returns: True if the sequence has one or more missing frames
         """
-
         frame_set = seq.frameSet()
-        prev = seq.start()
-
-        for i, f_num in enumerate(frame_set):
-
-            # Exit the loop before we run out of frames
-            if i == len(frame_set) - 1:
-                break
+        if frame_set is None:
+            return False
+        return not frame_set.inverted().is_null
 
-            cur_frame = frame_set[i]
-            next_frame = frame_set[i+1]
+    @property
+    def is_broken(self):
+        """
+        :returns: (bool) True if the sequence has missing frames
+        """
+        return self._is_broken(self.seq)
 
-            diff = next_frame - cur_frame
+    def gap_report(self):
+        """
+        Report what is wrong with the sequence, computed from the frame runs
+        of the scan rather than frame by frame
+
+        :returns: (dict) with the keys
+            missing: (FrameSet) Frames missing between the first and last one
+            gaps: (list) (first, last) frames of each run of missing frames
+            collisions: (dict) Frame strings of the frames found on disk
+                with several paddings, such as 1 and 0001, by frame number
+        """
+        from fileseq import FrameSet
 
-            # Frame is not continues
-            # The sequence is broken
-            if diff > 1:
-                return True
+        frame_set = self.seq.frameSet()
+        if frame_set is None:
+            missing = FrameSet('')
+            gaps = []
+        else:
+            missing = frame_set.inverted()
+            gaps = frame_set.gaps()
 
-        return False
+        return {
+            'missing': missing,
+            'gaps': gaps,
+            'collisions': self.seq.collisions(),
+        }
 
     @property
     def base_name(self):
@@ -455,13 +986,11 @@ class ImageSequence(Asset):
 
     @property
     def directory(self):
-        directory = Path(self.seq.dirname())
-        return directory
+        return Path(self._path)
 
     @property
     def directory_name(self):
-        directory_name = Path(self.seq.dirname()).name
-        return directory_name
+        return self._path.name
 
     @property
     def thumbnail(self):
@@ -475,6 +1004,8 @@ class ImageSequence(Asset):
 
         :returns: (bool) True is image sequence has a slate
         """
+        import json
+        import subprocess
         first_frame = str(self.path) % self.start
         second_frame = str(self.path) % (self.start + 1)
 
@@ -499,7 +1030,7 @@ class ImageSequence(Asset):
         )
 
         cmd = [
-            str(self._ffprobe), '-show_frames', '-v', 'quiet', '-read_intervals',
+            str(self.toolchain.ffprobe), '-show_frames', '-v', 'quiet', '-read_intervals',
             '%+#3', '-print_format', 'json', '-f', 'lavfi', image_filter
         ]
 
@@ -516,12 +1047,13 @@ class ImageSequence(Asset):
             return False
 
     def generate_thumbnail(self, x_size=320, y_size=-1):
+        import subprocess
         middle_frame = str(self.path) % (self.start + (self.frame_count / 2))
         middle_frame = middle_frame.replace('\\', '/').replace(':', '\\\\:')
         tmp_thumb = self._get_tmp_file('%s_tmp_thumb.png' % self.base_name)
         filters = 'scale=%s:%s' % (x_size, y_size)
         cmd = [
-            str(self._ffmpeg), '-v', 'quiet', '-i', str(middle_frame), '-y', '-vf', filters, str(tmp_thumb)
+            str(self.toolchain.ffmpeg), '-v', 'quiet', '-i', str(middle_frame), '-y', '-vf', filters, str(tmp_thumb)
         ]
         if debug:
             cmd.pop(1)
@@ -544,6 +1076,7 @@ class ImageSequence(Asset):
 
         :return: New FileSequnce asset object
         """
+        import shutil
 
         dst = Path(dst)
 
@@ -561,28 +1094,28 @@ class ImageSequence(Asset):
 
         old_frame = self.start + start_offset
         dst_frame_count = self.frame_count - start_offset
+
+        # Build all of the source and destination paths up front
+        old_paths = self.seq.frame_paths(
+            xrange(old_frame, old_frame + dst_frame_count))
+        dst_template = str(dst)
+        new_paths = map(dst_template.__mod__, xrange(
+            new_start_frame, new_start_frame + dst_frame_count))
+
         copied = False
         # Copy sequence to the publish folder frame by frame
         # Alway start from frame 1001
         log.info('Starting copy for %s frames total' % dst_frame_count)
-        for i in range(0, dst_frame_count):
-            new_frame = new_start_frame + i
-
-            old_path = str(self.path) % old_frame
-            new_path = str(dst) % new_frame
-
-            new_path_p = Path(new_path)
-
+        for i, (old_path, new_path) in enumerate(zip(old_paths, new_paths)):
             # Skip frame if already exists
-            if new_path_p.exists() and not override:
-                # skipped_frames.append(new_path_p)
+            if os.path.exists(new_path) and not override:
+                # skipped_frames.append(new_path)
                 log.info('Frame %d already exists' % (i+1))
                 continue
 
             if dry_run:
                 log.info('Dry run mode is active')
                 log.info('Copy %s to %s' % (old_path, new_path))
-                old_frame += 1
                 continue
 
             # Attempt to copy frame with system specific command
@@ -603,14 +1136,12 @@ class ImageSequence(Asset):
             # Print feedback to the console
             # log.info("Copied %d out of %d frames" % (i+1, dst_frame_count))
 
-            old_frame += 1
-
         if warnings:
             log.warning('Some warning were raised during copying: ')
             for i, w in enumerate(warnings):
                 log.warning('\t%02d: %s' % (i+1, w))
 
-        new_sequence_asset = asset_from_path(new_path_p.parent)
+        new_sequence_asset = asset_from_path(dst.parent)
 
         return new_sequence_asset
 
@@ -619,8 +1150,8 @@ class ImageFile(Asset):
     """
     Represent a local video single image file
     """
-    def __init__(self, path):
-        super(self.__class__, self).__init__(path)
+    def __init__(self, path, stat=None):
+        super(self.__class__, self).__init__(path, stat=stat)
         self.file_data = None
 
     @property
@@ -642,10 +1173,11 @@ class ImageFile(Asset):
         return resolution
 
     def generate_thumbnail(self, x_size=320, y_size=-1):
+        import subprocess
         tmp_thumb = self._get_tmp_file('%s_tmp_thumb.png' % self.base_name)
         filters = 'scale=%s:%s' % (x_size, y_size)
         cmd = [
-            str(self._ffmpeg), '-v', 'quiet', '-i', str(self.path), '-y', '-vf', filters, str(tmp_thumb)
+            str(self.toolchain.ffmpeg), '-v', 'quiet', '-i', str(self.path), '-y', '-vf', filters, str(tmp_thumb)
         ]
         if debug:
             cmd.pop(1)
@@ -668,8 +1200,8 @@ class VideoFile(Asset):
     Represent a local video file
     """
 
-    def __init__(self, path):
-        super(self.__class__, self).__init__(path)
+    def __init__(self, path, stat=None):
+        super(self.__class__, self).__init__(path, stat=stat)
 
         self.mov_data = None
 
@@ -714,11 +1246,12 @@ class VideoFile(Asset):
         return resolution
 
     def generate_thumbnail(self, x_size=320, y_size=-1):
+        import subprocess
 
         tmp_thumb = self._get_tmp_file('%s_tmp_thumb.png' % self.base_name)
         filters = 'scale=%s:%s' % (x_size, y_size)
         cmd = [
-            str(self._ffmpeg), '-v', 'quiet', '-i', str(self.path), '-vframes', '1', '-vf', filters, str(tmp_thumb)
+            str(self.toolchain.ffmpeg), '-v', 'quiet', '-i', str(self.path), '-vframes', '1', '-vf', filters, str(tmp_thumb)
         ]
         if debug:
             cmd.pop(1)
@@ -742,6 +1275,8 @@ class VideoFile(Asset):
 
         :returns: (bool) True is video has a slate
         """
+        import json
+        import subprocess
         mov_path = str(self.path).replace('\\', '/')
         mov_path = mov_path.replace(':', '\\\\:')
 
@@ -751,7 +1286,7 @@ class VideoFile(Asset):
         ).format(mov_path=mov_path, slate_threshold=self.slate_threshold)
 
         cmd = [
-            str(self._ffprobe), '-show_frames', '-v', 'quiet', '-read_intervals',
+            str(self.toolchain.ffprobe), '-show_frames', '-v', 'quiet', '-read_intervals',
             '%+#3', '-print_format', 'json', '-f', 'lavfi', image_filter
         ]
 
@@ -774,5 +1309,5 @@ class LocalFile(Asset):
     more specific classes. Can be a single image
     """
 
-    def __init__(self, path):
-        super(self.__class__, self).__init__(path)
+    def __init__(self, path, stat=None):
+        super(self.__class__, self).__init__(path, stat=stat)
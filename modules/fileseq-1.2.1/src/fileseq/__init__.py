@@ -28,6 +28,8 @@ THE SOFTWARE.
 from fileseq.exceptions import ParseException, FileSeqException
 from fileseq.frameset import FrameSet
 from fileseq.filesequence import FileSequence
+from fileseq.scancache import ScanCache
+from fileseq.watcher import SequenceWatcher
 
 padFrameRange = FrameSet.padFrameRange
 framesToFrameRange = FrameSet.framesToFrameRange
@@ -4,11 +4,24 @@ filesequence - A parsing object representing sequential files for fileseq.
 """
 
 import os
-from glob import iglob
+import re
+import sys
+import json
+import struct
+import fnmatch
+import threading
+from Queue import Queue
 from itertools import imap, ifilter
 from fileseq.exceptions import ParseException, FileSeqException
-from fileseq.constants import PAD_MAP, DISK_RE, SPLIT_RE
+from fileseq.constants import PAD_MAP, SPLIT_RE
 from fileseq.frameset import FrameSet
+from fileseq.utils import iter_files, list_dir, split_disk_path
+
+# layout of FileSequence.to_bytes: the format version and the lengths of the
+# directory, basename, padding and extension, followed by those strings and
+# the serialized FrameSet, if any
+_WIRE_VERSION = 1
+_WIRE_HEADER = struct.Struct('<B4I')
 
 class FileSequence(object):
     """:class:`FileSequence` represents an ordered sequence of files.
@@ -16,6 +29,9 @@ class FileSequence(object):
     :type sequence: str
     :param sequence: (ie: dir/path.1-100#.ext)
     """
+    # the frames found with several paddings, when built from a scan
+    _collisions = None
+
     def __init__(self, sequence):
         if not hasattr(self, '_frameSet'):
 
@@ -25,7 +41,7 @@ class FileSequence(object):
                 # the main case, padding characters in the path.1-100#.exr
                 path, frames, self._pad, self._ext = SPLIT_RE.split(sequence, 1)
                 self._dir, self._base = os.path.split(path)
-                self._frameSet = FrameSet(frames)
+                self._frameSet = FrameSet.intern(frames)
             except ValueError:
                 # edge case 1; we've got an invalid pad
                 for placeholder in PAD_MAP.keys():
@@ -33,9 +49,9 @@ class FileSequence(object):
                         msg = "Failed to parse FileSequence: {0}"
                         raise ParseException(msg.format(sequence))
                 # edge case 2; we've got a single frame of a sequence
-                a_frame = DISK_RE.match(sequence)
+                a_frame = split_disk_path(sequence)
                 if a_frame:
-                    self._dir, self._base, frames, self._ext = a_frame.groups()
+                    self._dir, self._base, frames, self._ext = a_frame
                     # edge case 3: we've got a single versioned file, not a sequence
                     if frames and not self._base.endswith('.'):
                         self._base = self._base + frames
@@ -44,7 +60,7 @@ class FileSequence(object):
                         self._pad = ''
                         self._frameSet = None
                     else:
-                        self._frameSet = FrameSet(frames)
+                        self._frameSet = FrameSet.intern(frames)
                         if self._frameSet:
                             self._pad = FileSequence.getPaddingChars(len(frames))
                         else:
@@ -225,7 +241,7 @@ class FileSequence(object):
         :param frange: a properly formatted frame range, as per :class:`fileseq.frameset.FrameSet`
         :rtype: None
         """
-        self._frameSet = FrameSet(frange)
+        self._frameSet = FrameSet.intern(frange)
 
     def invertedFrameRange(self):
         """
@@ -268,6 +284,16 @@ class FileSequence(object):
         """
         return self._zfill
 
+    def collisions(self):
+        """
+        Returns the frames that were found on disk with several paddings,
+        such as bar.1.exr and bar.0001.exr, when the sequence was built from
+        a list of paths or a scan, as the frame strings found for each frame.
+
+        :rtype: dict
+        """
+        return dict(self._collisions or {})
+
     def frame(self, frame):
         """
         Return a path go the given frame in the sequence.  Integer or string
@@ -297,6 +323,87 @@ class FileSequence(object):
 
         return "".join((self._dir, self._base, zframe, self._ext))
 
+    def frame_paths(self, frames=None, as_bytes=False):
+        """
+        Return the paths to the given frames in the sequence, the same as
+        calling :meth:`frame` for each of them, but formatting them all with
+        one template.
+
+        :Example:
+                >>> seq.frame_paths(FrameSet('1-3'))
+                ['/foo/bar.0001.exr', '/foo/bar.0002.exr', '/foo/bar.0003.exr']
+
+        :type frames: :class:`fileseq.frameset.FrameSet` or iterable of int
+        :param frames: the frames, those of the sequence if None, in which
+                       case a sequence without frames gives its own path
+        :type as_bytes: bool
+        :param as_bytes: if true, unicode paths are encoded with the file
+                         system encoding, ready for the os functions
+        :rtype: list
+        """
+        template = self._frame_template(as_bytes)
+        if frames is None:
+            if not self._frameSet or not self._zfill:
+                return [template]
+            frames = self._frameSet
+        if not self._zfill:
+            return [template for _ in frames]
+        if isinstance(frames, FrameSet):
+            paths = []
+            for run in frames._runs:
+                paths.extend(map(template.__mod__, FrameSet._run_range(run)))
+            return paths
+        return map(template.__mod__, frames)
+
+    def yield_frame_paths(self, frames=None, as_bytes=False):
+        """
+        Yield the paths to the given frames in the sequence, the same as
+        :meth:`frame_paths` without building the whole list.
+
+        :type frames: :class:`fileseq.frameset.FrameSet` or iterable of int
+        :param frames: the frames, those of the sequence if None, in which
+                       case a sequence without frames gives its own path
+        :type as_bytes: bool
+        :param as_bytes: if true, unicode paths are encoded with the file
+                         system encoding, ready for the os functions
+        :rtype: generator
+        """
+        template = self._frame_template(as_bytes)
+        if frames is None:
+            if not self._frameSet or not self._zfill:
+                yield template
+                return
+            frames = self._frameSet
+        if not self._zfill:
+            for _ in frames:
+                yield template
+        elif isinstance(frames, FrameSet):
+            for run in frames._runs:
+                for path in imap(template.__mod__, FrameSet._run_range(run)):
+                    yield path
+        else:
+            for path in imap(template.__mod__, frames):
+                yield path
+
+    def _frame_template(self, as_bytes=False):
+        """
+        Private method: the %-format template of the paths to the frames,
+        or the plain path of a sequence without padding.
+
+        :type as_bytes: bool
+        :rtype: str
+        """
+        parts = (self._dir, self._base, self._ext)
+        if as_bytes:
+            encoding = sys.getfilesystemencoding() or 'utf-8'
+            parts = [part.encode(encoding) if isinstance(part, unicode)
+                     else part for part in parts]
+        dirname, basename, ext = parts
+        if not self._zfill:
+            return dirname + basename + ext
+        return dirname.replace('%', '%%') + basename.replace('%', '%%') + \
+            '%0' + str(self._zfill) + 'd' + ext.replace('%', '%%')
+
     def index(self, idx):
         """
         Return the path to the file at the given index.
@@ -322,8 +429,8 @@ class FileSequence(object):
             yield str(self)
             return
 
-        for f in self._frameSet:
-            yield self.frame(f)
+        for path in self.yield_frame_paths():
+            yield path
 
     def __getitem__(self, idx):
         """
@@ -359,6 +466,128 @@ class FileSequence(object):
             self._pad if frameSet else "",
             self._ext))
 
+    def to_bytes(self):
+        """
+        Serialize this :class:`FileSequence` to a compact string of bytes,
+        which :meth:`from_bytes` loads without parsing the sequence.  Unicode
+        strings are encoded to UTF-8.
+
+        :rtype: str
+        """
+        parts = [part.encode('utf-8') if isinstance(part, unicode) else part
+                 for part in (self._dir, self._base, self._pad, self._ext)]
+        header = _WIRE_HEADER.pack(_WIRE_VERSION, *map(len, parts))
+        if self._frameSet is not None:
+            parts.append(self._frameSet.to_bytes())
+        return header + ''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load a :class:`FileSequence` serialized by :meth:`to_bytes`.
+
+        :type data: str
+        :param data: the serialized :class:`FileSequence`
+        :rtype: :class:`FileSequence`
+        :raises: :class:`fileseq.exceptions.ParseException` if the data is
+                 not a serialized :class:`FileSequence`
+        """
+        try:
+            header = _WIRE_HEADER.unpack_from(data)
+        except struct.error as err:
+            msg = 'Could not load FileSequence from bytes: {0}'
+            raise ParseException(msg.format(err))
+        if header[0] != _WIRE_VERSION:
+            msg = 'Unsupported FileSequence serialization version: {0}'
+            raise ParseException(msg.format(header[0]))
+        parts = []
+        offset = _WIRE_HEADER.size
+        for size in header[1:]:
+            parts.append(str(data[offset:offset + size]))
+            offset += size
+        if offset > len(data):
+            msg = 'Could not load FileSequence from bytes: truncated data'
+            raise ParseException(msg)
+        frameSet = None
+        if offset < len(data):
+            frameSet = FrameSet.from_bytes(data[offset:])
+        return cls._from_parts(frameSet, *parts)
+
+    def to_json(self):
+        """
+        Serialize this :class:`FileSequence` to a JSON string, which
+        :meth:`from_json` loads without parsing the sequence.
+
+        :rtype: str
+        """
+        state = {
+            'dirname': self._dir,
+            'basename': self._base,
+            'padding': self._pad,
+            'extension': self._ext,
+            'frameSet': None,
+        }
+        if self._frameSet is not None:
+            state['frameSet'] = self._frameSet._json_state()
+        return json.dumps(state, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Load a :class:`FileSequence` serialized by :meth:`to_json`.  Strings
+        come back UTF-8 encoded.
+
+        :type data: str
+        :param data: the serialized :class:`FileSequence`
+        :rtype: :class:`FileSequence`
+        :raises: :class:`fileseq.exceptions.ParseException` if the data is
+                 not a serialized :class:`FileSequence`
+        """
+        try:
+            state = json.loads(data)
+            parts = [state[key].encode('utf-8') for key in
+                     ('dirname', 'basename', 'padding', 'extension')]
+            frameSet = state['frameSet']
+        except (AttributeError, KeyError, TypeError, ValueError) as err:
+            msg = 'Could not load FileSequence from JSON: {0}'
+            raise ParseException(msg.format(err))
+        if frameSet is not None:
+            frameSet = FrameSet._from_json_state(frameSet)
+        return cls._from_parts(frameSet, *parts)
+
+    @classmethod
+    def _from_parts(cls, frameSet, dirname, basename, pad, ext, zfill=None):
+        """
+        Private method: build a :class:`FileSequence` directly from its
+        parts, without parsing.
+
+        :type frameSet: :class:`fileseq.frameset.FrameSet` or None
+        :type dirname: str
+        :param dirname: the directory, empty or ending with a separator
+        :type basename: str
+        :type pad: str
+        :type ext: str
+        :type zfill: int
+        :param zfill: the width of the padding, computed from pad if None
+        :rtype: :class:`FileSequence`
+        :raises: :class:`fileseq.exceptions.ParseException` if the padding
+                 characters are not valid
+        """
+        self = cls.__new__(cls)
+        self._frameSet = frameSet
+        self._dir = dirname
+        self._base = basename
+        self._pad = pad
+        self._ext = ext
+        if zfill is None:
+            try:
+                zfill = sum([PAD_MAP[c] for c in pad])
+            except KeyError:
+                msg = 'Could not load FileSequence: invalid padding "{0}"'
+                raise ParseException(msg.format(pad))
+        self._zfill = zfill
+        return self
+
     @staticmethod
     def yield_sequences_in_list(paths):
         """
@@ -370,30 +599,132 @@ class FileSequence(object):
         :rtype: generator
         """
         seqs = {}
-        _check = DISK_RE.match
-        for match in ifilter(None, imap(_check, paths)):
-            dirname, basename, frame, ext = match.groups()
+        for match in ifilter(None, imap(split_disk_path, paths)):
+            dirname, basename, frame, ext = match
             if not basename and not ext:
                 continue
             key = (dirname, basename, ext)
             seqs.setdefault(key, set())
             if frame:
                 seqs[key].add(frame)
+        for seq in FileSequence._sequences_from_groups(seqs):
+            yield seq
+
+    @staticmethod
+    def yield_sequences_in_stream(paths, ordered=True, flush=None):
+        """
+        Yield the discrete sequences within a stream of paths, such as the
+        output of find, without holding on to all of the paths.
+
+        With ordered input, where all of the paths under a directory come
+        together as they do when sorted or listed depth first, the sequences
+        of a directory are yielded as soon as the stream leaves it, so only
+        the frames of the directories being listed are kept.  Unordered
+        input is only grouped up to the end of the stream, or up to each
+        time the flush hook asks for it, in which case a sequence spread over
+        the stream can be yielded in several pieces.
+
+        :param paths: an iterable of paths
+        :type ordered: bool
+        :param ordered: if true, the paths under a directory come together
+        :type flush: callable
+        :param flush: called after each path with the number of sequences
+                      and frames held, returns true to yield all of them
+        :rtype: generator
+        """
+        # the frames of each (dirname, basename, extension) held, per
+        # directory, and the open directories as a chain of ancestors
+        held = {}
+        opened = []
+        pending = 0
+        for match in ifilter(None, imap(split_disk_path, paths)):
+            dirname, basename, frame, ext = match
+            if not basename and not ext:
+                continue
+            dirname = dirname or ''
+            if ordered and (not opened or opened[-1] != dirname):
+                while opened and not dirname.startswith(opened[-1]):
+                    seqs = held.pop(opened.pop(), None)
+                    if seqs:
+                        pending -= len(seqs) + sum(imap(len, seqs.itervalues()))
+                        for seq in FileSequence._sequences_from_groups(seqs):
+                            yield seq
+                if not opened or opened[-1] != dirname:
+                    opened.append(dirname)
+            seqs = held.get(dirname)
+            if seqs is None:
+                seqs = held[dirname] = {}
+            key = (dirname, basename, ext)
+            frames = seqs.get(key)
+            if frames is None:
+                frames = seqs[key] = set()
+                pending += 1
+            if frame and frame not in frames:
+                frames.add(frame)
+                pending += 1
+            if flush is not None and flush(pending):
+                for seqs in held.itervalues():
+                    for seq in FileSequence._sequences_from_groups(seqs):
+                        yield seq
+                held = {}
+                pending = 0
+        for seqs in held.itervalues():
+            for seq in FileSequence._sequences_from_groups(seqs):
+                yield seq
+
+    @staticmethod
+    def _sequences_from_groups(seqs):
+        """
+        Private method: yield the sequences of the frames grouped by
+        :meth:`yield_sequences_in_list`.
+
+        :type seqs: dict
+        :param seqs: the set of frame strings of each (dirname, basename,
+                     extension) key
+        :rtype: generator
+        """
         for (dirname, basename, ext), frames in seqs.iteritems():
-            # build the FileSequence behind the scenes, rather than dupe work
-            seq = FileSequence.__new__(FileSequence)
-            seq._dir = dirname or ''
-            seq._base = basename or ''
-            seq._ext = ext or ''
+            # build the FileSequence from its parts, rather than formatting
+            # it to a string and parsing that again
+            if dirname:
+                if not dirname.endswith(os.sep):
+                    dirname += os.sep
+            else:
+                dirname = ''
+            collisions = None
             if frames:
-                seq._frameSet = FrameSet(set(imap(int, frames))) if frames else None
-                seq._pad = FileSequence.getPaddingChars(min(imap(len, frames)))
+                numbers = set(imap(int, frames))
+                if len(numbers) < len(frames):
+                    collisions = FileSequence._padding_collisions(frames)
+                frameSet = FrameSet._from_runs(FrameSet._frames_to_runs(
+                    sorted(numbers)))
+                zfill = min(imap(len, frames))
+                pad = FileSequence.getPaddingChars(zfill)
             else:
-                seq._frameSet = None
-                seq._pad = ''
-            seq.__init__(str(seq))
+                frameSet = None
+                zfill = 0
+                pad = ''
+            seq = FileSequence._from_parts(
+                frameSet, dirname, basename or '', pad, ext or '', zfill)
+            if collisions:
+                seq._collisions = collisions
             yield seq
 
+    @staticmethod
+    def _padding_collisions(frames):
+        """
+        Private method: the frame strings found for the same frame number.
+
+        :type frames: set
+        :param frames: the frame strings of a sequence
+        :rtype: dict
+        """
+        numbers = {}
+        for frame in frames:
+            numbers.setdefault(int(frame), []).append(frame)
+        return dict((number, tuple(sorted(found, key=lambda f: (len(f), f))))
+                    for number, found in numbers.iteritems() if len(found) > 1)
+
     @staticmethod
     def findSequencesInList(paths):
         """
@@ -416,27 +747,217 @@ class FileSequence(object):
         :param include_hidden: if true, show .hidden files as well
         :rtype: list
         """
-        # reserve some functions we're going to need quick access to
-        _not_hidden = lambda f: not f.startswith('.')
-        _isfile = os.path.isfile
-        _join = os.path.join
-        # collapse some generators to get us the files that match our regex
-        files = os.listdir(dirpath)
-        if not include_hidden:
-            files = ifilter(_not_hidden, files)
-        files = (_join(dirpath, f) for f in files)
-        files = ifilter(_isfile, files)
-        return list(FileSequence.yield_sequences_in_list(files))
+        return FileSequence._sequences_in_dir(
+            dirpath, iter_files(dirpath, include_hidden))
+
+    @staticmethod
+    def _sequences_in_dir(dirpath, names):
+        """
+        Private method: the sequences of the given files of a directory.  The
+        file names are matched and grouped as they come, the directory being
+        the same for all of them.
+
+        :type dirpath: str
+        :param dirpath: the directory holding the files
+        :param names: an iterable of the file names
+        :rtype: list
+        """
+        dirname = os.path.join(dirpath, '')
+        seqs = {}
+        for name in names:
+            match = split_disk_path(name)
+            if match is None:
+                continue
+            _, basename, frame, ext = match
+            if not basename and not ext:
+                continue
+            key = (dirname, basename, ext)
+            seqs.setdefault(key, set())
+            if frame:
+                seqs[key].add(frame)
+        return list(FileSequence._sequences_from_groups(seqs))
+
+    @staticmethod
+    def yield_sequences_in_tree(root, include=None, exclude=None,
+                                max_depth=None, include_hidden=False,
+                                followlinks=False, workers=8, onerror=None):
+        """
+        Yield the sequences found in a directory tree.  The directories are
+        listed concurrently by a pool of threads, and the sequences of each
+        directory are yielded as soon as it has been listed, so the order is
+        not defined.
+
+        :Example:
+            >>> for seq in FileSequence.yield_sequences_in_tree(
+            ...         '/shows/abc/renders', include='*.exr', exclude='tmp',
+            ...         workers=32):
+            ...     print seq
+
+        :type root: str
+        :param root: the directory to start from
+        :type include: str or list
+        :param include: only files whose name matches one of these
+                        (case-sensitive) glob patterns make up the sequences,
+                        None for all files
+        :type exclude: str or list
+        :param exclude: the files and directories whose name matches one of
+                        these glob patterns are skipped, excluded directories
+                        are not descended into
+        :type max_depth: int
+        :param max_depth: the number of levels of subdirectories to descend
+                          into, 0 for the root directory only, None for no
+                          limit
+        :type include_hidden: bool
+        :param include_hidden: if true, list .hidden files and directories
+                               as well
+        :type followlinks: bool
+        :param followlinks: if true, descend into links to directories
+        :type workers: int
+        :param workers: the number of directories listed at once
+        :type onerror: callable
+        :param onerror: called with the :class:`OSError` of each directory
+                        that cannot be listed, which is skipped; such errors
+                        are ignored if None, as :func:`os.walk` does
+        :rtype: generator
+        :raises: :class:`ValueError` if workers is less than 1
+        """
+        # checked here rather than in the generator, so that bad arguments
+        # raise on the call rather than on the first iteration
+        if workers < 1:
+            raise ValueError('workers must be at least 1, got {0}'.format(workers))
+        include = FileSequence._compile_patterns(include)
+        exclude = FileSequence._compile_patterns(exclude)
+        options = (include, exclude, include_hidden, followlinks)
+        return FileSequence._yield_tree_sequences(
+            root, options, max_depth, workers, onerror)
+
+    @staticmethod
+    def _yield_tree_sequences(root, options, max_depth, workers, onerror):
+        """
+        Private method: the generator of :meth:`yield_sequences_in_tree`,
+        with its arguments checked.  The threads are only started once it is
+        iterated, so that a generator never iterated does not leave them
+        waiting.
+
+        :type root: str
+        :type options: tuple
+        :param options: see :meth:`_list_tree_dirs`
+        :type max_depth: int
+        :type workers: int
+        :type onerror: callable
+        :rtype: generator
+        """
+        tasks = Queue()
+        results = Queue()
+        stop = threading.Event()
+        for _ in xrange(workers):
+            thread = threading.Thread(
+                target=FileSequence._list_tree_dirs,
+                args=(tasks, results, stop, options))
+            thread.daemon = True
+            thread.start()
+
+        tasks.put((root, 0))
+        pending = 1
+        try:
+            while pending:
+                dirpath, depth, seqs, dirs, error = results.get()
+                pending -= 1
+                if error is not None:
+                    if not isinstance(error[1], EnvironmentError):
+                        raise error[0], error[1], error[2]
+                    if onerror is not None:
+                        onerror(error[1])
+                    continue
+                if max_depth is None or depth < max_depth:
+                    for name in dirs:
+                        tasks.put((os.path.join(dirpath, name), depth + 1))
+                        pending += 1
+                for seq in seqs:
+                    yield seq
+        finally:
+            # let the threads skip whatever is left and exit
+            stop.set()
+            for _ in xrange(workers):
+                tasks.put(None)
+
+    @staticmethod
+    def _list_tree_dirs(tasks, results, stop, options):
+        """
+        Private method: the loop of the threads of
+        :meth:`yield_sequences_in_tree`, listing the directories of tasks
+        until given None, and putting the sequences and the subdirectories of
+        each, or the error listing it raised, on results.
+
+        :type tasks: :class:`Queue.Queue`
+        :param tasks: (dirpath, depth) tuples, or None
+        :type results: :class:`Queue.Queue`
+        :param results: (dirpath, depth, sequences, subdirectories, exc_info)
+                        tuples
+        :type stop: :class:`threading.Event`
+        :param stop: set when the remaining tasks are to be skipped
+        :type options: tuple
+        :param options: the include and exclude matching functions, and the
+                        include_hidden and followlinks flags
+        :rtype: None
+        """
+        include, exclude, include_hidden, followlinks = options
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            if stop.is_set():
+                continue
+            dirpath, depth = task
+            try:
+                files, dirs = list_dir(dirpath, include_hidden, followlinks)
+                if exclude is not None:
+                    files = [name for name in files if not exclude(name)]
+                    dirs = [name for name in dirs if not exclude(name)]
+                if include is not None:
+                    files = filter(include, files)
+                seqs = FileSequence._sequences_in_dir(dirpath, files)
+            except Exception:
+                results.put((dirpath, depth, None, None, sys.exc_info()))
+            else:
+                results.put((dirpath, depth, seqs, dirs, None))
 
     @staticmethod
-    def findSequenceOnDisk(pattern):
+    def _compile_patterns(patterns):
+        """
+        Private method: a function matching names against any of the given
+        glob patterns.
+
+        :type patterns: str or list
+        :param patterns: one or more glob patterns, or None
+        :rtype: callable, or None if there are no patterns
+        """
+        if not patterns:
+            return None
+        if isinstance(patterns, basestring):
+            patterns = [patterns]
+        regex = '|'.join('(?:{0})'.format(fnmatch.translate(pattern))
+                         for pattern in patterns)
+        return re.compile(regex).match
+
+    @staticmethod
+    def findSequenceOnDisk(pattern, names=None):
         """
         Search for a specific sequence on disk.
 
+        The directory of the pattern is listed once and only the names with
+        the basename and extension of the pattern are parsed.  Several
+        lookups in the same directory can share one listing by passing its
+        file names, hidden ones included, for instance from
+        :func:`fileseq.utils.iter_files`.
+
         :Example:
             >>> findSequenceOnDisk("seq/bar#.exr") # or any fileseq pattern
 
         :param pattern: the sequence pattern being searched for
+        :type names: list
+        :param names: the names of the files in the directory of the pattern,
+                      which is listed if None
         :rtype: str
         :raises: :class:`fileseq.exceptions.FileSeqException` if no sequence is found on disk
         """
@@ -446,15 +967,46 @@ class FileSequence(object):
             if os.path.isfile(pattern):
                 return seq
 
-        patt = seq.format('{dirname}{basename}*{extension}')
-
-        ext = seq.extension()
+        dirname = seq.dirname()
         basename = seq.basename()
+        ext = seq.extension()
+
+        isfile = None
+        if names is None:
+            try:
+                names = os.listdir(dirname or os.curdir)
+            except EnvironmentError:
+                names = []
+            # only the candidates are checked for being files
+            isfile = os.path.isfile
+
+        # like a glob with a leading wildcard, a pattern without a basename
+        # does not match hidden files
+        if not basename and not ext:
+            names = []
+        elif basename:
+            names = [name for name in names if name.startswith(basename)]
+        else:
+            names = [name for name in names if not name.startswith('.')]
+        if ext:
+            names = [name for name in names if name.endswith(ext)]
+
+        frames = set()
+        found = False
+        for name in names:
+            match = split_disk_path(name)
+            if match is None or (match[1] or '') != basename or \
+                    (match[3] or '') != ext:
+                continue
+            if isfile is not None and not isfile(dirname + name):
+                continue
+            found = True
+            if match[2]:
+                frames.add(match[2])
 
-        matches = FileSequence.yield_sequences_in_list(iglob(patt))
-        for match in matches:
-            if match.basename() == basename and match.extension() == ext:
-                return match
+        if found:
+            groups = {(dirname, basename, ext): frames}
+            return next(FileSequence._sequences_from_groups(groups))
 
         msg = 'no sequence found on disk matching {0}'
         raise FileSeqException(msg.format(pattern))
@@ -3,11 +3,50 @@
 frameset - A set-like object representing a frame range for fileseq.
 """
 
+import json
+import struct
+from bisect import bisect_left, bisect_right
 from collections import Set, Sequence
-from fileseq.utils import xfrange, unique, pad
+from itertools import chain
+from operator import and_, or_, sub, xor, index as _index
+from fileseq.utils import unique, pad, LRUCache
 from fileseq.constants import PAD_MAP, FRANGE_RE, PAD_RE
 from fileseq.exceptions import ParseException
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# set operations between FrameSets holding at least this many runs between
+# them, that average fewer than _ARRAY_RUN_LENGTH frames a run, are done on
+# numpy arrays rather than by sweeping over the runs
+_ARRAY_MIN_RUNS = 64
+_ARRAY_RUN_LENGTH = 32
+
+# padding characters, ignored when parsing a frame range
+_PAD_CHARS = ''.join(PAD_MAP.keys())
+
+# FrameSets shared by FrameSet.intern, keyed by class and frame range string
+_interned = LRUCache(maxsize=4096)
+
+# lists of at least this many frames are grouped into runs with numpy
+_ARRAY_MIN_FRAMES = 256
+_INT64_MAX = numpy.uint64(2 ** 63 - 1) if numpy is not None else None
+
+# layout of FrameSet.to_bytes: the format version, flags, integer format and
+# number of runs, followed by the runs as little-endian integers of the
+# narrowest width that holds all of them and, if it cannot be rebuilt from the
+# runs, the frame range string
+_WIRE_VERSION = 1
+_WIRE_HEADER = struct.Struct('<BBcI')
+# the struct formats the runs may be packed with, and the bound of each
+_WIRE_FORMATS = (('b', 2 ** 7), ('h', 2 ** 15), ('i', 2 ** 31), ('q', 2 ** 63))
+# the frame range string follows the runs
+_WIRE_FRANGE = 1
+# frames too large for 64 bits, only the frame range string is stored
+_WIRE_PARSE = 2
+
 class FrameSet(Set):
     """
     A :class:`FrameSet` is an immutable representation of the ordered, unique
@@ -54,7 +93,8 @@ class FrameSet(Set):
              (or a portion of it) could not be parsed
     """
 
-    __slots__ = ('_frange', '_items', '_order')
+    __slots__ = ('_frange', '_parts', '_items', '_order', '_run_cache',
+                 '_offsets', '_spans', '_array', '_hash')
 
     def __new__(cls, *args, **kwargs):
         """
@@ -71,28 +111,37 @@ class FrameSet(Set):
 
 
     def __init__(self, frange):
+        # the frames are stored as a tuple of (start, stop, step) runs, stop
+        # being inclusive; the frozenset and tuple of frames are only
+        # expanded when explicitly asked for via the items and order properties
+        self._frange = None
+        self._parts = None
+        self._items = None
+        self._order = None
+        self._offsets = None
+        self._spans = None
+        self._array = None
+        self._hash = None
+
         # if the user provides anything but a string, short-circuit the build
         if not isinstance(frange, basestring):
             # if it's apparently a FrameSet already, short-circuit the build
             if set(dir(frange)).issuperset(self.__slots__):
-                for attr in self.__slots__:
-                    setattr(self, attr, getattr(frange, attr))
+                self._assign(frange)
+                return
+            # if it's a numpy array, find unique and build in C
+            elif numpy is not None and isinstance(frange, numpy.ndarray):
+                self._assign(FrameSet.from_array(frange))
                 return
             # if it's inherently disordered, sort and build
             elif isinstance(frange, Set):
-                self._items = frozenset(map(int, frange))
-                self._order = tuple(sorted(self._items))
-                self._frange = FrameSet.framesToFrameRange(
-                    self._order, sort=False, compress=False)
+                self._run_cache = tuple(FrameSet._frames_to_runs(
+                    sorted(frozenset(map(int, frange)))))
                 return
             # if it's ordered, find unique and build
             elif isinstance(frange, Sequence):
-                items = set()
-                order = unique(items, map(int, frange))
-                self._order = tuple(order)
-                self._items = frozenset(items)
-                self._frange = FrameSet.framesToFrameRange(
-                    self._order, sort=False, compress=False)
+                order = unique(set(), map(int, frange))
+                self._run_cache = tuple(FrameSet._frames_to_runs(order))
                 return
             # in all other cases, cast to a string
             else:
@@ -104,56 +153,69 @@ class FrameSet(Set):
 
         # we're willing to trim padding characters from consideration
         # this translation is orders of magnitude faster than prior method
-        self._frange = str(frange).translate(None, ''.join(PAD_MAP.keys()))
+        self._frange = str(frange).translate(None, _PAD_CHARS)
 
         # because we're acting like a set, we need to support the empty set
         if not self._frange:
-            self._items = frozenset()
-            self._order = tuple()
+            self._parts = tuple()
+            self._run_cache = tuple()
             return
 
-        # build the mutable stores, then cast to immutable for storage
-        items = set()
-        order = []
+        # only validate the syntax here, the runs of frames are built from the
+        # parsed parts when first needed (see _runs)
+        self._parts = tuple(FrameSet._parse_frange_part(part)
+                            for part in self._frange.split(",")
+                            # this is to deal with leading / trailing commas
+                            if part)
+        self._run_cache = None
 
-        for part in self._frange.split(","):
-            # this is to deal with leading / trailing commas
-            if not part:
-                continue
-            # parse the partial range
-            start, end, modifier, chunk = FrameSet._parse_frange_part(part)
-            # handle batched frames (1-100x5)
-            if modifier == 'x':
-                frames = xfrange(start, end, chunk)
-                frames = [f for f in frames if f not in items]
-                order.extend(frames)
-                items.update(frames)
-            # handle staggered frames (1-100:5)
-            elif modifier == ':':
-                for stagger in xrange(chunk, 0, -1):
-                    frames = xfrange(start, end, stagger)
-                    frames = [f for f in frames if f not in items]
-                    order.extend(frames)
-                    items.update(frames)
-            # handle filled frames (1-100y5)
-            elif modifier == 'y':
-                not_good = frozenset(xfrange(start, end, chunk))
-                frames = xfrange(start, end, 1)
-                frames = (f for f in frames if f not in not_good)
-                frames = [f for f in frames if f not in items]
-                order.extend(frames)
-                items.update(frames)
-            # handle full ranges and single frames
-            else:
-                frames = xfrange(start, end, 1 if start < end else -1)
-                frames = [f for f in frames if f not in items]
-                order.extend(frames)
-                items.update(frames)
+    def _assign(self, other):
+        """
+        Private method: share the internals of another :class:`FrameSet`,
+        which is safe as they are never mutated once built.
+
+        :type other: :class:`FrameSet`
+        :rtype: None
+        """
+        for attr in self.__slots__:
+            setattr(self, attr, getattr(other, attr))
 
-        # lock the results into immutable internals
-        # this allows for hashing and fast equality checking
-        self._items = frozenset(items)
-        self._order = tuple(order)
+    @property
+    def _runs(self):
+        """
+        Private access to the (start, stop, step) runs of frames, built from
+        the parsed frame range parts on first access.
+
+        :rtype: tuple
+        """
+        if self._run_cache is None:
+            # build the mutable stores, then cast to immutable for storage
+            runs = []
+            # sorted, disjoint (lo, hi) value spans already covered by runs,
+            # used to skip the duplicate check for parts that cannot overlap
+            spans = ([], [])
+            for part in self._parts:
+                for run in FrameSet._part_runs(*part):
+                    FrameSet._add_run(runs, spans, run)
+            # lock the results into immutable internals
+            self._run_cache = tuple(runs)
+        return self._run_cache
+
+    def _first_frame(self):
+        """
+        Private method: the first frame, read from the parsed frame range
+        parts if the runs have not been built yet.
+
+        :rtype: int
+        :raises: :class:`IndexError` (with the empty :class:`FrameSet`)
+        """
+        if self._run_cache is None:
+            # nothing precedes the first frame of the first non-empty part,
+            # so it can never be dropped as a duplicate
+            for part in self._parts:
+                for run in FrameSet._part_runs(*part):
+                    return run[0]
+        return self._runs[0][0]
 
     @property
     def is_null(self):
@@ -163,33 +225,47 @@ class FrameSet(Set):
 
         :rtype: bool
         """
-        return not (self._frange and self._items and self._order)
+        try:
+            self._first_frame()
+        except IndexError:
+            return True
+        return False
 
     @property
     def frange(self):
         """
         Read-only access to the frame range used to create this :class:`FrameSet`.
+        Sets built from frames rather than a string have it built from their
+        runs on first access.
 
         :rtype: frozenset
         """
+        if self._frange is None:
+            self._frange = FrameSet._build_frange(self._runs)
         return self._frange
 
     @property
     def items(self):
         """
         Read-only access to the unique frames that form this :class:`FrameSet`.
+        The frozenset is expanded from the runs on first access.
 
         :rtype: frozenset
         """
+        if self._items is None:
+            self._items = frozenset(self)
         return self._items
 
     @property
     def order(self):
         """
         Read-only access to the ordered frames that form this :class:`FrameSet`.
+        The tuple is expanded from the runs on first access.
 
         :rtype: tuple
         """
+        if self._order is None:
+            self._order = tuple(self)
         return self._order
 
     @classmethod
@@ -203,6 +279,108 @@ class FrameSet(Set):
         """
         return FrameSet(sorted(frames) if sort else frames)
 
+    @classmethod
+    def intern(cls, frange):
+        """
+        Return a shared :class:`FrameSet` for a frame range string, only
+        parsing the string the first time it is seen (or after it has been
+        discarded from the bounded intern table).  Anything else than a string
+        is passed on to the constructor.
+
+        :Example:
+            >>> FrameSet.intern('1001-1100') is FrameSet.intern('1001-1100')
+            True
+
+        :type frange: str
+        :param frange: the frame range as a string (ie "1-100x5")
+        :rtype: :class:`FrameSet`
+        :raises: :class:`fileseq.exceptions.ParseException` if the frame range
+                 (or a portion of it) could not be parsed
+        """
+        if not isinstance(frange, basestring):
+            return cls(frange)
+        key = (cls, str(frange).translate(None, _PAD_CHARS))
+        self = _interned.get(key)
+        if self is None:
+            self = cls(key[1])
+            _interned.put(key, self)
+        return self
+
+    @staticmethod
+    def intern_info():
+        """
+        Report the statistics of the table used by :meth:`intern`.
+
+        :rtype: :class:`fileseq.utils.CacheInfo` (hits, misses, maxsize,
+                currsize)
+        """
+        return _interned.info()
+
+    @staticmethod
+    def intern_clear(maxsize=None):
+        """
+        Empty the table used by :meth:`intern` and reset its statistics,
+        optionally changing the number of frame ranges it keeps.
+
+        :type maxsize: int
+        :param maxsize: the new size of the table, 0 disables interning
+        :rtype: None
+        """
+        _interned.clear()
+        if maxsize is not None:
+            _interned.resize(maxsize)
+
+    @classmethod
+    def from_array(cls, frames, sort=False):
+        """
+        Build a :class:`FrameSet` from an array of frames.  With numpy
+        available, finding the unique frames and grouping them into ranges
+        is vectorized, otherwise this is the same as :meth:`from_iterable`.
+
+        :param frames: a numpy array, or any sequence of frames as integers
+        :param sort: True to sort frames before creation, default is False
+        :rtype: :class:`FrameSet`
+        """
+        if numpy is None:
+            return cls.from_iterable(frames, sort=sort)
+        frames = numpy.asarray(frames).astype(numpy.int64).ravel()
+        if sort:
+            items = numpy.unique(frames)
+        else:
+            # keep the first occurrence of each frame, in order
+            first = numpy.unique(frames, return_index=True)[1]
+            items = frames[numpy.sort(first)]
+        self = cls._from_runs(FrameSet._array_to_runs(items))
+        if sort:
+            items.flags.writeable = False
+            self._array = items
+        return self
+
+    @classmethod
+    def _from_runs(cls, runs, frange=None):
+        """
+        Private method: build a :class:`FrameSet` directly from its
+        (start, stop, step) runs, without parsing.
+
+        :type runs: iterable
+        :param runs: the runs of frames, in order and unique
+        :type frange: str
+        :param frange: the frame range string, built from the runs when first
+                       needed if None
+        :rtype: :class:`FrameSet`
+        """
+        self = cls.__new__(cls)
+        self._frange = frange
+        self._parts = None
+        self._items = None
+        self._order = None
+        self._offsets = None
+        self._spans = None
+        self._array = None
+        self._hash = None
+        self._run_cache = tuple(runs)
+        return self
+
     @classmethod
     def _cast_to_frameset(cls, other):
         """
@@ -228,7 +406,64 @@ class FrameSet(Set):
         :rtype: int
         :raises: :class:`ValueError` if frame is not in self
         """
-        return self.order.index(frame)
+        idx = self._find(frame)
+        if idx is None:
+            raise ValueError('{0!r} is not in FrameSet'.format(frame))
+        return idx
+
+    def _find(self, frame):
+        """
+        Private method: the index of frame, looked up in the run holding it.
+
+        :type frame: int
+        :rtype: int, or None if frame is not in self
+        """
+        runs = self._runs
+        offsets, spans = self._lookup()
+        if len(runs) == 1:
+            candidates = (0,)
+        elif spans is not None:
+            pos = bisect_right(spans[0], frame) - 1
+            candidates = (spans[1][pos],) if pos >= 0 else ()
+        else:
+            candidates = xrange(len(runs))
+        for idx in candidates:
+            found = FrameSet._run_index(runs[idx], frame)
+            if found is not None:
+                return offsets[idx] + found
+        return None
+
+    def _lookup(self):
+        """
+        Private method: the tables used to look up frames and indices,
+        built on first use.
+
+        The offsets are the index of the first frame of each run, followed by
+        the length of the :class:`FrameSet`.  The spans are the lowest value of
+        each run in ascending order, paired with the position of the run, or
+        None when the values spanned by the runs interleave.
+
+        :rtype: tuple (offsets, spans)
+        """
+        if self._offsets is None:
+            offsets = [0]
+            for run in self._runs:
+                offsets.append(offsets[-1] + FrameSet._run_len(run))
+            spans = [(min(start, stop), max(start, stop), idx)
+                     for idx, (start, stop, _) in enumerate(self._runs)]
+            if any(spans[idx][0] < spans[idx - 1][0]
+                   for idx in xrange(1, len(spans))):
+                spans.sort()
+            for idx in xrange(1, len(spans)):
+                if spans[idx][0] <= spans[idx - 1][1]:
+                    spans = None
+                    break
+            else:
+                spans = (tuple(lo for lo, _, _ in spans),
+                         tuple(idx for _, _, idx in spans))
+            self._spans = spans
+            self._offsets = tuple(offsets)
+        return self._offsets, self._spans
 
     def frame(self, index):
         """
@@ -239,7 +474,7 @@ class FrameSet(Set):
         :rtype: int
         :raises: :class:`IndexError` if index is out of bounds
         """
-        return self.order[index]
+        return self[index]
 
     def hasFrame(self, frame):
         """
@@ -251,6 +486,45 @@ class FrameSet(Set):
         """
         return frame in self
 
+    def hasFrames(self, frames):
+        """
+        Check which of many frames the :class:`FrameSet` contains.  With numpy
+        available, the frames are looked up in the runs all at once.
+
+        :param frames: a numpy array, or any sequence of frames as integers
+        :rtype: :class:`numpy.ndarray` of bool, or a list of bool without numpy
+        """
+        if numpy is None:
+            return [frame in self for frame in frames]
+        frames = numpy.asarray(frames).astype(numpy.int64)
+        if not self._runs:
+            return numpy.zeros(frames.shape, dtype=bool)
+        runs = numpy.array(self._runs, dtype=numpy.int64)
+        starts, stops = runs[:, 0], runs[:, 1]
+        order = numpy.argsort(numpy.minimum(starts, stops), kind='mergesort')
+        los = numpy.minimum(starts, stops)[order]
+        his = numpy.maximum(starts, stops)[order]
+        if (los[1:] <= his[:-1]).any():
+            # interleaved runs (ie 1-100:4) are checked against every frame
+            return numpy.isin(frames, self._sorted_array())
+        steps = numpy.abs(runs[:, 2])[order]
+        pos = numpy.maximum(numpy.searchsorted(los, frames, 'right') - 1, 0)
+        return ((frames >= los[pos]) & (frames <= his[pos]) &
+                ((frames - los[pos]) % steps[pos] == 0))
+
+    def _sorted_array(self):
+        """
+        Private method: the frames as a sorted, read-only numpy array, built
+        on first use.
+
+        :rtype: :class:`numpy.ndarray`
+        """
+        if self._array is None:
+            array = numpy.sort(FrameSet._runs_to_array(self._runs))
+            array.flags.writeable = False
+            self._array = array
+        return self._array
+
     def start(self):
         """
         The first frame in the :class:`FrameSet`.
@@ -258,7 +532,7 @@ class FrameSet(Set):
         :rtype: int
         :raises: :class:`IndexError` (with the empty :class:`FrameSet`)
         """
-        return self.order[0]
+        return self._first_frame()
 
     def end(self):
         """
@@ -267,7 +541,7 @@ class FrameSet(Set):
         :rtype: int
         :raises: :class:`IndexError` (with the empty :class:`FrameSet`)
         """
-        return self.order[-1]
+        return self._runs[-1][1]
 
     def frameRange(self, zfill=0):
         """
@@ -302,16 +576,61 @@ class FrameSet(Set):
         :param zfill: the width to use to zero-pad the frame range string
         :rtype: str
         """
-        result = []
-        frames = sorted(self.items)
-        for idx, frame in enumerate(frames[:-1]):
-            next_frame = frames[idx + 1]
-            if next_frame - frame != 1:
-                result += xrange(frame + 1, next_frame)
-        if not result:
-            return ''
+        inverted = self.inverted()
+        if not zfill:
+            return inverted.frameRange()
+        # padded ranges of negative frames are padded including their sign
         return FrameSet.framesToFrameRange(
-            result, zfill=zfill, sort=False, compress=False)
+            inverted, zfill=zfill, sort=False, compress=False)
+
+    def inverted(self):
+        """
+        Return the frames missing from the full extent of this
+        :class:`FrameSet`, in ascending order.  The gaps are read from the
+        runs, so the cost is in the number of runs and gaps, not frames.
+
+        :Example:
+            >>> FrameSet('1-5,9,20-30x2').inverted()
+            FrameSet("6-8,10-19,21-29x2")
+
+        :rtype: :class:`FrameSet`
+        """
+        runs = []
+        prev_stop = None
+        for start, stop, step in self._ascending_runs():
+            if prev_stop is not None and start - prev_stop > 1:
+                runs.append((prev_stop + 1, start - 1, 1))
+            if step == 2 and stop != start:
+                runs.append((start + 1, stop - 1, 2))
+            elif step > 2:
+                runs.extend((frame + 1, frame + step - 1, 1)
+                            for frame in xrange(start, stop, step))
+            prev_stop = stop
+        return FrameSet._from_runs(FrameSet._normalize_runs(runs))
+
+    def gaps(self):
+        """
+        Return the spans of consecutive frames missing from the full extent
+        of this :class:`FrameSet`, in ascending order, read from the runs the
+        same way as :meth:`inverted`.
+
+        :Example:
+            >>> FrameSet('1-5,9,20-24x2').gaps()
+            [(6, 8), (10, 19), (21, 21), (23, 23)]
+
+        :rtype: list
+        :returns: (first, last) tuples
+        """
+        spans = []
+        prev_stop = None
+        for start, stop, step in self._ascending_runs():
+            if prev_stop is not None and start - prev_stop > 1:
+                spans.append((prev_stop + 1, start - 1))
+            if step > 1:
+                spans.extend((frame + 1, frame + step - 1)
+                             for frame in xrange(start, stop, step))
+            prev_stop = stop
+        return spans
 
     def normalize(self):
         """
@@ -319,8 +638,118 @@ class FrameSet(Set):
 
         :rtype: :class:`FrameSet`
         """
-        return FrameSet(FrameSet.framesToFrameRange(
-            self.items, sort=True, compress=False))
+        return FrameSet._from_runs(
+            FrameSet._normalize_runs(self._ascending_runs()))
+
+    def chunks(self, size):
+        """
+        Split the ordered frames of this :class:`FrameSet` into consecutive
+        :class:`FrameSet` objects of `size` frames, the last one holding
+        whatever is left over.
+
+        :Example:
+            >>> FrameSet('1-10').chunks(4)
+            [FrameSet("1-4"), FrameSet("5-8"), FrameSet("9-10")]
+
+        :type size: int
+        :param size: the number of frames per chunk
+        :rtype: list
+        :raises: :class:`ValueError` if size is less than 1
+        """
+        size = _index(size)
+        if size < 1:
+            raise ValueError('chunk size must be at least 1, got {0}'.format(size))
+        total = len(self)
+        return [self._slice(start, min(start + size, total))
+                for start in xrange(0, total, size)]
+
+    def partition(self, count):
+        """
+        Split the ordered frames of this :class:`FrameSet` into `count`
+        consecutive :class:`FrameSet` objects whose lengths differ by one
+        frame at most, the longer ones first.  There are fewer chunks than
+        asked for when there are fewer frames than that, as no chunk is empty.
+
+        :Example:
+            >>> FrameSet('1-10').partition(3)
+            [FrameSet("1-4"), FrameSet("5-7"), FrameSet("8-10")]
+
+        :type count: int
+        :param count: the number of chunks
+        :rtype: list
+        :raises: :class:`ValueError` if count is less than 1
+        """
+        count = _index(count)
+        if count < 1:
+            raise ValueError('chunk count must be at least 1, got {0}'.format(count))
+        total = len(self)
+        count = min(count, total)
+        if not count:
+            return []
+        size, extra = divmod(total, count)
+        chunks = []
+        start = 0
+        for idx in xrange(count):
+            stop = start + size + (idx < extra)
+            chunks.append(self._slice(start, stop))
+            start = stop
+        return chunks
+
+    def run_chunks(self, size=None):
+        """
+        Split this :class:`FrameSet` into one :class:`FrameSet` per run of
+        evenly spaced frames, such as each range of its frame range, so that
+        every chunk is a single ``start-end[xstep]`` range.  Runs longer
+        than `size` frames are split into chunks of `size` frames.
+
+        :Example:
+            >>> FrameSet('1-10,20-30x5').run_chunks(4)
+            [FrameSet("1-4"), FrameSet("5-8"), FrameSet("9-10"), FrameSet("20-30x5")]
+
+        :type size: int
+        :param size: the maximum number of frames per chunk, None for no limit
+        :rtype: list
+        :raises: :class:`ValueError` if size is less than 1
+        """
+        if size is not None:
+            size = _index(size)
+            if size < 1:
+                msg = 'chunk size must be at least 1, got {0}'
+                raise ValueError(msg.format(size))
+        offsets = self._lookup()[0]
+        chunks = []
+        for idx in xrange(len(offsets) - 1):
+            first, last = offsets[idx], offsets[idx + 1]
+            step = last - first if size is None else size
+            for start in xrange(first, last, step):
+                chunks.append(self._slice(start, min(start + step, last)))
+        return chunks
+
+    def _slice(self, start, stop):
+        """
+        Private method: the frames from index start up to index stop of the
+        ordered frames, as a :class:`FrameSet` built from the runs holding
+        them.
+
+        :type start: int
+        :param start: the index of the first frame, in range
+        :type stop: int
+        :param stop: the index after the last frame, in range and above start
+        :rtype: :class:`FrameSet`
+        """
+        runs = self._runs
+        offsets = self._lookup()[0]
+        idx = bisect_right(offsets, start) - 1
+        result = []
+        while start < stop:
+            first, _, step = runs[idx]
+            end = min(stop, offsets[idx + 1])
+            lo = first + (start - offsets[idx]) * step
+            hi = first + (end - 1 - offsets[idx]) * step
+            result.append((lo, hi, step) if lo != hi else (lo, lo, 1))
+            start = end
+            idx += 1
+        return FrameSet._from_runs(result)
 
     def __getstate__(self):
         """
@@ -345,11 +774,11 @@ class FrameSet(Set):
         if isinstance(state, tuple):
             # this is to allow unpickling of "3rd generation" FrameSets,
             # which are immutable and may be empty.
-            self.__init__(state[0])
+            self._assign(FrameSet.intern(state[0]))
         elif isinstance(state, basestring):
             # this is to allow unpickling of "2nd generation" FrameSets,
             # which were mutable and could not be empty.
-            self.__init__(state)
+            self._assign(FrameSet.intern(state))
         elif isinstance(state, dict):
             # this is to allow unpickling of "1st generation" FrameSets,
             # when the full __dict__ was stored
@@ -357,13 +786,153 @@ class FrameSet(Set):
                 self._frange = state['__frange']
                 self._items = frozenset(state['__set'])
                 self._order = tuple(state['__list'])
+                self._parts = None
+                self._offsets = None
+                self._spans = None
+                self._array = None
+                self._hash = None
+                self._run_cache = tuple(FrameSet._frames_to_runs(self._order))
             else:
                 for k in self.__slots__:
-                    setattr(self, k, state[k])
+                    setattr(self, k, state.get(k))
+                if self._run_cache is None and self._parts is None:
+                    self._run_cache = tuple(
+                        FrameSet._frames_to_runs(self._order))
         else:
             msg = "Unrecognized state data from which to deserialize FrameSet"
             raise ValueError(msg)
 
+    def to_bytes(self):
+        """
+        Serialize this :class:`FrameSet` to a compact string of bytes, which
+        :meth:`from_bytes` loads without parsing the frame range.
+
+        :rtype: str
+        """
+        values = list(chain.from_iterable(self._runs))
+        lo, hi = (min(values), max(values)) if values else (0, 0)
+        for fmt, bound in _WIRE_FORMATS:
+            if -bound <= lo and hi < bound:
+                break
+        else:
+            return ''.join((
+                _WIRE_HEADER.pack(_WIRE_VERSION, _WIRE_PARSE, 'q', 0),
+                self.frange))
+        frange = self._wire_frange()
+        return ''.join((
+            _WIRE_HEADER.pack(_WIRE_VERSION, 0 if frange is None else _WIRE_FRANGE,
+                              fmt, len(values) // 3),
+            struct.pack('<%d%s' % (len(values), fmt), *values),
+            frange or ''))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load a :class:`FrameSet` serialized by :meth:`to_bytes`.
+
+        :type data: str
+        :param data: the serialized :class:`FrameSet`
+        :rtype: :class:`FrameSet`
+        :raises: :class:`fileseq.exceptions.ParseException` if the data is
+                 not a serialized :class:`FrameSet`
+        """
+        try:
+            version, flags, fmt, count = _WIRE_HEADER.unpack_from(data)
+            if version != _WIRE_VERSION:
+                msg = 'Unsupported FrameSet serialization version: {0}'
+                raise ParseException(msg.format(version))
+            offset = _WIRE_HEADER.size
+            if flags & _WIRE_PARSE:
+                return cls(str(data[offset:]))
+            if fmt not in 'bhiq':
+                raise struct.error('bad integer format {0!r}'.format(fmt))
+            values = struct.Struct('<%d%s' % (3 * count, fmt))
+            frange = str(data[offset + values.size:])
+            values = values.unpack_from(data, offset)
+        except struct.error as err:
+            msg = 'Could not load FrameSet from bytes: {0}'
+            raise ParseException(msg.format(err))
+        values = iter(values)
+        return cls._from_runs(zip(values, values, values),
+                              frange if flags & _WIRE_FRANGE else None)
+
+    def to_json(self):
+        """
+        Serialize this :class:`FrameSet` to a JSON string, which
+        :meth:`from_json` loads without parsing the frame range.
+
+        :rtype: str
+        """
+        return json.dumps(self._json_state(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Load a :class:`FrameSet` serialized by :meth:`to_json`.
+
+        :type data: str
+        :param data: the serialized :class:`FrameSet`
+        :rtype: :class:`FrameSet`
+        :raises: :class:`fileseq.exceptions.ParseException` if the data is
+                 not a serialized :class:`FrameSet`
+        """
+        try:
+            state = json.loads(data)
+        except ValueError as err:
+            msg = 'Could not load FrameSet from JSON: {0}'
+            raise ParseException(msg.format(err))
+        return cls._from_json_state(state)
+
+    def _json_state(self):
+        """
+        Private method: the JSON object :meth:`to_json` serializes, the runs
+        flattened into a list of integers.
+
+        :rtype: dict
+        """
+        state = {'runs': list(chain.from_iterable(self._runs))}
+        frange = self._wire_frange()
+        if frange is not None:
+            state['frange'] = frange
+        return state
+
+    @classmethod
+    def _from_json_state(cls, state):
+        """
+        Private method: build a :class:`FrameSet` from the JSON object of
+        :meth:`_json_state`.
+
+        :type state: dict
+        :rtype: :class:`FrameSet`
+        :raises: :class:`fileseq.exceptions.ParseException` if state is not
+                 a serialized :class:`FrameSet`
+        """
+        try:
+            values = state['runs']
+            frange = state.get('frange')
+            if len(values) % 3:
+                raise ValueError('incomplete run')
+        except (AttributeError, KeyError, TypeError, ValueError) as err:
+            msg = 'Could not load FrameSet from JSON: {0}'
+            raise ParseException(msg.format(err))
+        if frange is not None:
+            frange = str(frange)
+        values = iter(values)
+        return cls._from_runs(zip(values, values, values), frange)
+
+    def _wire_frange(self):
+        """
+        Private method: the frame range string to serialize along with the
+        runs, or None if building it from the runs gives the same string.
+
+        :rtype: str or None
+        """
+        if self._frange is None:
+            return None
+        if self._frange == FrameSet._build_frange(self._runs):
+            return None
+        return self._frange
+
     def __getitem__(self, index):
         """
         Allows indexing into the ordered frames of this :class:`FrameSet`.
@@ -373,7 +942,28 @@ class FrameSet(Set):
         :rtype: int
         :raises: :class:`IndexError` if index is out of bounds
         """
-        return self.order[index]
+        if isinstance(index, slice):
+            indices = xrange(*index.indices(len(self)))
+            return tuple(self._frame_at(i) for i in indices)
+        return self._frame_at(index)
+
+    def _frame_at(self, index):
+        """
+        Private method: the frame at the given index of the ordered frames.
+
+        :type index: int
+        :rtype: int
+        :raises: :class:`IndexError` if index is out of bounds
+        """
+        index = _index(index)
+        offsets = self._lookup()[0]
+        if index < 0:
+            index += offsets[-1]
+        if not 0 <= index < offsets[-1]:
+            raise IndexError('FrameSet index out of range')
+        idx = bisect_right(offsets, index) - 1
+        start, _, step = self._runs[idx]
+        return start + (index - offsets[idx]) * step
 
     def __len__(self):
         """
@@ -381,7 +971,18 @@ class FrameSet(Set):
 
         :rtype: int
         """
-        return len(self.order)
+        return self._lookup()[0][-1]
+
+    def __nonzero__(self):
+        """
+        Returns True if this :class:`FrameSet` holds any frame, without
+        building its runs.
+
+        :rtype: bool
+        """
+        return not self.is_null
+
+    __bool__ = __nonzero__
 
     def __str__(self):
         """
@@ -405,7 +1006,7 @@ class FrameSet(Set):
 
         :rtype: generator
         """
-        return (i for i in self.order)
+        return (i for run in self._runs for i in FrameSet._run_range(run))
 
     def __reversed__(self):
         """
@@ -414,7 +1015,8 @@ class FrameSet(Set):
 
         :rtype: generator
         """
-        return (i for i in reversed(self.order))
+        return (i for run in reversed(self._runs)
+                for i in reversed(FrameSet._run_range(run)))
 
     def __contains__(self, item):
         """
@@ -424,16 +1026,20 @@ class FrameSet(Set):
         :param item: the frame number to check for
         :rtype: bool
         """
-        return item in self.items
+        return self._find(item) is not None
 
     def __hash__(self):
         """
         Builds the hash of this :class:`FrameSet` for equality checking and to
-        allow use as a dictionary key.
+        allow use as a dictionary key.  It is computed once, from the runs
+        regrouped into their canonical form, so equal sets hash the same
+        whichever frame range they were built from.
 
         :rtype: int
         """
-        return hash(self.frange) | hash(self.items) | hash(self.order)
+        if self._hash is None:
+            self._hash = hash(tuple(FrameSet._normalize_runs(self._runs)))
+        return self._hash
 
     def __lt__(self, other):
         """
@@ -474,15 +1080,12 @@ class FrameSet(Set):
         :rtype: bool, or :class:`NotImplemented` if `other` fails to convert
                 to a :class:`FrameSet`
         """
-        other = self._cast_to_frameset(other)
-        if other is NotImplemented:
-            return NotImplemented
-        return self.items <= other.items
+        return self.issubset(other)
 
     def __eq__(self, other):
         """
-        Check if `self` == `other` via a comparison of the hash of
-        their contents.
+        Check if `self` == `other` via a comparison of their runs of frames,
+        without expanding either of them.
         If `other` is not a :class:`FrameSet`, but is a set, frozenset, or
         is iterable, it will be cast to a :class:`FrameSet`.
 
@@ -491,18 +1094,25 @@ class FrameSet(Set):
         :rtype: bool, or :class:`NotImplemented` if `other` fails to convert
                 to a :class:`FrameSet`
         """
+        if self is other:
+            return True
         if not isinstance(other, FrameSet):
             if not hasattr(other, '__iter__'):
                 return NotImplemented
             other = self.from_iterable(other)
-        this = hash(self.items) | hash(self.order)
-        that = hash(other.items) | hash(other.order)
-        return this == that
+        if self._runs == other._runs:
+            return True
+        # the same frames can be grouped into different runs depending on how
+        # the sets were built, so only the cached hashes or the regrouped runs
+        # tell unequal sets apart
+        if hash(self) != hash(other):
+            return False
+        return (FrameSet._normalize_runs(self._runs) ==
+                FrameSet._normalize_runs(other._runs))
 
     def __ne__(self, other):
         """
-        Check if `self` != `other` via a comparison of the hash of
-        their contents.
+        Check if `self` != `other` via a comparison of their runs of frames.
         If `other` is not a :class:`FrameSet`, but is a set, frozenset, or
         is iterable, it will be cast to a :class:`FrameSet`.
 
@@ -527,10 +1137,7 @@ class FrameSet(Set):
         :rtype: bool, or :class:`NotImplemented` if `other` fails to convert
                 to a :class:`FrameSet`
         """
-        other = self._cast_to_frameset(other)
-        if other is NotImplemented:
-            return NotImplemented
-        return self.items >= other.items
+        return self.issuperset(other)
 
     def __gt__(self, other):
         """
@@ -578,7 +1185,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.from_iterable(self.items & other.items, sort=True)
+        return self._combine(other, and_)
 
     __rand__ = __and__
 
@@ -599,7 +1206,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.from_iterable(self.items - other.items, sort=True)
+        return self._combine(other, sub)
 
     def __rsub__(self, other):
         """
@@ -618,7 +1225,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.from_iterable(other.items - self.items, sort=True)
+        return other._combine(self, sub)
 
     def __or__(self, other):
         """
@@ -638,7 +1245,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.from_iterable(self.items | other.items, sort=True)
+        return self._combine(other, or_)
 
     __ror__ = __or__
 
@@ -659,7 +1266,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.from_iterable(self.items ^ other.items, sort=True)
+        return self._combine(other, xor)
 
     __rxor__ = __xor__
 
@@ -675,7 +1282,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.items.isdisjoint(other.items)
+        return not self._combine(other, and_)._runs
 
     def issubset(self, other):
         """
@@ -689,7 +1296,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.items <= other.items
+        return not self._combine(other, sub)._runs
 
     def issuperset(self, other):
         """
@@ -703,7 +1310,7 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        return self.items >= other.items
+        return not other._combine(self, sub)._runs
 
     def union(self, *other):
         """
@@ -713,8 +1320,7 @@ class FrameSet(Set):
         :type other: :class:`FrameSet` or objects that can cast to :class:`FrameSet`
         :rtype: :class:`FrameSet`
         """
-        from_frozenset = self.items.union(*map(set, other))
-        return self.from_iterable(from_frozenset, sort=True)
+        return self._combine_all(other, or_)
 
     def intersection(self, *other):
         """
@@ -724,8 +1330,7 @@ class FrameSet(Set):
         :type other: :class:`FrameSet` or objects that can cast to :class:`FrameSet`
         :rtype: :class:`FrameSet`
         """
-        from_frozenset = self.items.intersection(*map(set, other))
-        return self.from_iterable(from_frozenset, sort=True)
+        return self._combine_all(other, and_)
 
     def difference(self, *other):
         """
@@ -735,8 +1340,7 @@ class FrameSet(Set):
         :type other: :class:`FrameSet` or objects that can cast to :class:`FrameSet`
         :rtype: :class:`FrameSet`
         """
-        from_frozenset = self.items.difference(*map(set, other))
-        return self.from_iterable(from_frozenset, sort=True)
+        return self._combine_all(other, sub)
 
     def symmetric_difference(self, other):
         """
@@ -749,8 +1353,188 @@ class FrameSet(Set):
         other = self._cast_to_frameset(other)
         if other is NotImplemented:
             return NotImplemented
-        from_frozenset = self.items.symmetric_difference(other.items)
-        return self.from_iterable(from_frozenset, sort=True)
+        return self._combine(other, xor)
+
+    def _ascending_runs(self):
+        """
+        Private method: the runs of this :class:`FrameSet` in ascending order
+        of value, each run ascending and spanning values no other run spans.
+
+        :rtype: list
+        """
+        runs = sorted((start, stop, step) if step > 0 else (stop, start, -step)
+                      for start, stop, step in self._runs)
+        for idx in xrange(1, len(runs)):
+            if runs[idx][0] <= runs[idx - 1][1]:
+                # interleaved runs (ie 1-100:4) have to be sorted frame by frame
+                if numpy is not None:
+                    return FrameSet._array_to_runs(self._sorted_array())
+                return list(FrameSet._frames_to_runs(sorted(self)))
+        return runs
+
+    def _combine(self, other, op):
+        """
+        Private method: apply a set operation to the frames of `self` and
+        `other` by sweeping over their ascending runs.
+
+        Every run boundary of either side splits the values into spans where
+        each side holds at most one run, so the result of each span is worked
+        out from a pair of runs.
+
+        :type other: :class:`FrameSet`
+        :type op: function
+        :param op: one of :func:`operator.and_`, :func:`operator.or_`,
+                   :func:`operator.sub` or :func:`operator.xor`
+        :rtype: :class:`FrameSet`
+        """
+        if numpy is not None and self._prefer_array(other):
+            return FrameSet._combine_arrays(
+                self._sorted_array(), other._sorted_array(), op)
+
+        _clip = FrameSet._clip_run
+        left = self._ascending_runs()
+        right = other._ascending_runs()
+        bounds = sorted(set(chain.from_iterable(
+            (lo, hi + 1) for lo, hi, _ in chain(left, right))))
+
+        runs = []
+        lidx = ridx = 0
+        for idx in xrange(1, len(bounds)):
+            lo, hi = bounds[idx - 1], bounds[idx] - 1
+            while lidx < len(left) and left[lidx][1] < lo:
+                lidx += 1
+            while ridx < len(right) and right[ridx][1] < lo:
+                ridx += 1
+            lrun = rrun = None
+            if lidx < len(left) and left[lidx][0] <= lo:
+                lrun = _clip(left[lidx], lo, hi)
+            if ridx < len(right) and right[ridx][0] <= lo:
+                rrun = _clip(right[ridx], lo, hi)
+            for run in FrameSet._combine_runs(lrun, rrun, op):
+                FrameSet._append_run(runs, run)
+
+        return FrameSet._from_runs(FrameSet._normalize_runs(runs))
+
+    def _prefer_array(self, other):
+        """
+        Private method: whether a set operation with `other` is best done on
+        numpy arrays, which is when both hold many short runs.
+
+        :type other: :class:`FrameSet`
+        :rtype: bool
+        """
+        runs = len(self._runs) + len(other._runs)
+        if runs < _ARRAY_MIN_RUNS:
+            return False
+        frames = runs * _ARRAY_RUN_LENGTH
+        for start, stop, step in chain(self._runs, other._runs):
+            frames -= (stop - start) // step + 1
+            if frames <= 0:
+                return False
+        return True
+
+    @staticmethod
+    def _combine_arrays(left, right, op):
+        """
+        Private method: apply a set operation to two sorted arrays of unique
+        frames.
+
+        :type left: :class:`numpy.ndarray`
+        :type right: :class:`numpy.ndarray`
+        :type op: function
+        :rtype: :class:`FrameSet`
+        """
+        if op is and_:
+            frames = numpy.intersect1d(left, right, assume_unique=True)
+        elif op is or_:
+            frames = numpy.union1d(left, right)
+        elif op is sub:
+            frames = numpy.setdiff1d(left, right, assume_unique=True)
+        else:
+            frames = numpy.setxor1d(left, right, assume_unique=True)
+        self = FrameSet._from_runs(FrameSet._array_to_runs(frames))
+        frames.flags.writeable = False
+        self._array = frames
+        return self
+
+    def _combine_all(self, others, op):
+        """
+        Private method: apply a set operation between `self` and each of
+        `others` in turn.
+
+        :type others: iterable
+        :param others: :class:`FrameSet` or iterables of frames
+        :type op: function
+        :rtype: :class:`FrameSet`
+        """
+        result = self
+        for other in others:
+            if not isinstance(other, FrameSet):
+                other = FrameSet(set(other))
+            result = result._combine(other, op)
+        if result is self:
+            result = self.normalize()
+        return result
+
+    @staticmethod
+    def _combine_runs(lrun, rrun, op):
+        """
+        Private method: apply a set operation to the frames of two ascending
+        runs spanning the same values.  Either run may be None.
+
+        :type lrun: tuple
+        :type rrun: tuple
+        :type op: function
+        :rtype: iterable of ascending runs
+        """
+        if rrun is None:
+            return () if lrun is None or op is and_ else (lrun,)
+        if lrun is None:
+            return (rrun,) if op is or_ or op is xor else ()
+        if op is and_:
+            run = FrameSet._intersect_runs(lrun, rrun)
+            return () if run is None else (run,)
+        if lrun == rrun:
+            return (lrun,) if op is or_ else ()
+        # a step of one holds every value of the span
+        if rrun[2] == 1 and op is not xor:
+            return (rrun,) if op is or_ else ()
+        if lrun[2] == 1 and op is or_:
+            return (lrun,)
+        frames = op(set(FrameSet._run_range(lrun)),
+                    set(FrameSet._run_range(rrun)))
+        return FrameSet._frames_to_runs(sorted(frames))
+
+    @staticmethod
+    def _intersect_runs(lrun, rrun):
+        """
+        Private method: the frames two ascending runs have in common, which
+        are themselves a run stepping by the lowest common multiple of the
+        two steps.
+
+        :type lrun: tuple
+        :type rrun: tuple
+        :rtype: tuple, or None if the runs have no frame in common
+        """
+        lstart, lstop, lstep = lrun
+        rstart, rstop, rstep = rrun
+        # solve lstart + lstep * k == rstart (mod rstep)
+        gcd, rem = lstep, rstep
+        coef, next_coef = 1, 0
+        while rem:
+            quot = gcd // rem
+            gcd, rem = rem, gcd - quot * rem
+            coef, next_coef = next_coef, coef - quot * next_coef
+        shift, odd = divmod(rstart - lstart, gcd)
+        if odd:
+            return None
+        step = lstep // gcd * rstep
+        first = lstart + lstep * (coef * shift % (rstep // gcd))
+        lo, hi = max(lstart, rstart), min(lstop, rstop)
+        first, last = lo + (first - lo) % step, hi - (hi - first) % step
+        if first > last:
+            return None
+        return first, last, step
 
     def copy(self):
         """
@@ -772,7 +1556,7 @@ class FrameSet(Set):
         """
         # we're willing to trim padding characters from consideration
         # this translation is orders of magnitude faster than prior method
-        frange = str(frange).translate(None, ''.join(PAD_MAP.keys()))
+        frange = str(frange).translate(None, _PAD_CHARS)
         if not frange:
             return True
         for part in frange.split(','):
@@ -856,6 +1640,441 @@ class FrameSet(Set):
         else:
             return '{0}-{1}x{2}'.format(pad_start, pad_stop, stride)
 
+    @staticmethod
+    def _build_frange(runs, zfill=0):
+        """
+        Private method: builds the frame range string of normalized runs, as
+        produced by :meth:`_frames_to_runs`.
+
+        :type runs: iterable
+        :param runs: (start, stop, step) tuples
+        :type zfill: int
+        :param zfill: width for zero padding
+        :rtype: str
+        """
+        # this is _build_frange_part inlined, as it is run for every run
+        return ','.join(
+            '%0*d' % (zfill, start) if start == stop else
+            '%0*d-%0*d' % (zfill, start, zfill, stop) if abs(step) == 1 else
+            '%0*d-%0*dx%d' % (zfill, start, zfill, stop, abs(step))
+            for start, stop, step in runs)
+
+    @staticmethod
+    def _run_len(run):
+        """
+        Private method: the number of frames in a (start, stop, step) run.
+
+        :type run: tuple
+        :rtype: int
+        """
+        start, stop, step = run
+        return (stop - start) // step + 1
+
+    @staticmethod
+    def _run_range(run):
+        """
+        Private method: the frames of a (start, stop, step) run, in order.
+
+        :type run: tuple
+        :rtype: xrange
+        """
+        start, stop, step = run
+        return xrange(start, stop + step, step)
+
+    @staticmethod
+    def _run_index(run, frame):
+        """
+        Private method: the position of frame within a (start, stop, step)
+        run.
+
+        :type run: tuple
+        :type frame: int
+        :rtype: int, or None if frame is not in the run
+        """
+        start, stop, step = run
+        try:
+            idx, rem = divmod(frame - start, step)
+        except TypeError:
+            return None
+        if rem or idx < 0 or idx > (stop - start) // step:
+            return None
+        return int(idx)
+
+    @staticmethod
+    def _clip_run(run, lo=None, hi=None):
+        """
+        Private method: the part of a (start, stop, step) run whose frames
+        fall between lo and hi, inclusive.  A bound of None is open.
+
+        :type run: tuple
+        :type lo: int
+        :type hi: int
+        :rtype: tuple, or None if no frame of the run is in bounds
+        """
+        start, stop, step = run
+        first, last = start, stop
+        if step > 0:
+            if lo is not None and first < lo:
+                first = start - ((start - lo) // step) * step
+            if hi is not None and last > hi:
+                last = start + ((hi - start) // step) * step
+            if first > last:
+                return None
+        else:
+            if hi is not None and first > hi:
+                first = start - ((start - hi) // step) * step
+            if lo is not None and last < lo:
+                last = start + ((lo - start) // step) * step
+            if first < last:
+                return None
+        return first, last, step
+
+    @staticmethod
+    def _part_runs(start, end, modifier, chunk):
+        """
+        Private method: the runs described by a parsed frame range part, in
+        order.  Runs of a staggered part overlap each other.
+
+        :type start: int
+        :type end: int
+        :type modifier: str
+        :type chunk: int
+        :rtype: generator
+        """
+        sign = 1 if start <= end else -1
+        if modifier == 'x':
+            strides = (chunk,)
+        elif modifier == ':':
+            strides = xrange(chunk, 0, -1)
+        elif modifier == 'y':
+            # the frames in between every chunk-th frame, a block at a time
+            if chunk > 1:
+                for first in xrange(start + sign, end + sign, chunk * sign):
+                    last = first + (chunk - 2) * sign
+                    if (end - last) * sign < 0:
+                        last = end
+                    yield first, last, sign
+            return
+        else:
+            strides = (1,)
+        for stride in strides:
+            step = stride * sign
+            yield start, start + (abs(end - start) // stride) * step, step
+
+    @staticmethod
+    def _append_run(runs, run):
+        """
+        Private method: append a run to a list of runs, extending the last
+        run instead if the new one continues its progression.
+
+        :type runs: list
+        :type run: tuple
+        :rtype: None
+        """
+        start, stop, step = run
+        if start == stop:
+            step = 1
+        if runs:
+            prev_start, prev_stop, prev_step = runs[-1]
+            if prev_start == prev_stop:
+                # a single frame continues into whatever follows it
+                if start == stop:
+                    runs[-1] = (prev_start, stop, start - prev_start)
+                    return
+                if start - prev_start == step:
+                    runs[-1] = (prev_start, stop, step)
+                    return
+            elif start - prev_stop == prev_step and (
+                    start == stop or step == prev_step):
+                runs[-1] = (prev_start, stop, prev_step)
+                return
+        runs.append((start, stop, step))
+
+    @staticmethod
+    def _add_run(runs, spans, run):
+        """
+        Private method: append the frames of run that are not already held in
+        runs, preserving their order.
+
+        Only the frames of run falling within the value span of the runs they
+        may collide with are expanded to be checked, the rest is appended as is.
+
+        :type runs: list
+        :param runs: (start, stop, step) tuples built so far
+        :type spans: tuple
+        :param spans: sorted, disjoint lists of (lo, hi) values covered by runs
+        :type run: tuple
+        :param run: the (start, stop, step) run to add
+        :rtype: None
+        """
+        _clip = FrameSet._clip_run
+        start, stop, step = run
+        lo, hi = min(start, stop), max(start, stop)
+        los, his = spans
+
+        # the common case of parts given in ascending order
+        if not his or lo > his[-1]:
+            FrameSet._append_run(runs, run)
+            if his and lo == his[-1] + 1:
+                his[-1] = hi
+            else:
+                los.append(lo)
+                his.append(hi)
+            return
+
+        last = bisect_right(los, hi) - 1
+        if last < 0 or his[last] < lo:
+            pieces = (run,)
+        else:
+            first = bisect_left(his, lo)
+            win_lo, win_hi = max(lo, los[first]), min(hi, his[last])
+            seen = set()
+            for other in runs:
+                clipped = _clip(other, win_lo, win_hi)
+                if clipped is not None:
+                    seen.update(FrameSet._run_range(clipped))
+            middle = _clip(run, win_lo, win_hi)
+            fresh = []
+            if middle is not None:
+                fresh = [f for f in FrameSet._run_range(middle)
+                         if f not in seen]
+            middle = list(FrameSet._frames_to_runs(fresh))
+            below = [_clip(run, None, win_lo - 1)]
+            above = [_clip(run, win_hi + 1, None)]
+            if step > 0:
+                pieces = below + middle + above
+            else:
+                pieces = above + middle + below
+
+        for piece in pieces:
+            if piece is not None:
+                FrameSet._append_run(runs, piece)
+
+        # merge the span of the run with those it overlaps or touches
+        first = bisect_left(his, lo - 1)
+        last = bisect_right(los, hi + 1) - 1
+        if first <= last:
+            lo, hi = min(lo, los[first]), max(hi, his[last])
+        los[first:last + 1] = [lo]
+        his[first:last + 1] = [hi]
+
+    @staticmethod
+    def _normalize_runs(runs):
+        """
+        Private method: regroup runs, spanning disjoint values, the way
+        :meth:`_frames_to_runs` groups their frames, in O(runs).  The result
+        only depends on the frames and their order, not on how they were
+        grouped before.
+
+        :type runs: list
+        :param runs: (start, stop, step) tuples
+        :rtype: list
+        """
+        if not runs:
+            return []
+
+        # differences between consecutive frames, as [difference, count]
+        diffs = []
+        prev_stop = None
+        for start, stop, step in runs:
+            if prev_stop is not None:
+                FrameSet._push_diff(diffs, start - prev_stop, 1)
+            if stop != start:
+                FrameSet._push_diff(diffs, step, (stop - start) // step)
+            prev_stop = stop
+        return FrameSet._diffs_to_runs(runs[0][0], diffs)
+
+    @staticmethod
+    def _diffs_to_runs(frame, diffs):
+        """
+        Private method: group frames, given as the first frame and the
+        run-length encoded differences between consecutive frames, the way
+        :meth:`_frames_to_runs` groups them, in O(len(diffs)).
+
+        :type frame: int
+        :param frame: the first frame
+        :type diffs: list
+        :param diffs: (difference, count) pairs, no two adjacent differences
+                      being equal
+        :rtype: list
+        """
+        result = []
+        idx = used = 0
+        while idx < len(diffs):
+            diff, count = diffs[idx]
+            length = count - used
+            idx += 1
+            used = 0
+            if length == 1:
+                # a pair of frames is never a range
+                result.append((frame, frame, 1))
+                frame += diff
+                continue
+            last = frame + length * diff
+            result.append((frame, last, diff))
+            if idx == len(diffs):
+                return result
+            # step over to the first frame of the next range
+            frame = last + diffs[idx][0]
+            used = 1
+            if diffs[idx][1] == 1:
+                idx += 1
+                used = 0
+        result.append((frame, frame, 1))
+        return result
+
+    @staticmethod
+    def _array_to_runs(frames):
+        """
+        Private method: the vectorized version of :meth:`_frames_to_runs`, for
+        a numpy array of unique frames, or of frames moving in one direction.
+
+        :type frames: :class:`numpy.ndarray`
+        :rtype: list
+        """
+        if len(frames) < 2:
+            return [(frame, frame, 1) for frame in frames.tolist()]
+        deltas = numpy.diff(frames)
+        # the index of the first of each stretch of equal differences
+        firsts = numpy.flatnonzero(deltas[1:] != deltas[:-1]) + 1
+        firsts = numpy.concatenate(([0], firsts))
+        counts = numpy.diff(numpy.append(firsts, len(deltas)))
+        diffs = zip(deltas[firsts].tolist(), counts.tolist())
+        return FrameSet._diffs_to_runs(int(frames[0]), diffs)
+
+    @staticmethod
+    def _array_to_frange(frames, sort=True, zfill=0, compress=False):
+        """
+        Private method: the vectorized version of :meth:`framesToFrameRange`.
+
+        :type frames: :class:`numpy.ndarray`
+        :type sort: bool
+        :type zfill: int
+        :type compress: bool
+        :rtype: str, or None if the frames have to be handled one at a time
+        """
+        if frames.ndim != 1 or len(frames) < 2:
+            return None
+        # only integers that fit in 64 bits (a list of larger ints comes out
+        # of numpy as unsigned, or as objects)
+        if frames.dtype.kind not in 'iu':
+            return None
+        if frames.dtype.kind == 'u' and frames.max() > _INT64_MAX:
+            return None
+        frames = frames.astype(numpy.int64)
+        if compress:
+            first = numpy.unique(frames, return_index=True)[1]
+            frames = frames[numpy.sort(first)]
+        if sort:
+            frames = numpy.sort(frames)
+        else:
+            # the strides of framesToFrameRanges are absolute, which group
+            # the same as the differences between frames only when the
+            # frames move in one direction
+            deltas = numpy.diff(frames)
+            if not ((deltas >= 0).all() or (deltas <= 0).all()):
+                return None
+        return FrameSet._build_frange(FrameSet._array_to_runs(frames), zfill)
+
+    @staticmethod
+    def _runs_to_array(runs):
+        """
+        Private method: expand (start, stop, step) runs to a numpy array of
+        their frames, in order.
+
+        :type runs: iterable
+        :rtype: :class:`numpy.ndarray`
+        """
+        runs = numpy.array(runs, dtype=numpy.int64).reshape(-1, 3)
+        starts, stops, steps = runs[:, 0], runs[:, 1], runs[:, 2]
+        lengths = (stops - starts) // steps + 1
+        firsts = numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        positions = numpy.arange(lengths.sum()) - firsts
+        return (numpy.repeat(starts, lengths) +
+                positions * numpy.repeat(steps, lengths))
+
+    @staticmethod
+    def _push_diff(diffs, diff, count):
+        """
+        Private method: append count differences to a run-length encoded list
+        of differences.
+
+        :type diffs: list
+        :type diff: int
+        :type count: int
+        :rtype: None
+        """
+        if diffs and diffs[-1][0] == diff:
+            diffs[-1][1] += count
+        else:
+            diffs.append([diff, count])
+
+    @staticmethod
+    def _frames_to_runs(frames):
+        """
+        Private method: converts an ordered iterable of unique frames into
+        (start, stop, step) runs, grouped the same way as
+        :meth:`framesToFrameRanges`.  Long lists of frames are grouped with
+        numpy when it is available.
+
+        :type frames: iterable
+        :param frames: sequence of unique frames to process
+        :rtype: list
+        """
+        if numpy is not None:
+            frames = list(frames)
+            if len(frames) >= _ARRAY_MIN_FRAMES:
+                array = numpy.array(frames)
+                # frames beyond 64 bits are left to python
+                if array.dtype.kind == 'i':
+                    return FrameSet._array_to_runs(array)
+        return list(FrameSet._group_frames(frames))
+
+    @staticmethod
+    def _group_frames(frames):
+        """
+        Private method: group an ordered iterable of unique frames into
+        (start, stop, step) runs one frame at a time, the same way as
+        :meth:`framesToFrameRanges`.
+
+        :type frames: iterable
+        :param frames: sequence of unique frames to process
+        :rtype: generator
+        """
+        curr_start = None
+        curr_stride = None
+        curr_frame = None
+        last_frame = None
+        curr_count = 0
+        for curr_frame in frames:
+            if curr_start is None:
+                curr_start = curr_frame
+                last_frame = curr_frame
+                curr_count += 1
+                continue
+            if curr_stride is None:
+                curr_stride = curr_frame - curr_start
+            new_stride = curr_frame - last_frame
+            if curr_stride == new_stride:
+                last_frame = curr_frame
+                curr_count += 1
+            elif curr_count == 2:
+                yield curr_start, curr_start, 1
+                curr_start = last_frame
+                curr_stride = new_stride
+                last_frame = curr_frame
+            else:
+                yield curr_start, last_frame, curr_stride
+                curr_stride = None
+                curr_start = curr_frame
+                last_frame = curr_frame
+                curr_count = 1
+        if curr_count == 2:
+            yield curr_start, curr_start, 1
+            yield curr_frame, curr_frame, 1
+        elif curr_count:
+            yield curr_start, curr_frame, curr_stride or 1
+
     @staticmethod
     def framesToFrameRanges(frames, zfill=0):
         """
@@ -909,6 +2128,10 @@ class FrameSet(Set):
         Converts an iterator of frames into a
         :class:`fileseq.framerange.FrameRange`.
 
+        With numpy available, numpy arrays and long lists of integer frames
+        are grouped in batch rather than one frame at a time, with the same
+        result.
+
         :type frames: iterable
         :param frames: sequence of frames to process
         :type sort: bool
@@ -919,6 +2142,21 @@ class FrameSet(Set):
         :param compress: remove any duplicates before processing
         :rtype: str
         """
+        if numpy is not None:
+            # integer frames are compressed in batch, anything else (floats,
+            # frames beyond 64 bits, short lists) one frame at a time
+            if isinstance(frames, numpy.ndarray):
+                frange = FrameSet._array_to_frange(frames, sort, zfill, compress)
+                if frange is not None:
+                    return frange
+                frames = frames.tolist()
+            else:
+                frames = list(frames)
+                if len(frames) >= _ARRAY_MIN_FRAMES:
+                    frange = FrameSet._array_to_frange(
+                        numpy.array(frames), sort, zfill, compress)
+                    if frange is not None:
+                        return frange
         if compress:
             frames = unique(set(), frames)
         frames = list(frames)
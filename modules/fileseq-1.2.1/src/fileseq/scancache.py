@@ -0,0 +1,236 @@
+#! /usr/bin/env python
+"""
+scancache - A persistent cache of the sequences found in directories.
+"""
+
+import os
+import time
+import struct
+import sqlite3
+import threading
+
+from fileseq.exceptions import ParseException
+from fileseq.filesequence import FileSequence
+from fileseq.utils import CacheInfo
+
+# bump whenever the layout of the table or of the stored blobs changes
+_SCHEMA_VERSION = 1
+
+# a directory modified this recently (in seconds) before it was listed is
+# not stored, since a filesystem with a coarse mtime resolution could change
+# it again without changing its mtime
+_RACY_SECONDS = 2.0
+
+_LENGTH = struct.Struct('<I')
+
+
+class ScanCache(object):
+    """
+    Caches the result of :meth:`FileSequence.findSequencesOnDisk` per
+    directory in an SQLite database, so that several processes can share it.
+
+    An entry is only used while the device, inode, mtime and ctime of the
+    directory are the ones it was listed with. Adding, removing or renaming a
+    file changes the mtime of its directory, so an unchanged directory is
+    answered without being listed. Changes to the contents of the files are
+    not seen, since they do not change the sequences found.
+
+    The cache never makes a scan fail: if the database can not be read or
+    written the directory is simply listed.
+
+    :type path: str
+    :param path: the file of the database, created along with its directory
+        if missing
+    :type timeout: float
+    :param timeout: the seconds to wait for another process holding a lock
+        on the database
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._timeout = timeout
+        # sqlite3 connections can not be shared between threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def path(self):
+        """
+        Return the file of the database.
+
+        :rtype: str
+        """
+        return self._path
+
+    def findSequencesOnDisk(self, dirpath, include_hidden=False):
+        """
+        Same as :meth:`FileSequence.findSequencesOnDisk`, answered from the
+        cache if the directory did not change since it was last listed.
+
+        :type dirpath: str
+        :param dirpath: directory to scan
+        :type include_hidden: bool
+        :param include_hidden: if true, show .hidden files as well
+        :rtype: list
+        """
+        try:
+            before = _signature(os.stat(dirpath))
+        except OSError:
+            # let the listing raise its usual error
+            return FileSequence.findSequencesOnDisk(dirpath, include_hidden)
+
+        key = os.path.abspath(dirpath)
+        blob = self._load(key, include_hidden, before)
+        if blob is not None:
+            try:
+                seqs = _decode(blob, os.path.join(dirpath, ''))
+            except (ParseException, struct.error):
+                pass
+            else:
+                self._count(hit=True)
+                return seqs
+
+        self._count(hit=False)
+        start = time.time()
+        seqs = FileSequence.findSequencesOnDisk(dirpath, include_hidden)
+        try:
+            st = os.stat(dirpath)
+        except OSError:
+            return seqs
+        # the padding collisions of a sequence are not serialized, so the
+        # directories holding some are always listed to report them
+        if _signature(st) == before and start - st.st_mtime >= _RACY_SECONDS \
+                and not any(seq.collisions() for seq in seqs):
+            self._store(key, include_hidden, before, _encode(seqs))
+        return seqs
+
+    def invalidate(self, dirpath):
+        """
+        Forget the entries of a directory.
+
+        :type dirpath: str
+        :rtype: None
+        """
+        self._execute('DELETE FROM scans WHERE path = ?',
+                      (_text(os.path.abspath(dirpath)),))
+
+    def clear(self):
+        """
+        Forget all of the entries and reset the statistics.
+
+        :rtype: None
+        """
+        self._execute('DELETE FROM scans')
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        """
+        Report the statistics of the cache in this process.
+
+        :rtype: :class:`fileseq.utils.CacheInfo` (hits, misses, maxsize,
+            currsize), where maxsize is always None
+        """
+        rows = self._execute('SELECT COUNT(*) FROM scans')
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, None,
+                             rows[0][0] if rows else 0)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _load(self, key, include_hidden, signature):
+        rows = self._execute(
+            'SELECT sequences FROM scans '
+            'WHERE path = ? AND hidden = ? AND signature = ?',
+            (_text(key), int(include_hidden), signature))
+        return bytes(rows[0][0]) if rows else None
+
+    def _store(self, key, include_hidden, signature, blob):
+        self._execute(
+            'INSERT OR REPLACE INTO scans '
+            '(path, hidden, signature, sequences) VALUES (?, ?, ?, ?)',
+            (_text(key), int(include_hidden), signature, sqlite3.Binary(blob)))
+
+    def _execute(self, sql, params=()):
+        """
+        Run a statement in its own transaction, returning the rows it
+        fetched, or None if the database is not usable.
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        except (sqlite3.Error, EnvironmentError):
+            return None
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        dirname = os.path.dirname(self._path)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # created meanwhile by another process
+                if not os.path.isdir(dirname):
+                    raise
+        conn = sqlite3.connect(self._path, timeout=self._timeout)
+        conn.text_factory = str
+        with conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                conn.execute('DROP TABLE IF EXISTS scans')
+                conn.execute(
+                    'CREATE TABLE scans ('
+                    'path TEXT NOT NULL, '
+                    'hidden INTEGER NOT NULL, '
+                    'signature TEXT NOT NULL, '
+                    'sequences BLOB NOT NULL, '
+                    'PRIMARY KEY (path, hidden))')
+                conn.execute('PRAGMA user_version = %d' % _SCHEMA_VERSION)
+        self._local.conn = conn
+        return conn
+
+
+def _signature(st):
+    # st_dev and st_ino may not fit in an SQLite integer
+    return '%d:%d:%r:%r' % (st.st_dev, st.st_ino, st.st_mtime, st.st_ctime)
+
+
+def _text(path):
+    if isinstance(path, unicode):
+        return path.encode('utf-8')
+    return path
+
+
+def _encode(seqs):
+    parts = []
+    for seq in seqs:
+        data = seq.to_bytes()
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def _decode(blob, dirname):
+    seqs = []
+    offset = 0
+    size = _LENGTH.size
+    while offset < len(blob):
+        length, = _LENGTH.unpack_from(blob, offset)
+        offset += size
+        seq = FileSequence.from_bytes(blob[offset:offset + length])
+        offset += length
+        # the entry is keyed by the absolute path, but the sequences are
+        # returned with the directory as it was asked for
+        seq.setDirname(dirname)
+        seqs.append(seq)
+    return seqs
@@ -3,7 +3,21 @@
 utils - General tools of use to fileseq operations.
 """
 
+import os
+from collections import namedtuple
 from itertools import chain
+from threading import Lock
+from fileseq.constants import DISK_RE
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
 
 def xfrange(start, stop, step=1):
     """
@@ -50,3 +64,223 @@ def pad(number, width=0):
     :rtype: str
     """
     return str(number).zfill(width)
+
+def split_disk_path(path):
+    """
+    Split a path into its directory, basename, frame and extension, the same
+    groups ``DISK_RE.match(path).groups()`` gives, by string scanning: the
+    directory ends at the last slash, the extension starts at the last dot
+    of the file name, and the frame is the run of digits before it, with its
+    minus sign.  Only paths holding a newline, which the regular expression
+    treats specially, are matched with it.
+
+    :Example:
+        >>> split_disk_path('/path/to/file.-0001.exr')
+        ('/path/to/', 'file.', '-0001', '.exr')
+
+    :type path: str
+    :param path: the path to split
+    :rtype: tuple (dirname, basename, frame, extension), members being None
+            when missing, or None if the path does not match
+    """
+    if '\n' in path:
+        match = DISK_RE.match(path)
+        return match.groups() if match else None
+    dirname, sep, name = path.rpartition('/')
+    dirname = dirname + sep if sep else None
+    if not name:
+        return dirname, None, None, None
+    dot = name.rfind('.')
+    if dot < 0:
+        head, ext = name, None
+    else:
+        head, ext = name[:dot], name[dot:]
+    basename = head.rstrip('0123456789')
+    if len(basename) == len(head):
+        return dirname, head, None, ext
+    if basename.endswith('-'):
+        basename = basename[:-1]
+    return dirname, basename, head[len(basename):], ext
+
+def iter_files(dirpath, include_hidden=False):
+    """
+    Yield the names of the files in a directory, the same as filtering
+    :func:`os.listdir` with :func:`os.path.isfile`.  With :func:`os.scandir`
+    (or the scandir package) available, the file types are read along with
+    the directory, so only symbolic links and entries of unknown type
+    cost a stat.
+
+    :type dirpath: str
+    :param dirpath: the directory to list
+    :type include_hidden: bool
+    :param include_hidden: if true, yield .hidden files as well
+    :rtype: generator
+    """
+    if scandir is None:
+        _isfile = os.path.isfile
+        _join = os.path.join
+        for name in os.listdir(dirpath):
+            if (include_hidden or not name.startswith('.')) and \
+                    _isfile(_join(dirpath, name)):
+                yield name
+        return
+    for entry in scandir(dirpath):
+        name = entry.name
+        if (include_hidden or not name.startswith('.')) and entry.is_file():
+            yield name
+
+def list_dir(dirpath, include_hidden=False, followlinks=False):
+    """
+    List the files and the subdirectories of a directory in one pass, with
+    the same file types as :func:`os.path.isfile` and :func:`os.path.isdir`
+    give.  Like :func:`os.walk`, links to directories are only listed as
+    subdirectories if followlinks is true.  With :func:`os.scandir` (or the
+    scandir package) available, the file types are read along with the
+    directory.
+
+    :type dirpath: str
+    :param dirpath: the directory to list
+    :type include_hidden: bool
+    :param include_hidden: if true, list .hidden files and directories as well
+    :type followlinks: bool
+    :param followlinks: if true, list links to directories as subdirectories
+    :rtype: tuple (list of file names, list of subdirectory names)
+    :raises: :class:`OSError` if the directory cannot be listed
+    """
+    files = []
+    dirs = []
+    if scandir is None:
+        _join = os.path.join
+        for name in os.listdir(dirpath):
+            if not include_hidden and name.startswith('.'):
+                continue
+            path = _join(dirpath, name)
+            if os.path.isdir(path):
+                if followlinks or not os.path.islink(path):
+                    dirs.append(name)
+            elif os.path.isfile(path):
+                files.append(name)
+        return files, dirs
+    for entry in scandir(dirpath):
+        name = entry.name
+        if not include_hidden and name.startswith('.'):
+            continue
+        if entry.is_dir():
+            if followlinks or not entry.is_symlink():
+                dirs.append(name)
+        elif entry.is_file():
+            files.append(name)
+    return files, dirs
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe mapping that discards the least recently used
+    entries once full, and counts its hits and misses.
+
+    The entries are kept in a circular doubly linked list in order of use,
+    the way :func:`functools.lru_cache` does, so a hit only relinks one entry.
+
+    :type maxsize: int
+    :param maxsize: the number of entries to keep, 0 disables the cache
+    """
+
+    # the fields of an entry of the linked list
+    _PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+    def __init__(self, maxsize=128):
+        self._maxsize = maxsize
+        self._lock = Lock()
+        self.clear()
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for key, marking it as the most recently used.
+
+        :param key: the key to look up
+        :param default: returned (and counted as a miss) if key is not cached
+        :returns: the cached value or default
+        """
+        with self._lock:
+            link = self._data.get(key)
+            if link is None:
+                self._misses += 1
+                return default
+            # move the entry to the most recently used end of the list
+            link_prev, link_next, _, value = link
+            link_prev[1] = link_next
+            link_next[0] = link_prev
+            root = self._root
+            last = root[0]
+            last[1] = root[0] = link
+            link[0] = last
+            link[1] = root
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Cache a value for key, discarding the least recently used entries if
+        the cache is full.
+
+        :param key: the key to cache the value for
+        :param value: the value to cache
+        :rtype: None
+        """
+        with self._lock:
+            self._unlink(key)
+            root = self._root
+            last = root[0]
+            link = [last, root, key, value]
+            last[1] = root[0] = self._data[key] = link
+            self._trim()
+
+    def resize(self, maxsize):
+        """
+        Change the number of entries to keep, discarding the least recently
+        used ones if there are more.
+
+        :type maxsize: int
+        :rtype: None
+        """
+        with self._lock:
+            self._maxsize = maxsize
+            self._trim()
+
+    def clear(self):
+        """
+        Empty the cache and reset its statistics.
+
+        :rtype: None
+        """
+        with self._lock:
+            self._data = {}
+            self._root = []
+            self._root[:] = [self._root, self._root, None, None]
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        """
+        Report the statistics of the cache.
+
+        :rtype: :class:`CacheInfo` (hits, misses, maxsize, currsize)
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize,
+                             len(self._data))
+
+    def _unlink(self, key):
+        link = self._data.pop(key, None)
+        if link is not None:
+            link[0][1] = link[1]
+            link[1][0] = link[0]
+
+    def _trim(self):
+        while len(self._data) > max(self._maxsize, 0):
+            self._unlink(self._root[1][2])
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
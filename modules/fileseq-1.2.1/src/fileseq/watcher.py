@@ -0,0 +1,491 @@
+#! /usr/bin/env python
+"""
+watcher - Follow the sequences of directories as their files come and go.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from fileseq.filesequence import FileSequence
+from fileseq.frameset import FrameSet
+from fileseq.utils import iter_files, split_disk_path
+
+# constants of inotify(7)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_CLOEXEC = 0o2000000
+
+# files are added once written or moved in, not while being written
+_IN_ADDED = _IN_CLOSE_WRITE | _IN_MOVED_TO
+_IN_REMOVED = _IN_DELETE | _IN_MOVED_FROM
+_IN_GONE = _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+_WATCH_MASK = _IN_ADDED | _IN_REMOVED | _IN_DELETE_SELF | _IN_MOVE_SELF | \
+    _IN_ONLYDIR
+
+# wd, mask, cookie and length of the name of an inotify event
+_EVENT = struct.Struct('iIII')
+
+
+def _load_inotify():
+    """
+    Return libc if it provides inotify, None otherwise.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+_libc = _load_inotify()
+
+
+class _Directory(object):
+    """
+    The files of a watched directory, with the frame strings found for each
+    frame number of each (basename, extension), None standing for the files
+    without a frame.
+    """
+    __slots__ = ('path', 'wd', 'names', 'groups')
+
+    def __init__(self, path):
+        self.path = path
+        self.wd = None
+        self.names = set()
+        self.groups = {}
+
+
+class _Expected(object):
+    """
+    The progress of a sequence towards an expected frame range, kept as a
+    :class:`FrameSet` along with the number of its frames still missing.
+    """
+    __slots__ = ('seq', 'frames', 'remaining', 'complete', 'progress',
+                 'stalled')
+
+    def __init__(self, seq, frames, remaining):
+        self.seq = seq
+        self.frames = frames
+        self.remaining = remaining
+        self.complete = False
+        self.progress = time.time()
+        self.stalled = False
+
+
+class SequenceWatcher(object):
+    """
+    Keeps the sequences of directories up to date as files are written,
+    deleted and moved, without listing the directories again.
+
+    On Linux the changes are read from inotify, where a file is only seen
+    once it has been written and closed or moved in, so frames being
+    rendered are not reported half written.  Elsewhere, or if a directory
+    can not be watched, the directory is listed every `interval` seconds
+    instead.  Hidden files are ignored.
+
+    The changes are applied, and the callbacks called, by :meth:`poll`:
+
+    - on_frames(seq, frames): frames were added to a sequence, seq being
+      the updated :class:`FileSequence` and frames a :class:`FrameSet` of the
+      new frames.
+    - on_complete(seq): all of the frames of a sequence given to
+      :meth:`expect` are there.
+    - on_stall(seq, missing): no frame was added for `stall_timeout` seconds
+      to an expected sequence that is not complete, missing being a
+      :class:`FrameSet` of the frames it lacks.  Called once per stall.
+
+    :type on_frames: callable
+    :type on_complete: callable
+    :type on_stall: callable
+    :type stall_timeout: float
+    :param stall_timeout: seconds without new frames after which an
+        incomplete sequence is stalled, never if None
+    :type interval: float
+    :param interval: seconds between the listings of the directories that
+        are polled
+    :type use_inotify: bool
+    :param use_inotify: if false, always poll the directories
+    """
+
+    def __init__(self, on_frames=None, on_complete=None, on_stall=None,
+                 stall_timeout=None, interval=1.0, use_inotify=True):
+        self._on_frames = on_frames
+        self._on_complete = on_complete
+        self._on_stall = on_stall
+        self._stall_timeout = stall_timeout
+        self._interval = interval
+        self._dirs = {}
+        self._wds = {}
+        self._expected = {}
+        # the frames added to each (dirname, basename, extension) since the
+        # last callbacks
+        self._new = {}
+        # the frame set, padding and collisions of the sequences built, with
+        # the frame strings added since, so that the frame sets grow by their
+        # runs rather than being built again from all of the frames
+        self._built = {}
+        self._next_scan = time.time() + interval
+        self._fd = None
+        if use_inotify and _libc is not None:
+            fd = _libc.inotify_init1(os.O_NONBLOCK | _IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stop watching all of the directories.
+
+        :rtype: None
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._dirs.clear()
+        self._wds.clear()
+        self._expected.clear()
+        self._new.clear()
+        self._built.clear()
+
+    def uses_inotify(self, dirpath):
+        """
+        Return whether the changes to a watched directory are read from
+        inotify rather than polled.
+
+        :type dirpath: str
+        :rtype: bool
+        """
+        return self._dirs[_dirname(dirpath)].wd is not None
+
+    def watch(self, dirpath):
+        """
+        Start following the sequences of a directory.
+
+        :type dirpath: str
+        :rtype: list
+        :returns: the sequences in the directory
+        """
+        dirname = _dirname(dirpath)
+        if dirname not in self._dirs:
+            directory = self._dirs[dirname] = _Directory(dirname)
+            # watched first, so that no file is missed while listing
+            self._add_watch(directory)
+            self._rescan(directory, report=False)
+        return self.sequences(dirpath)
+
+    def _add_watch(self, directory):
+        if self._fd is None:
+            return
+        path = directory.path
+        if isinstance(path, unicode):
+            path = path.encode(sys.getfilesystemencoding() or 'utf-8')
+        wd = _libc.inotify_add_watch(self._fd, path, _WATCH_MASK)
+        if wd >= 0:
+            directory.wd = wd
+            self._wds[wd] = directory
+
+    def unwatch(self, dirpath):
+        """
+        Stop following a directory and the sequences expected in it.
+
+        :type dirpath: str
+        :rtype: None
+        """
+        directory = self._dirs.pop(_dirname(dirpath), None)
+        if directory is None:
+            return
+        if directory.wd is not None:
+            self._wds.pop(directory.wd, None)
+            _libc.inotify_rm_watch(self._fd, directory.wd)
+        for key in [key for key in self._expected if key[0] == directory.path]:
+            del self._expected[key]
+        for key in [key for key in self._new if key[0] == directory.path]:
+            del self._new[key]
+        for key in [key for key in self._built if key[0] == directory.path]:
+            del self._built[key]
+
+    def expect(self, sequence):
+        """
+        Follow the progress of a sequence towards its frame range, watching
+        its directory.  :meth:`poll` then calls on_complete once all of the
+        frames are there, and on_stall if they stop coming.
+
+        :type sequence: str or :class:`FileSequence`
+        :param sequence: the sequence with the expected frame range, such as
+            /renders/sh010/beauty.1001-1100#.exr
+        :rtype: None
+        """
+        if not isinstance(sequence, FileSequence):
+            sequence = FileSequence(sequence)
+        self.watch(sequence.dirname() or os.curdir)
+        key = (_dirname(sequence.dirname()), sequence.basename(),
+               sequence.extension())
+        frames = sequence.frameSet()
+        if frames is None:
+            frames = FrameSet('')
+        missing = self._missing(key, frames)
+        self._expected[key] = _Expected(sequence, frames, len(missing))
+
+    def _missing(self, key, frames):
+        """
+        Return the frames of a :class:`FrameSet` missing from the current
+        sequence of a (dirname, basename, extension).
+        """
+        if key[1:] not in self._dirs[key[0]].groups:
+            return frames
+        found = self._sequence(key).frameSet()
+        if found is None:
+            return frames
+        return frames.difference(found)
+
+    def _current(self, key, expected):
+        """
+        Return the current sequence of an expected one, which stands in for
+        it while it has no file yet.
+        """
+        if key[1:] in self._dirs[key[0]].groups:
+            return self._sequence(key)
+        return expected.seq
+
+    def sequences(self, dirpath=None):
+        """
+        Return the sequences of a watched directory, or of all of them.
+
+        :type dirpath: str
+        :rtype: list
+        """
+        if dirpath is None:
+            directories = self._dirs.values()
+        else:
+            directories = [self._dirs[_dirname(dirpath)]]
+        return [self._sequence((directory.path,) + key)
+                for directory in directories for key in directory.groups]
+
+    def poll(self, timeout=0):
+        """
+        Wait up to timeout seconds for changes, apply them to the sequences
+        and call the callbacks.
+
+        :type timeout: float
+        :param timeout: seconds to wait for changes, forever if None
+        :rtype: None
+        """
+        polled = [directory for directory in self._dirs.itervalues()
+                  if directory.wd is None]
+        wait = timeout
+        if polled:
+            until_scan = max(self._next_scan - time.time(), 0)
+            wait = until_scan if wait is None else min(wait, until_scan)
+        if self._fd is not None:
+            if select.select([self._fd], [], [], wait)[0]:
+                self._read_events()
+        elif wait:
+            time.sleep(wait)
+        if polled and time.time() >= self._next_scan:
+            for directory in polled:
+                # a directory that was removed may be back to be watched
+                self._add_watch(directory)
+                self._rescan(directory)
+            self._next_scan = time.time() + self._interval
+        self._dispatch()
+
+    def _read_events(self):
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError as err:
+                if err.errno in (errno.EAGAIN, errno.EINTR):
+                    break
+                raise
+            if not data:
+                break
+            events.append(data)
+        data = b''.join(events)
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_GONE:
+                # the directory was removed or moved, poll its path instead
+                del self._wds[wd]
+                if mask & _IN_MOVE_SELF:
+                    # unlike a removed one, the kernel keeps following the
+                    # directory where it was moved to
+                    _libc.inotify_rm_watch(self._fd, wd)
+                directory.wd = None
+                continue
+            if mask & _IN_ISDIR or name.startswith('.'):
+                continue
+            if mask & _IN_ADDED:
+                self._add(directory, name)
+            elif mask & _IN_REMOVED:
+                self._remove(directory, name)
+        if overflow:
+            # events were lost, list the directories to catch up
+            for directory in self._dirs.values():
+                self._rescan(directory)
+
+    def _rescan(self, directory, report=True):
+        """
+        List a directory and apply the differences with its known files.
+        """
+        try:
+            names = set(iter_files(directory.path))
+        except OSError:
+            names = set()
+        for name in directory.names - names:
+            self._remove(directory, name)
+        for name in names - directory.names:
+            self._add(directory, name, report)
+
+    def _add(self, directory, name, report=True):
+        if name in directory.names:
+            return
+        directory.names.add(name)
+        _, basename, frame, ext = split_disk_path(name)
+        if not basename and not ext:
+            return
+        key = (basename or '', ext or '')
+        frames = directory.groups.setdefault(key, {})
+        number = int(frame) if frame else None
+        found = frames.get(number)
+        added = found is None
+        if added:
+            found = frames[number] = set()
+        found.add(frame or '')
+        key = (directory.path,) + key
+        built = self._built.get(key)
+        if built is not None:
+            if number is None or len(found) > 1 or built[0] is None:
+                del self._built[key]
+            else:
+                built[3].add(frame)
+        if number is None:
+            return
+        if report:
+            self._new.setdefault(key, set()).add(number)
+        expected = self._expected.get(key)
+        if expected is not None and added and number in expected.frames:
+            expected.remaining -= 1
+            expected.progress = time.time()
+            expected.stalled = False
+
+    def _remove(self, directory, name):
+        if name not in directory.names:
+            return
+        directory.names.discard(name)
+        _, basename, frame, ext = split_disk_path(name)
+        if not basename and not ext:
+            return
+        key = (basename or '', ext or '')
+        frames = directory.groups[key]
+        number = int(frame) if frame else None
+        found = frames[number]
+        found.discard(frame or '')
+        key = (directory.path,) + key
+        self._built.pop(key, None)
+        if found:
+            return
+        del frames[number]
+        if not frames:
+            del directory.groups[key[1:]]
+        if number is None:
+            return
+        expected = self._expected.get(key)
+        if expected is not None and number in expected.frames:
+            expected.remaining += 1
+
+    def _sequence(self, key):
+        """
+        Build the current sequence of a (dirname, basename, extension).
+        """
+        dirname, basename, ext = key
+        built = self._built.get(key)
+        if built is None:
+            frames = set()
+            for found in self._dirs[dirname].groups[key[1:]].itervalues():
+                frames.update(found)
+            frames.discard('')
+            seq = next(FileSequence._sequences_from_groups({key: frames}))
+            self._built[key] = [seq.frameSet(), seq.zfill(), seq._collisions,
+                                set()]
+            return seq
+        frameSet, zfill, collisions, added = built
+        if added:
+            frameSet = frameSet | FrameSet._from_runs(FrameSet._frames_to_runs(
+                sorted(set(int(frame) for frame in added))))
+            zfill = min(zfill, min(len(frame) for frame in added))
+            built[:] = [frameSet, zfill, collisions, set()]
+        seq = FileSequence._from_parts(
+            frameSet, dirname, basename, FileSequence.getPaddingChars(zfill),
+            ext, zfill)
+        seq._collisions = collisions
+        return seq
+
+    def _dispatch(self):
+        new, self._new = self._new, {}
+        if self._on_frames is not None:
+            for key, numbers in new.iteritems():
+                frames = self._dirs[key[0]].groups.get(key[1:], {})
+                # some may have been removed since
+                numbers = sorted(numbers.intersection(frames))
+                if numbers:
+                    self._on_frames(self._sequence(key),
+                                    FrameSet.from_iterable(numbers))
+
+        now = time.time()
+        for key, expected in self._expected.items():
+            if expected.remaining:
+                expected.complete = False
+                if self._stall_timeout is not None and not expected.stalled \
+                        and now - expected.progress >= self._stall_timeout:
+                    expected.stalled = True
+                    if self._on_stall is not None:
+                        self._on_stall(self._current(key, expected),
+                                       self._missing(key, expected.frames))
+            elif not expected.complete:
+                expected.complete = True
+                if self._on_complete is not None:
+                    self._on_complete(self._current(key, expected))
+
+
+def _dirname(dirpath):
+    """
+    The key of a directory, ending with a separator.
+    """
+    return os.path.join(os.path.normpath(dirpath or os.curdir), '')
@@ -0,0 +1,659 @@
+#!/usr/bin/python
+"""
+Timings of the FrameSet and FileSequence hot paths.  Each benchmark prints the
+time of the current implementation next to the approach it replaced.
+"""
+
+from __future__ import division
+
+import cPickle
+import random
+import timeit
+import sys
+import os
+import shutil
+import tempfile
+import time
+from itertools import ifilter, imap
+
+
+TEST_DIR = os.path.abspath(os.path.dirname(__file__))
+SRC_DIR = os.path.join(TEST_DIR, "../src")
+sys.path.insert(0, SRC_DIR)
+
+from fileseq import (FrameSet, FileSequence, ScanCache, SequenceWatcher,
+                     frameset, utils, watcher)
+from fileseq.constants import DISK_RE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _time(func, number):
+    """
+    Best time of three, per call, in microseconds.
+    :param func: the callable to time
+    :param number: the number of calls per repeat
+    :return: float
+    """
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def _report(name, before, after):
+    print('{0:<48} {1:>12.2f}us {2:>12.2f}us {3:>9.1f}x'.format(
+        name, before, after, before / after))
+
+
+def bench_index():
+    """
+    FrameSet.index and positional lookup on 100k frame sets.  Index lookups
+    are compared to a linear search of the expanded order tuple, positional
+    lookups on a freshly parsed set to indexing into its expanded order.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'index (100k frames)', 'expanded', 'runs', 'speedup'))
+    tests = [
+        ('contiguous', '1-100000'),
+        ('every third frame missing', '1-150000y3'),
+        ('descending', '100000-1'),
+        ('unordered runs', ','.join(
+            '{0}-{1}'.format(i, i + 99) for i in xrange(99900, -1, -100))),
+    ]
+    for name, frange in tests:
+        fs = FrameSet(frange)
+        order = fs.order
+        frames = [order[i] for i in xrange(0, len(order), len(order) // 100)]
+        before = _time(lambda: [order.index(f) for f in frames], 1) / len(frames)
+        after = _time(lambda: [fs.index(f) for f in frames], 100) / len(frames)
+        _report(name + ' index()', before, after)
+        middle = len(order) // 2
+        before = _time(lambda: FrameSet(frange).order[middle], 10)
+        after = _time(lambda: FrameSet(frange)[middle], 10)
+        _report(name + ' first [i]', before, after)
+
+
+def bench_numpy():
+    """
+    Checking rendered frames against the expected ones, with and without
+    numpy: building sets from 500k frame numbers, membership of each frame
+    and the difference of two fragmented sets.
+    """
+    if numpy is None:
+        print('\nnumpy is not available, skipping')
+        return
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'numpy (500k frames)', 'python', 'numpy', 'speedup'))
+    # every frame but a scattering of failed ones, in completion order
+    rendered = numpy.arange(1, 500001)
+    rendered = rendered[rendered % 7 != 3]
+    numpy.random.RandomState(0).shuffle(rendered)
+    expected = FrameSet('1-500000y5')
+    frames = rendered.tolist()
+
+    def timed(func, number):
+        # the frames are handed over as a list without numpy, as an array with
+        try:
+            saved, frameset.numpy = frameset.numpy, None
+            before = _time(lambda: func(frames), number)
+        finally:
+            frameset.numpy = saved
+        return before, _time(lambda: func(rendered), number)
+
+    _report('from_array(sort=True)', *timed(
+        lambda f: FrameSet.from_array(f, sort=True), 1))
+    _report('hasFrames', *timed(expected.hasFrames, 1))
+    # fresh copies of the runs, so nothing cached is reused between calls
+    left, right = expected._runs, FrameSet(sorted(frames))._runs
+    _report('expected - rendered', *timed(
+        lambda f: FrameSet._from_runs(left) - FrameSet._from_runs(right), 1))
+
+def bench_frames_to_frame_range():
+    """
+    framesToFrameRange on 1M frames, against the frame by frame generator of
+    framesToFrameRanges.  Lists are only batched when numpy is available.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'framesToFrameRange (1M frames)', 'generator', 'batched', 'speedup'))
+    dropped = [f for f in xrange(1, 1001001) if f % 1000]
+    fragmented = [f for f in xrange(1, 1100001) if f % 11]
+    shuffled = list(dropped)
+    random.Random(0).shuffle(shuffled)
+
+    def legacy(frames, sort=True):
+        frames = list(frames)
+        if sort:
+            frames.sort()
+        return ','.join(FrameSet.framesToFrameRanges(frames))
+
+    tests = [
+        ('list, 1000 dropped frames', dropped, False),
+        ('list, shuffled, sort=True', shuffled, True),
+        ('list, every 11th frame missing', fragmented, False),
+    ]
+    if numpy is not None:
+        tests += [
+            ('array, 1000 dropped frames', numpy.array(dropped), False),
+            ('array, shuffled, sort=True', numpy.array(shuffled), True),
+            ('array, every 11th frame missing', numpy.array(fragmented), False),
+        ]
+    for name, frames, sort in tests:
+        values = frames.tolist() if numpy is not None and isinstance(
+            frames, numpy.ndarray) else frames
+        assert legacy(values, sort) == FrameSet.framesToFrameRange(frames, sort)
+        _report(name,
+                _time(lambda: legacy(values, sort), 1),
+                _time(lambda: FrameSet.framesToFrameRange(frames, sort), 1))
+
+def bench_intern():
+    """
+    FileSequence construction from 100k sequence strings sharing 500 frame
+    ranges, with and without the FrameSet intern table.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'FileSequence (100k paths)', 'parsed', 'interned', 'speedup'))
+    rand = random.Random(0)
+    ranges = ['{0}-{1}'.format(start, start + rand.randint(1, 500))
+              for start in (rand.randint(1, 2000) for _ in xrange(500))]
+    paths = ['/shots/sh{0:03d}/render.{1}#.exr'.format(
+        i % 300, rand.choice(ranges)) for i in xrange(100000)]
+
+    def build():
+        for path in paths:
+            FileSequence(path).end()
+
+    FrameSet.intern_clear(maxsize=0)
+    before = _time(build, 1)
+    FrameSet.intern_clear(maxsize=4096)
+    after = _time(build, 1)
+    _report('construct and read end()', before, after)
+    print(FrameSet.intern_info())
+
+def bench_hash():
+    """
+    FrameSets as dictionary keys: hashing and comparing the frame ranges of
+    1000 shots, against the hash of the frame range string, frozenset and
+    tuple of frames the keys used to be.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'hash / == (1000 shots)', 'expanded', 'runs', 'speedup'))
+    rand = random.Random(0)
+    ranges = ['{0}-{1}'.format(1001, 1001 + rand.randint(10, 5000))
+              for _ in xrange(1000)]
+
+    def legacy(fs):
+        return hash(fs.frange) | hash(fs.items) | hash(fs.order)
+
+    keys = [FrameSet(frange) for frange in ranges]
+    _report('hash of fresh sets',
+            _time(lambda: [legacy(FrameSet(frange)) for frange in ranges], 1),
+            _time(lambda: [hash(FrameSet(frange)) for frange in ranges], 1))
+    _report('hash of built sets',
+            _time(lambda: [legacy(fs) for fs in keys], 10),
+            _time(lambda: [hash(fs) for fs in keys], 10))
+    others = [FrameSet(frange) for frange in ranges]
+    _report('== of equal sets',
+            _time(lambda: [legacy(a) == legacy(b)
+                           for a, b in zip(keys, others)], 10),
+            _time(lambda: [a == b for a, b in zip(keys, others)], 10))
+
+def bench_wire():
+    """
+    Shipping 10k sequences with fragmented frame ranges to a worker, pickled
+    against the binary and JSON formats, which load without parsing the frame
+    ranges: the whole round trip, then loading alone.  The length of each
+    loaded sequence is read, as pickled frame ranges are only parsed on use.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'round trip (10k sequences)', 'pickle', 'wire', 'speedup'))
+    rand = random.Random(0)
+    seqs = []
+    for i in xrange(10000):
+        frames = sorted(rand.sample(xrange(1001, 1401), 200))
+        seqs.append(FileSequence('/shots/sh{0:04d}/render.{1}#.exr'.format(
+            i, FrameSet.framesToFrameRange(frames))))
+    formats = [
+        ('bytes', FileSequence.to_bytes, FileSequence.from_bytes),
+        ('json', FileSequence.to_json, FileSequence.from_json),
+    ]
+
+    def pickled(seq):
+        return cPickle.dumps(seq, 2)
+
+    def round_trip(dumps, loads):
+        for seq in seqs:
+            len(loads(dumps(seq)))
+
+    def load(loads, data):
+        for item in data:
+            len(loads(item))
+
+    before = _time(lambda: round_trip(pickled, cPickle.loads), 1)
+    for name, dumps, loads in formats:
+        _report('dump and load, ' + name, before,
+                _time(lambda: round_trip(dumps, loads), 1))
+    data = [pickled(seq) for seq in seqs]
+    before = _time(lambda: load(cPickle.loads, data), 1)
+    for name, dumps, loads in formats:
+        wire = [dumps(seq) for seq in seqs]
+        _report('load, ' + name, before, _time(lambda: load(loads, wire), 1))
+        print('{0:<48} {1:>12.0f}B {2:>12.0f}B'.format(
+            'size, ' + name, sum(map(len, data)) / len(data),
+            sum(map(len, wire)) / len(wire)))
+
+def bench_partition():
+    """
+    Dispatching a 100k frame sequence to 64 workers, against slicing the
+    ordered frames by hand.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'partition (100k frames)', 'sliced', 'runs', 'speedup'))
+    tests = [
+        ('contiguous, 64 chunks', '1001-101000', 64),
+        ('every third frame missing, 64 chunks', '1-150000y3', 64),
+        ('contiguous, chunks of 10', '1001-101000', 10000),
+    ]
+    for name, frange, count in tests:
+        def sliced():
+            order = FrameSet(frange).order
+            size, extra = divmod(len(order), count)
+            bounds = [0]
+            for idx in xrange(count):
+                bounds.append(bounds[-1] + size + (idx < extra))
+            return [str(FrameSet(order[a:b]))
+                    for a, b in zip(bounds, bounds[1:])]
+
+        def partitioned():
+            return [str(fs) for fs in FrameSet(frange).partition(count)]
+
+        assert map(FrameSet, sliced()) == map(FrameSet, partitioned())
+        _report(name, _time(sliced, 1), _time(partitioned, 1))
+
+def bench_find_on_disk():
+    """
+    findSequencesOnDisk on a synthetic directory of 100k entries: 50 shots of
+    2000 frames, with a few hidden files and subdirectories, against listing
+    the directory and checking each entry with os.path.isfile.  The scandir
+    timings need os.scandir or the scandir package.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'findSequencesOnDisk (100k entries)', 'listdir', 'scandir', 'speedup'))
+    if utils.scandir is None:
+        print('scandir is not available, skipping')
+        return
+    tmp = tempfile.mkdtemp()
+    try:
+        for shot in xrange(50):
+            for frame in xrange(1, 2001):
+                open(os.path.join(tmp, 'sh{0:03d}_beauty.{1:04d}.exr'.format(
+                    shot, frame)), 'w').close()
+            open(os.path.join(tmp, '.sh{0:03d}.lock'.format(shot)), 'w').close()
+            os.mkdir(os.path.join(tmp, 'sh{0:03d}_cache'.format(shot)))
+
+        def legacy():
+            files = ifilter(lambda f: not f.startswith('.'), os.listdir(tmp))
+            files = (os.path.join(tmp, f) for f in files)
+            files = ifilter(os.path.isfile, files)
+            return list(FileSequence.yield_sequences_in_list(files))
+
+        def find():
+            return FileSequence.findSequencesOnDisk(tmp)
+
+        assert sorted(map(str, legacy())) == sorted(map(str, find()))
+        _report('50 sequences of 2000 frames', _time(legacy, 1), _time(find, 1))
+    finally:
+        shutil.rmtree(tmp)
+
+def bench_yield_sequences():
+    """
+    yield_sequences_in_list on 200k paths, against building each sequence
+    behind the scenes and then formatting and initializing it again from
+    its string.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'yield_sequences_in_list (200k paths)', 'round trip', 'direct',
+        'speedup'))
+
+    def legacy(paths):
+        seqs = {}
+        for match in ifilter(None, imap(DISK_RE.match, paths)):
+            dirname, basename, frame, ext = match.groups()
+            if not basename and not ext:
+                continue
+            key = (dirname, basename, ext)
+            seqs.setdefault(key, set())
+            if frame:
+                seqs[key].add(frame)
+        for (dirname, basename, ext), frames in seqs.iteritems():
+            seq = FileSequence.__new__(FileSequence)
+            seq._dir = dirname or ''
+            seq._base = basename or ''
+            seq._ext = ext or ''
+            if frames:
+                seq._frameSet = FrameSet(set(imap(int, frames)))
+                seq._pad = FileSequence.getPaddingChars(min(imap(len, frames)))
+            else:
+                seq._frameSet = None
+                seq._pad = ''
+            seq.__init__(str(seq))
+            yield seq
+
+    tests = [
+        ('40k sequences of 5 frames', 40000, 5),
+        ('100 sequences of 2000 frames', 100, 2000),
+    ]
+    for name, count, length in tests:
+        paths = ['/shots/sh{0:05d}/beauty.{1:04d}.exr'.format(seq, frame)
+                 for seq in xrange(count) for frame in xrange(1, length + 1)]
+        _report(name,
+                _time(lambda: list(legacy(paths)), 1),
+                _time(lambda: list(FileSequence.yield_sequences_in_list(paths)), 1))
+
+def bench_split_disk_path():
+    """
+    Splitting 200k paths into directory, basename, frame and extension,
+    with DISK_RE against utils.split_disk_path, in paths per second.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'split paths (paths/s)', 'DISK_RE', 'scan', 'speedup'))
+    tests = [
+        ('short names', '/shots/sh{0:03d}/beauty.{1:04d}.exr'),
+        ('long basenames', '/shots/sh{0:03d}/' + 'comp_v012_final_' * 8 +
+                           'beauty.{1:04d}.exr'),
+        ('no frame', '/shots/sh{0:03d}/' + 'reference_plate_' * 4 +
+                     'take{1:04d}_notes.txt'),
+    ]
+    for name, template in tests:
+        paths = [template.format(i % 500, i) for i in xrange(200000)]
+        _match = DISK_RE.match
+        _split = utils.split_disk_path
+        assert [_match(p).groups() for p in paths] == map(_split, paths)
+        before = _time(lambda: [_match(p).groups() for p in paths], 1)
+        after = _time(lambda: map(_split, paths), 1)
+        print('{0:<48} {1:>13.0f}/s {2:>13.0f}/s {3:>9.1f}x'.format(
+            name, len(paths) / before * 1e6, len(paths) / after * 1e6,
+            before / after))
+
+def bench_tree():
+    """
+    Finding the sequences of a tree of 1000 directories of 4 shots of 25
+    frames.  A serial os.walk calling findSequencesOnDisk in each directory
+    is compared to yield_sequences_in_tree with 16 threads.  Then the
+    directory reads are slowed down by 2ms each, standing in for the latency
+    of shared storage, and one thread is compared to 16.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'sequences in tree (1000 dirs)', 'serial', 'threads', 'speedup'))
+    tmp = tempfile.mkdtemp()
+    try:
+        for seq in xrange(10):
+            for shot in xrange(100):
+                dirpath = os.path.join(tmp, 'sq{0:02d}'.format(seq),
+                                       'sh{0:03d}'.format(shot))
+                os.makedirs(dirpath)
+                for layer in xrange(4):
+                    for frame in xrange(1, 26):
+                        open(os.path.join(dirpath, 'l{0}.{1:04d}.exr'.format(
+                            layer, frame)), 'w').close()
+
+        def walk():
+            return [seq for dirpath, _, _ in os.walk(tmp)
+                    for seq in FileSequence.findSequencesOnDisk(dirpath)]
+
+        def tree(workers):
+            return list(FileSequence.yield_sequences_in_tree(
+                tmp, workers=workers))
+
+        assert sorted(map(str, walk())) == sorted(map(str, tree(16)))
+        _report('os.walk / 16 threads', _time(walk, 1),
+                _time(lambda: tree(16), 1))
+
+        scandir = utils.scandir
+        if scandir is None:
+            print('scandir is not available, skipping the latency test')
+            return
+
+        def slow_scandir(path):
+            time.sleep(0.002)
+            return scandir(path)
+
+        try:
+            utils.scandir = slow_scandir
+            _report('2ms per read, 1 thread / 16 threads',
+                    _time(lambda: tree(1), 1), _time(lambda: tree(16), 1))
+        finally:
+            utils.scandir = scandir
+    finally:
+        shutil.rmtree(tmp)
+
+def bench_scan_cache():
+    """
+    findSequencesOnDisk against a warm ScanCache on directories of 10k
+    frames, split over 1 and 10 shots.  The cache answers an unchanged
+    directory from a single stat and a lookup of its stored sequences.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'ScanCache (10k frames)', 'listing', 'cached', 'speedup'))
+    tmp = tempfile.mkdtemp()
+    try:
+        cache = ScanCache(os.path.join(tmp, 'scans.db'))
+        for shots in (1, 10):
+            dirpath = os.path.join(tmp, 'shots{0}'.format(shots))
+            os.mkdir(dirpath)
+            for shot in xrange(shots):
+                for frame in xrange(1, 10000 // shots + 1):
+                    open(os.path.join(dirpath, 'sh{0:03d}.{1:04d}.exr'.format(
+                        shot, frame)), 'w').close()
+            old = time.time() - 60
+            os.utime(dirpath, (old, old))
+
+            def listing():
+                return FileSequence.findSequencesOnDisk(dirpath)
+
+            def cached():
+                return cache.findSequencesOnDisk(dirpath)
+
+            assert sorted(map(str, listing())) == sorted(map(str, cached()))
+            _report('{0} sequences'.format(shots),
+                    _time(listing, 10), _time(cached, 100))
+    finally:
+        shutil.rmtree(tmp)
+
+def bench_find_sequence():
+    """
+    findSequenceOnDisk on a directory of 50 shots of 200 frames, against the
+    former glob of {dirname}{basename}*{extension} grouped into sequences.
+    The shared timings look up all of the shots with one listing.
+    """
+    from glob import iglob
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'findSequenceOnDisk (10k entries)', 'glob', 'prefix', 'speedup'))
+    tmp = tempfile.mkdtemp()
+    try:
+        for shot in xrange(50):
+            for frame in xrange(1, 201):
+                open(os.path.join(tmp, 'sh{0:03d}.{1:04d}.exr'.format(
+                    shot, frame)), 'w').close()
+        patterns = [os.path.join(tmp, 'sh{0:03d}.#.exr'.format(shot))
+                    for shot in xrange(50)]
+
+        def legacy(pattern):
+            seq = FileSequence(pattern)
+            patt = seq.format('{dirname}{basename}*{extension}')
+            for match in FileSequence.yield_sequences_in_list(iglob(patt)):
+                if match.basename() == seq.basename() and \
+                        match.extension() == seq.extension():
+                    return match
+
+        def shared():
+            names = list(utils.iter_files(tmp, include_hidden=True))
+            return [FileSequence.findSequenceOnDisk(pattern, names)
+                    for pattern in patterns]
+
+        assert str(legacy(patterns[0])) == \
+            str(FileSequence.findSequenceOnDisk(patterns[0]))
+        _report('one lookup', _time(lambda: legacy(patterns[0]), 10),
+                _time(lambda: FileSequence.findSequenceOnDisk(patterns[0]), 10))
+        _report('50 lookups, one listing',
+                _time(lambda: map(legacy, patterns), 1), _time(shared, 1))
+    finally:
+        shutil.rmtree(tmp)
+
+def bench_stream():
+    """
+    yield_sequences_in_stream against findSequencesInList on 1M sorted paths
+    in 500 directories of 2 shots of 1000 frames.  The flush hook, which
+    never asks for a flush, records the number of sequences and frames held.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'yield_sequences_in_stream (1M paths)', 'list', 'stream', 'speedup'))
+
+    def paths():
+        for directory in xrange(500):
+            for shot in xrange(2):
+                for frame in xrange(1, 1001):
+                    yield '/show/seq{0:03d}/sh{1}/render.{2:04d}.exr'.format(
+                        directory, shot, frame)
+
+    peak = [0]
+    def flush(held):
+        peak[0] = max(peak[0], held)
+        return False
+
+    def listed():
+        return FileSequence.findSequencesInList(list(paths()))
+
+    def streamed():
+        return list(FileSequence.yield_sequences_in_stream(paths(),
+                                                           flush=flush))
+
+    assert sorted(map(str, listed())) == sorted(map(str, streamed()))
+    _report('500 directories of 2000 frames', _time(listed, 1),
+            _time(streamed, 1))
+    print('{0:<48} {1:>14} {2:>14}'.format(
+        'most sequences and frames held', 1000000, peak[0]))
+
+def bench_frame_paths():
+    """
+    frame_paths on a sequence of 100k frames, against calling frame() for
+    each frame, and the %-template of the paths formatted frame by frame the
+    way ImageSequence.copy used to.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'frame_paths (100k frames)', 'per frame', 'batch', 'speedup'))
+    seq = FileSequence('/show/seq/sh010/render/beauty.1-100000#.exr')
+    frames = seq.frameSet()
+    path = seq.format('{dirname}{basename}') + '%04d' + seq.extension()
+
+    def legacy():
+        return [seq.frame(f) for f in frames]
+
+    def template():
+        return [path % f for f in frames]
+
+    assert legacy() == template() == seq.frame_paths()
+    _report('frame() per frame', _time(legacy, 1), _time(seq.frame_paths, 1))
+    _report('%-template per frame', _time(template, 1),
+            _time(seq.frame_paths, 1))
+    _report('streamed', _time(lambda: list(imap(seq.frame, frames)), 1),
+            _time(lambda: list(seq.yield_frame_paths()), 1))
+
+def bench_gaps():
+    """
+    Missing frames of a scanned sequence of 100k frames with 100 gaps,
+    against walking the frames and comparing neighbours the way
+    ImageSequence._is_broken did, and the former frame by frame
+    invertedFrameRange.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'gaps (100k frames)', 'per frame', 'runs', 'speedup'))
+    frames = [f for f in xrange(1, 100101) if f % 1000 != 500]
+    seq = FileSequence.findSequencesInList(
+        ['/show/sh010/beauty.{0:04d}.exr'.format(f) for f in frames])[0]
+    frameSet = seq.frameSet()
+
+    def neighbours():
+        for i in xrange(len(frameSet) - 1):
+            if frameSet[i + 1] - frameSet[i] > 1:
+                return True
+        return False
+
+    def inverted_frame_range():
+        result = []
+        ordered = sorted(frameSet)
+        for idx, frame in enumerate(ordered[:-1]):
+            if ordered[idx + 1] - frame != 1:
+                result += xrange(frame + 1, ordered[idx + 1])
+        return FrameSet.framesToFrameRange(result, sort=False, compress=False)
+
+    assert inverted_frame_range() == frameSet.invertedFrameRange()
+    _report('broken check (first gap at 500)', _time(neighbours, 10),
+            _time(lambda: not frameSet.inverted().is_null, 10))
+    _report('invertedFrameRange', _time(inverted_frame_range, 10),
+            _time(frameSet.invertedFrameRange, 10))
+    _report('gap spans', _time(inverted_frame_range, 10),
+            _time(frameSet.gaps, 10))
+
+def bench_watcher():
+    """
+    Picking up 10 new frames in a directory of 10k frames, with a
+    SequenceWatcher applying the inotify events, against listing and parsing
+    the directory again with findSequencesOnDisk.  The watcher timings
+    include writing the frames.
+    """
+    print('\n{0:<48} {1:>14} {2:>14} {3:>10}'.format(
+        'SequenceWatcher (10k frames)', 'rescan', 'events', 'speedup'))
+    if watcher._libc is None:
+        print('inotify is not available, skipping')
+        return
+    tmp = tempfile.mkdtemp()
+    try:
+        for frame in xrange(1, 10001):
+            open(os.path.join(tmp, 'beauty.{0:05d}.exr'.format(frame)),
+                 'w').close()
+        frames = iter(xrange(10001, 10 ** 6))
+        seqs = []
+        with SequenceWatcher(on_frames=lambda seq, new: seqs.append(seq)) \
+                as watch:
+            watch.watch(tmp)
+
+            def write():
+                for _ in xrange(10):
+                    open(os.path.join(tmp, 'beauty.{0:05d}.exr'.format(
+                        next(frames))), 'w').close()
+
+            def rescan():
+                write()
+                return FileSequence.findSequencesOnDisk(tmp)
+
+            def events():
+                write()
+                watch.poll(1)
+
+            _report('10 new frames', _time(rescan, 10), _time(events, 10))
+            watch.poll(1)
+            assert map(str, FileSequence.findSequencesOnDisk(tmp)) == \
+                map(str, watch.sequences(tmp))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    bench_index()
+    bench_numpy()
+    bench_frames_to_frame_range()
+    bench_intern()
+    bench_hash()
+    bench_wire()
+    bench_partition()
+    bench_find_on_disk()
+    bench_yield_sequences()
+    bench_split_disk_path()
+    bench_tree()
+    bench_scan_cache()
+    bench_find_sequence()
+    bench_stream()
+    bench_frame_paths()
+    bench_gaps()
+    bench_watcher()
@@ -9,7 +9,12 @@ import os
 import re
 import types
 from itertools import chain
+from collections import OrderedDict
 import string
+import random
+import shutil
+import tempfile
+import time
 
 
 TEST_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -25,8 +30,17 @@ from fileseq import (FrameSet,
                      padFrameRange, 
                      getPaddingChars, 
                      getPaddingNum, 
-                     ParseException)
-from fileseq.constants import PAD_MAP
+                     ParseException,
+                     FileSeqException,
+                     ScanCache,
+                     SequenceWatcher)
+from fileseq.constants import PAD_MAP, DISK_RE
+from fileseq import utils, watcher
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def _yrange(first, last=None, incr=1):
@@ -240,7 +254,7 @@ class TestFrameSet(unittest.TestCase):
         """
         f = FrameSet(test)
         m = u'FrameSet("{0}")._items != {1}: got {2}'
-        r = f._items
+        r = f.items
         self.assertEqual(r, set(expect), m.format(test, set(expect), r))
         m = u'FrameSet("{0}")._FrameSet__items returns {1}: got {2}'
         self.assertIsInstance(r, frozenset, m.format(test, frozenset, type(r)))
@@ -254,7 +268,7 @@ class TestFrameSet(unittest.TestCase):
         """
         f = FrameSet(test)
         m = u'FrameSet("{0}")._order != {1}: got {2}'
-        r = f._order
+        r = f.order
         self.assertEqual(r, tuple(expect), m.format(test, tuple(expect), r))
         m = u'FrameSet("{0}")._order returns {1}: got {2}'
         self.assertIsInstance(r, tuple, m.format(test, tuple, type(r)))
@@ -482,7 +496,7 @@ class TestFrameSet(unittest.TestCase):
         self.assertIsInstance(f2, FrameSet, m.format(test))
         self.assertTrue(str(f) == str(f2) and list(f) == list(f2), m.format(test))
         # test old objects being unpickled through new lib
-        state = {'__frange': f._frange, '__set': set(f._items), '__list': list(f._order)}
+        state = {'__frange': f._frange, '__set': set(f.items), '__list': list(f.order)}
         f2 = FrameSet.__new__(FrameSet)
         f2.__setstate__(state)
         self.assertTrue(str(f) == str(f2) and list(f) == list(f2), m.format(test))
@@ -1100,6 +1114,253 @@ class TestFrameSet(unittest.TestCase):
             actual = list(f)
             self.assertEqual(actual, expected)
 
+    def testLargeRangeIsNotExpanded(self):
+        f = FrameSet('1-10000000,20000000-10000001x3')
+        self.assertEqual(len(f), 13333334)
+        self.assertEqual(f.start(), 1)
+        self.assertEqual(f.end(), 10000001)
+        self.assertTrue(5000000 in f)
+        self.assertTrue(19999997 in f)
+        self.assertFalse(19999998 in f)
+        self.assertEqual(f.index(19999997), 10000001)
+        self.assertEqual(f[10000001], 19999997)
+        self.assertEqual(f[-1], 10000001)
+        self.assertEqual(f[9999998:10000002], (9999999, 10000000, 20000000, 19999997))
+        self.assertRaises(ValueError, f.index, 0)
+        self.assertRaises(IndexError, f.__getitem__, 13333334)
+        self.assertIsNone(f._items)
+        self.assertIsNone(f._order)
+
+    def testOverlappingPartsKeepFirstOccurrence(self):
+        f = FrameSet('1-10,5-15,20-1x2')
+        expect = range(1, 16) + [20, 18, 16]
+        self.assertEqual(list(f), expect)
+        self.assertEqual(f.order, tuple(expect))
+        self.assertEqual(f.items, frozenset(expect))
+
+    def testSetOperationsOnLargeRanges(self):
+        a = FrameSet('1-2000000')
+        b = FrameSet('1000000-3000000,4000000-5000000x2')
+        self.assertEqual(str(a & b), '1000000-2000000')
+        self.assertEqual(str(a | b), '1-3000000,4000000-5000000x2')
+        self.assertEqual(str(a - b), '1-999999')
+        self.assertEqual(str(b - a), '2000001-3000000,4000000-5000000x2')
+        self.assertEqual(str(a ^ b), '1-999999,2000001-3000000,4000000-5000000x2')
+        self.assertEqual(str(b & FrameSet('4000001-4000020x3')), '4000004-4000016x6')
+        self.assertTrue(a.issubset(a | b))
+        self.assertFalse(a.isdisjoint(b))
+        self.assertIsNone(a._items)
+        self.assertIsNone(b._items)
+
+    def testSetOperationsOnInterleavedRuns(self):
+        a = FrameSet('1-20:3')
+        b = FrameSet('10-30x2')
+        self.assertEqual(list(a & b), sorted(set(a.order) & set(b.order)))
+        self.assertEqual(list(a | b), sorted(set(a.order) | set(b.order)))
+        self.assertEqual(list(a - b), sorted(set(a.order) - set(b.order)))
+        self.assertEqual(list(a ^ b), sorted(set(a.order) ^ set(b.order)))
+
+    def testIndexLookupAcrossRuns(self):
+        for frange in ('1-5000y7,-20--1', '900-1x3,2-8', '50-60,1-10,30-20'):
+            f = FrameSet(frange)
+            order = f.order
+            for i, frame in enumerate(order):
+                self.assertEqual(f.index(frame), i)
+                self.assertEqual(f[i], frame)
+                self.assertEqual(f[i - len(order)], frame)
+            self.assertRaises(ValueError, f.index, max(order) + 1)
+            self.assertRaises(IndexError, f.__getitem__, len(order))
+
+    def testRunsAreBuiltOnDemand(self):
+        f = FrameSet('2-1y1,10-1,20-30x2,5')
+        self.assertEqual(f.start(), 10)
+        self.assertTrue(f)
+        self.assertFalse(f.is_null)
+        self.assertEqual(f.frameRange(3), '002-001y1,010-001,020-030x2,005')
+        self.assertEqual(str(f), '2-1y1,10-1,20-30x2,5')
+        self.assertIsNone(f._run_cache)
+        self.assertEqual(f.end(), 30)
+        self.assertEqual(FrameSet(f)._run_cache, f._run_cache)
+        self.assertFalse(FrameSet('1-2y1'))
+        self.assertTrue(FrameSet('1-2y1').is_null)
+        self.assertRaises(IndexError, FrameSet('1-2y1').start)
+        self.assertRaises(ParseException, FrameSet, '1-10,a-b')
+
+    def testFromArray(self):
+        frames = [5, 3, 4, 1, 3, 20, 10, 15, 2.9]
+        for sort in (False, True):
+            f = FrameSet.from_array(frames, sort=sort)
+            expect = FrameSet.from_iterable(map(int, frames), sort=sort)
+            self.assertEqual(str(f), str(expect))
+            self.assertEqual(f.order, expect.order)
+        self.assertTrue(FrameSet.from_array([]).is_null)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def testNumpyArrays(self):
+        frames = numpy.array([7, 1, 2, 3, 7, 12, 9, 6], dtype=numpy.int32)
+        f = FrameSet(frames)
+        self.assertEqual(str(f), '7,1-3,12-6x3')
+        self.assertEqual(f.order, (7, 1, 2, 3, 12, 9, 6))
+        self.assertEqual(str(FrameSet.from_array(frames, sort=True)),
+                         '1-3,6,7,9,12')
+        probe = numpy.arange(-2, 15)
+        for frange in ('7,1-3,12-6x3', '1-20:3', '20-1y4', ''):
+            f = FrameSet(frange)
+            self.assertEqual(f.hasFrames(probe).tolist(),
+                             [frame in f.items for frame in probe.tolist()])
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def testSetOperationsOnFragmentedSets(self):
+        a = FrameSet.from_array(numpy.arange(0, 3000)[numpy.arange(3000) % 5 != 2])
+        b = FrameSet('1000-4000y3')
+        self.assertTrue(a._prefer_array(b))
+        ai, bi = set(a.order), set(b.order)
+        self.assertEqual(list(a & b), sorted(ai & bi))
+        self.assertEqual(list(a | b), sorted(ai | bi))
+        self.assertEqual(list(a - b), sorted(ai - bi))
+        self.assertEqual(list(a ^ b), sorted(ai ^ bi))
+        self.assertEqual(str(a - b), FrameSet.framesToFrameRange(sorted(ai - bi)))
+
+    def testIntern(self):
+        FrameSet.intern_clear()
+        try:
+            f = FrameSet.intern('1001-1100')
+            self.assertIs(FrameSet.intern('1001-1100'), f)
+            self.assertIs(FrameSet.intern('1001-1100#'), f)
+            self.assertIsNot(f.copy(), f)
+            self.assertEqual(FrameSet.intern([1, 2, 3]), FrameSet('1-3'))
+            self.assertRaises(ParseException, FrameSet.intern, 'a-b')
+            self.assertEqual(FrameSet.intern_info(), (2, 2, 4096, 1))
+
+            # unpickled FrameSets share the internals of the interned one
+            len(f)
+            f2 = cPickle.loads(cPickle.dumps(FrameSet('1001-1100')))
+            self.assertIsNot(f2, f)
+            self.assertIs(f2._run_cache, f._run_cache)
+
+            FrameSet.intern_clear(maxsize=2)
+            for frange in ('1', '2', '1', '3'):
+                FrameSet.intern(frange)
+            self.assertEqual(FrameSet.intern_info(), (1, 3, 2, 2))
+            g = FrameSet.intern('2')
+            self.assertIsNot(FrameSet.intern('2'), FrameSet('2'))
+            self.assertIs(FrameSet.intern('2'), g)
+        finally:
+            FrameSet.intern_clear(maxsize=4096)
+
+    def testHashAndEquality(self):
+        # the same frames, grouped into different runs
+        a = FrameSet('27-23x4,21--20')
+        b = FrameSet([27, 23] + range(21, -21, -1))
+        self.assertNotEqual(a._runs, b._runs)
+        self.assertEqual(a, b)
+        self.assertFalse(a != b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(hash(FrameSet('1-5')), hash(FrameSet('1,2,3,4,5')))
+        self.assertEqual(len({FrameSet('1-10x2'): 1, FrameSet('1,3,5,7,9'): 2}), 1)
+
+        # the hash is only computed once, and never needs the frames expanded
+        f = FrameSet('1-1000000')
+        self.assertEqual(hash(f), f._hash)
+        self.assertEqual(f, FrameSet('1-500000,500001-1000000'))
+        self.assertNotEqual(f, FrameSet('1-999999'))
+        self.assertIsNone(f._order)
+        self.assertIsNone(f._items)
+
+        # the order still matters
+        self.assertNotEqual(FrameSet('1-5'), FrameSet('5-1'))
+        self.assertEqual(FrameSet('1-5'), [1, 2, 3, 4, 5])
+        self.assertNotEqual(FrameSet('1-5'), [5, 4, 3, 2, 1])
+
+    def testInvertedAndGaps(self):
+        tests = [
+            ("1-5,9,20-24x2", "6-8,10-19,21,23",
+             [(6, 8), (10, 19), (21, 21), (23, 23)]),
+            ("1-10x3", "2,3,5,6,8,9", [(2, 3), (5, 6), (8, 9)]),
+            ("10-1,20", "11-19", [(11, 19)]),
+            ("1-100:5", "", []),
+            ("-5--1x2,1", "-4-0x2", [(-4, -4), (-2, -2), (0, 0)]),
+            ("7", "", []),
+        ]
+        for frange, missing, gaps in tests:
+            frameSet = FrameSet(frange)
+            self.assertEqual(frameSet.inverted(), FrameSet(missing))
+            self.assertEqual(frameSet.invertedFrameRange(), missing)
+            self.assertEqual(frameSet.gaps(), gaps)
+
+        rand = random.Random(0)
+        for _ in xrange(2000):
+            frames = set()
+            for _ in xrange(rand.randint(1, 4)):
+                start = rand.randint(-20, 100)
+                frames.update(xrange(start, start + rand.randint(1, 40),
+                                     rand.randint(1, 5)))
+            frameSet = FrameSet.from_iterable(rand.sample(frames, len(frames)))
+            missing = sorted(set(xrange(min(frames), max(frames))) - frames)
+            self.assertEqual(list(frameSet.inverted()), missing)
+            spans = []
+            for frame in missing:
+                if spans and spans[-1][1] == frame - 1:
+                    spans[-1] = (spans[-1][0], frame)
+                else:
+                    spans.append((frame, frame))
+            self.assertEqual(frameSet.gaps(), spans)
+
+    def testChunks(self):
+        f = FrameSet('1-10,20-30x5')
+        self.assertEqual(f.chunks(4), [
+            FrameSet('1-4'), FrameSet('5-8'), FrameSet('9-10,20,25'),
+            FrameSet('30')])
+        self.assertEqual(f.partition(3), [
+            FrameSet('1-5'), FrameSet('6-9'), FrameSet('10,20-30x5')])
+        self.assertEqual(f.run_chunks(), [FrameSet('1-10'), FrameSet('20-30x5')])
+        self.assertEqual(f.run_chunks(4), [
+            FrameSet('1-4'), FrameSet('5-8'), FrameSet('9-10'), FrameSet('20-30x5')])
+        self.assertEqual(FrameSet('1-3').partition(5),
+                         [FrameSet('1'), FrameSet('2'), FrameSet('3')])
+        self.assertEqual(FrameSet('').partition(5), [])
+        self.assertEqual(FrameSet('').chunks(5), [])
+        self.assertEqual(FrameSet('').run_chunks(), [])
+        for method in (f.chunks, f.partition, f.run_chunks):
+            self.assertRaises(ValueError, method, 0)
+
+        # the order is kept, and the chunks are built without expanding
+        f = FrameSet('100000-1')
+        chunks = f.partition(64)
+        self.assertEqual(len(chunks), 64)
+        self.assertEqual(set(map(len, chunks)), set([1562, 1563]))
+        self.assertEqual(str(chunks[0]), '100000-98438')
+        self.assertEqual(str(chunks[-1]), '1562-1')
+        self.assertIsNone(f._order)
+        self.assertTrue(all(c._order is None for c in chunks))
+
+    def testWireFormat(self):
+        for frange in ('', '1-100', '001-010', '1-12x5', '1,2,3', '10-1',
+                       '1-10:3', '-5--1,4,6-20x2', '%d-%d' % (2 ** 63, 2 ** 63 + 1)):
+            f = FrameSet(frange)
+            for g in (FrameSet.from_bytes(f.to_bytes()),
+                      FrameSet.from_bytes(bytearray(f.to_bytes())),
+                      FrameSet.from_json(f.to_json())):
+                self.assertEqual(g, f)
+                self.assertEqual(str(g), str(f))
+                self.assertIsInstance(str(g), str)
+
+        # the runs are packed as narrow as they fit, nothing is parsed on load
+        # and no frame range string is stored when it can be rebuilt from them
+        self.assertEqual(len(FrameSet('1-100').to_bytes()), 7 + 3)
+        self.assertEqual(len(FrameSet('-1-1000000').to_bytes()), 7 + 3 * 4)
+        f = FrameSet('1-100,200-300x2')
+        self.assertEqual(len(f.to_bytes()), 7 + 2 * 3 * 2)
+        self.assertEqual(f.to_json(), '{"runs":[1,100,1,200,300,2]}')
+        self.assertIsNone(FrameSet.from_bytes(f.to_bytes())._parts)
+
+        for data in ('', '\x01\x00', '\x02' + f.to_bytes()[1:], f.to_bytes()[:-1],
+                     f.to_bytes()[:2] + 'x' + f.to_bytes()[3:]):
+            self.assertRaises(ParseException, FrameSet.from_bytes, data)
+        for data in ('', '[', '[1, 2, 3]', '{}', '{"runs":[1,2]}'):
+            self.assertRaises(ParseException, FrameSet.from_json, data)
+
+
 
 # due to the sheer number of combinations, we build the bulk of our tests on to TestFrameSet dynamically
 for name, tst, exp in FRAME_SET_SHOULD_SUCCEED:
@@ -1259,6 +1520,34 @@ class TestFramesToFrameRange(unittest.TestCase):
         m = '{0!r} != {1!r}'
         self.assertEqual(f, r, m.format(f, r))
 
+    def _check_matchesGenerator(self, frames, sort, compress):
+        expect = list(frames)
+        if compress:
+            expect = list(OrderedDict.fromkeys(expect))
+        if sort:
+            expect.sort()
+        expect = ','.join(FrameSet.framesToFrameRanges(expect, 2))
+        r = framesToFrameRange(frames, sort=sort, zfill=2, compress=compress)
+        self.assertEqual(r, expect)
+
+    def testLongListsMatchGenerator(self):
+        frames = range(-400, 400, 3) + [500, 502, 503, 504] + range(1000, 700, -2)
+        tests = [
+            frames,
+            frames + frames[::7],
+            sorted(frames + frames[::5]),
+            sorted(frames)[::-1],
+            [float(f) for f in frames],
+            [2 ** 64 + f for f in sorted(frames)],
+        ]
+        for test in tests:
+            for sort in (True, False):
+                for compress in (True, False):
+                    self._check_matchesGenerator(test, sort, compress)
+                    if numpy is not None:
+                        self._check_matchesGenerator(
+                            numpy.array(test), sort, compress)
+
 # due to the sheer number of combinations, we build the bulk of our tests on to TestFramesToFrameRange dynamically
 for name, tst, exp in FRAME_SET_SHOULD_SUCCEED:
     setattr(
@@ -1268,6 +1557,36 @@ for name, tst, exp in FRAME_SET_SHOULD_SUCCEED:
 
 class TestFileSequence(unittest.TestCase):
 
+    def testFrameSetsAreInterned(self):
+        a = FileSequence("/foo/boo.1001-1100#.exr")
+        b = FileSequence("/bar/far.1001-1100@@@@.dpx")
+        self.assertIs(a.frameSet(), b.frameSet())
+        a.setFrameRange('1-10')
+        self.assertIs(a.frameSet(), FrameSet.intern('1-10'))
+
+    def testWireFormat(self):
+        for path in ("/foo/boo.1-5#.exr", "/foo/boo.0001.exr", "boo.exr",
+                     "/foo/boo.-10-10,20@@@.dpx", "/foo/boo.1-10x2#.exr"):
+            seq = FileSequence(path)
+            for loaded in (FileSequence.from_bytes(seq.to_bytes()),
+                           FileSequence.from_json(seq.to_json())):
+                self.assertEquals(str(seq), str(loaded))
+                self.assertEquals(seq.frameSet(), loaded.frameSet())
+                self.assertEquals(seq.zfill(), loaded.zfill())
+                self.assertEquals(list(seq), list(loaded))
+
+        seq = FileSequence(u"/f\xf6\xf6/boo.1-5#.exr")
+        loaded = FileSequence.from_json(seq.to_json())
+        self.assertEquals(loaded.dirname(), "/f\xc3\xb6\xc3\xb6/")
+        self.assertEquals(FileSequence.from_bytes(seq.to_bytes()).dirname(),
+                          loaded.dirname())
+
+        data = FileSequence("/foo/boo.1-5#.exr").to_bytes()
+        for bad in ('', data[:20], '\x02' + data[1:]):
+            self.assertRaises(ParseException, FileSequence.from_bytes, bad)
+        for bad in ('', '{}', '{"dirname":1}'):
+            self.assertRaises(ParseException, FileSequence.from_json, bad)
+
     def testSeqGettersType1(self):
         seq = FileSequence("/foo/boo.1-5#.exr")
         self.assertEquals(5, len(seq))
@@ -1331,6 +1650,36 @@ class TestFileSequence(unittest.TestCase):
         seq = FileSequence("/cheech/chong.1,3,5#.exr")
         self.assertFalse(known.difference(seq))
 
+    def testFramePaths(self):
+        seq = FileSequence("/cheech/100%/chong.1-3,-2,10-20x5@@@.exr")
+        tests = [
+            None,
+            FrameSet("10-1x3,20"),
+            FrameSet("-3--1"),
+            xrange(5),
+            [7, -12, 1000],
+        ]
+        for frames in tests:
+            expected = [seq.frame(f) for f in
+                        (seq.frameSet() if frames is None else frames)]
+            self.assertEquals(seq.frame_paths(frames), expected)
+            self.assertEquals(list(seq.yield_frame_paths(frames)), expected)
+            self.assertEquals(seq.frame_paths(frames, as_bytes=True), expected)
+        self.assertEquals(list(seq), seq.frame_paths())
+
+        # unicode paths can be encoded for the os functions
+        seq = FileSequence(u"/cheech/chong.1-2#.exr")
+        self.assertEquals(seq.frame_paths(),
+                          [u"/cheech/chong.0001.exr", u"/cheech/chong.0002.exr"])
+        paths = seq.frame_paths(as_bytes=True)
+        self.assertEquals(map(type, paths), [str, str])
+
+        # a sequence without padding gives its own path
+        seq = FileSequence("/cheech/chong.exr")
+        self.assertEquals(seq.frame_paths(), ["/cheech/chong.exr"])
+        self.assertEquals(seq.frame_paths([1, 2]), [seq.frame(1), seq.frame(2)])
+        self.assertEquals(list(seq.yield_frame_paths()), ["/cheech/chong.exr"])
+
     def testFormat(self):
         seq = FileSequence("/cheech/chong.1-10,30,40#.exr")
         self.assertEquals("chong.0001-0010,0030,0040#.exr", str(seq.format()))
@@ -1490,6 +1839,67 @@ class TestFileSequence(unittest.TestCase):
         ])
         self.assertEquals(actual, expected)
 
+    def test_yield_sequences_in_list_builds_directly(self):
+        paths = ['/path/to/file.%04d.exr' % f for f in (1, 2, 3, 5)]
+        paths += ['/path/to/file.-01.dpx', '/path/to/file.02.dpx', 'file.exr']
+        seqs = dict((str(s), s) for s in FileSequence.yield_sequences_in_list(paths))
+        self.assertEquals(sorted(seqs), [
+            '/path/to/file.-1,2@@.dpx', '/path/to/file.1-3,5#.exr', 'file.exr'])
+        seq = seqs['/path/to/file.1-3,5#.exr']
+        self.assertEquals(seq.zfill(), 4)
+        self.assertEquals(seq.frameSet(), FrameSet('1-3,5'))
+        self.assertEquals(seq.frame(5), '/path/to/file.0005.exr')
+        self.assertEquals(seqs['/path/to/file.-1,2@@.dpx'].zfill(), 2)
+        self.assertEquals(seqs['file.exr'].zfill(), 0)
+        self.assertIsNone(seqs['file.exr'].frameSet())
+
+    def testCollisions(self):
+        paths = ['/a/b.1.exr', '/a/b.0001.exr', '/a/b.01.exr', '/a/b.2.exr',
+                 '/a/b.0002.exr', '/a/b.3.exr', '/a/c.0001.exr']
+        seqs = dict((s.basename(), s)
+                    for s in FileSequence.findSequencesInList(paths))
+        self.assertEquals(seqs['b.'].collisions(),
+                          {1: ('1', '01', '0001'), 2: ('2', '0002')})
+        self.assertEquals(str(seqs['b.']), '/a/b.1-3@.exr')
+        self.assertEquals(seqs['c.'].collisions(), {})
+        self.assertEquals(FileSequence('/a/b.1-3#.exr').collisions(), {})
+
+    def test_yield_sequences_in_stream(self):
+        # depth first, with the files of a/ on both sides of a/b/
+        paths = ['a/x.1.exr', 'a/b/y.1.exr', 'a/b/y.2.exr', 'a/x.2.exr',
+                 'a/c/z.0001.exr', 'e/q.1.exr', 'top.exr']
+        read = []
+        def stream():
+            for path in paths:
+                read.append(path)
+                yield path
+
+        emitted = []
+        for seq in FileSequence.yield_sequences_in_stream(stream()):
+            emitted.append((str(seq), len(read)))
+        self.assertEquals(emitted, [
+            ('a/b/y.1,2@.exr', 4), ('a/c/z.1#.exr', 6), ('a/x.1,2@.exr', 6),
+            ('e/q.1@.exr', 7), ('top.exr', 7)])
+
+        expected = sorted(map(str, FileSequence.findSequencesInList(paths)))
+        for ordered in (True, False):
+            shuffled = list(paths)
+            random.Random(0).shuffle(shuffled)
+            seqs = FileSequence.yield_sequences_in_stream(
+                sorted(paths) if ordered else shuffled, ordered=ordered)
+            self.assertEquals(sorted(map(str, seqs)), expected)
+
+        # the flush hook is given the number of sequences and frames held
+        held = []
+        def flush(count):
+            held.append(count)
+            return count >= 3
+        seqs = FileSequence.yield_sequences_in_stream(
+            ['a.1.exr', 'a.1.exr', 'a.2.exr', 'a.3.exr', 'b.exr'],
+            ordered=False, flush=flush)
+        self.assertEquals(map(str, seqs), ['a.1,2@.exr', 'a.3@.exr', 'b.exr'])
+        self.assertEquals(held, [2, 2, 3, 2, 3])
+
 class TestFindSequencesOnDisk(unittest.TestCase):
 
     def testFindSequencesOnDisk(self):
@@ -1549,6 +1959,75 @@ class TestFindSequencesOnDisk(unittest.TestCase):
         self.assertEqual(known, found)
         self.assertFalse(known.difference(found))
 
+    def testFindSequencesOnDiskFilesOnly(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            for name in ('a.0001.exr', 'a.0002.exr', '.a.0003.exr', 'b.exr'):
+                open(os.path.join(tmp, name), 'w').close()
+            # directories and broken links are skipped, links to files are not
+            os.mkdir(os.path.join(tmp, 'a.0004.exr'))
+            os.symlink('a.0001.exr', os.path.join(tmp, 'a.0005.exr'))
+            os.symlink('missing', os.path.join(tmp, 'a.0006.exr'))
+
+            expected = [
+                set([tmp + "/a.1,2,5#.exr", tmp + "/b.exr"]),
+                set([tmp + "/a.1,2,5#.exr", tmp + "/.a.3#.exr", tmp + "/b.exr"]),
+            ]
+            saved = utils.scandir
+            try:
+                for scandir in set([saved, None]):
+                    utils.scandir = scandir
+                    for include_hidden, known in zip((False, True), expected):
+                        found = findSequencesOnDisk(tmp, include_hidden)
+                        self.assertEqual(set(map(str, found)), known)
+                        found = findSequencesOnDisk(tmp + '/', include_hidden)
+                        self.assertEqual(set(map(str, found)), known)
+            finally:
+                utils.scandir = saved
+        finally:
+            shutil.rmtree(tmp)
+
+    def testYieldSequencesInTree(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            for dirname in ('a/b/c', 'a/tmp', '.git', 'd'):
+                os.makedirs(os.path.join(tmp, dirname))
+            for path in ('x.0001.exr', 'x.0002.exr', 'a/y.0001.exr',
+                         'a/y.0001.dpx', 'a/b/c/z.0003.exr', 'a/tmp/t.0001.exr',
+                         '.git/g.0001.exr', 'd/.h.0001.exr'):
+                open(os.path.join(tmp, path), 'w').close()
+            os.symlink(os.path.join(tmp, 'a'), os.path.join(tmp, 'd', 'link'))
+
+            def find(**kwargs):
+                seqs = FileSequence.yield_sequences_in_tree(tmp, **kwargs)
+                return set(str(seq)[len(tmp) + 1:] for seq in seqs)
+
+            everything = set(['x.1,2#.exr', 'a/y.1#.exr', 'a/y.1#.dpx',
+                              'a/b/c/z.3#.exr', 'a/tmp/t.1#.exr'])
+            for workers in (1, 4):
+                self.assertEqual(find(workers=workers), everything)
+            self.assertEqual(find(max_depth=0), set(['x.1,2#.exr']))
+            self.assertEqual(find(max_depth=1),
+                             set(['x.1,2#.exr', 'a/y.1#.exr', 'a/y.1#.dpx']))
+            self.assertEqual(find(include='*.dpx'), set(['a/y.1#.dpx']))
+            self.assertEqual(find(exclude=['tmp', 'b']),
+                             set(['x.1,2#.exr', 'a/y.1#.exr', 'a/y.1#.dpx']))
+            self.assertEqual(find(include_hidden=True), everything | set([
+                '.git/g.1#.exr', 'd/.h.1#.exr']))
+            self.assertEqual(len(find(followlinks=True)), len(everything) + 4)
+
+            errors = []
+            seqs = FileSequence.yield_sequences_in_tree(
+                os.path.join(tmp, 'missing'), onerror=errors.append)
+            self.assertEqual(list(seqs), [])
+            self.assertEqual(len(errors), 1)
+            self.assertIsInstance(errors[0], OSError)
+            # raised by the call itself, not on iteration
+            self.assertRaises(ValueError, FileSequence.yield_sequences_in_tree,
+                              tmp, workers=0)
+        finally:
+            shutil.rmtree(tmp)
+
 
 class TestFindSequenceOnDisk(unittest.TestCase):
 
@@ -1571,6 +2050,279 @@ class TestFindSequenceOnDisk(unittest.TestCase):
             actual = str(seq)
             self.assertEqual(actual, expected)
 
+    def testFindSequenceOnDiskExactMatch(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            # names that a glob would take for wildcards, hidden files and
+            # directories
+            for name in ('sh[1].0001.exr', 'sh[1].0002.exr', 'sh1.0003.exr',
+                         'sh?.0004.exr', '.0005.exr', '0006.exr'):
+                open(os.path.join(tmp, name), 'w').close()
+            os.mkdir(os.path.join(tmp, '0007.exr'))
+            tests = [
+                ("sh[1].#.exr", "sh[1].1,2#.exr"),
+                ("sh1.#.exr", "sh1.3#.exr"),
+                ("sh?.#.exr", "sh?.4#.exr"),
+                ("#.exr", "6#.exr"),
+                (".#.exr", ".5#.exr"),
+            ]
+            names = list(utils.iter_files(tmp, include_hidden=True))
+            for pattern, expected in tests:
+                seq = findSequenceOnDisk(os.path.join(tmp, pattern))
+                self.assertEqual(str(seq), os.path.join(tmp, expected))
+                # sharing one listing between lookups
+                seq = findSequenceOnDisk(os.path.join(tmp, pattern), names)
+                self.assertEqual(str(seq), os.path.join(tmp, expected))
+            for pattern in ("sh[1].#.jpg", "sh.#.exr", "#", "missing/#.exr"):
+                self.assertRaises(FileSeqException, findSequenceOnDisk,
+                                  os.path.join(tmp, pattern))
+        finally:
+            shutil.rmtree(tmp)
+
+
+class TestScanCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.seqdir = os.path.join(self.tmp, 'seq')
+        os.mkdir(self.seqdir)
+        self.cache = ScanCache(os.path.join(self.tmp, 'cache', 'scans.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def touch(self, *names):
+        for name in names:
+            open(os.path.join(self.seqdir, name), 'w').close()
+        # entries of directories modified too recently are not stored
+        old = os.stat(self.seqdir).st_mtime - 60
+        os.utime(self.seqdir, (old, old))
+
+    def find(self, dirpath=None, include_hidden=False):
+        found = self.cache.findSequencesOnDisk(dirpath or self.seqdir,
+                                               include_hidden)
+        return sorted(map(str, found))
+
+    def testCache(self):
+        self.touch('a.0001.exr', 'a.0002.exr', '.b.0001.exr', 'c.exr')
+        known = [self.seqdir + '/a.1,2#.exr', self.seqdir + '/c.exr']
+        self.assertEqual(self.find(), known)
+        self.assertEqual(self.cache.info(), (0, 1, None, 1))
+        self.assertEqual(self.find(), known)
+        self.assertEqual(self.cache.info(), (1, 1, None, 1))
+
+        # served from the cache with the directory as it was asked for
+        cached = max(self.cache.findSequencesOnDisk(self.seqdir + '/'),
+                     key=lambda seq: seq.zfill())
+        self.assertEqual(cached.dirname(), self.seqdir + '/')
+        self.assertEqual(cached.zfill(), 4)
+        os.chdir(self.tmp)
+        try:
+            self.assertEqual(self.find('seq'), ['seq/a.1,2#.exr', 'seq/c.exr'])
+        finally:
+            os.chdir(TEST_DIR)
+        self.assertEqual(self.cache.info().hits, 3)
+
+        # hidden files are cached separately
+        self.assertEqual(len(self.find(include_hidden=True)), 3)
+        self.assertEqual(self.cache.info(), (3, 2, None, 2))
+
+        # another process sees the same entries
+        other = ScanCache(self.cache.path())
+        found = other.findSequencesOnDisk(self.seqdir)
+        self.assertEqual(sorted(map(str, found)), known)
+        self.assertEqual(other.info().hits, 1)
+
+    def testInvalidation(self):
+        self.touch('a.0001.exr')
+        self.find()
+        # a new file changes the mtime of the directory
+        open(os.path.join(self.seqdir, 'a.0002.exr'), 'w').close()
+        self.assertEqual(self.find(), [self.seqdir + '/a.1,2#.exr'])
+        # but a directory that changed this recently is not stored
+        self.find()
+        self.assertEqual(self.cache.info().hits, 0)
+        self.touch('a.0003.exr')
+        self.find()
+        self.assertEqual(self.find(), [self.seqdir + '/a.1-3#.exr'])
+        self.assertEqual(self.cache.info().hits, 1)
+
+        # a directory replaced by another one has a new inode
+        shutil.rmtree(self.seqdir)
+        os.mkdir(self.seqdir)
+        self.touch('b.0001.exr')
+        self.assertEqual(self.find(), [self.seqdir + '/b.1#.exr'])
+        self.assertEqual(self.cache.info().hits, 1)
+
+        # padding collisions are not cached, so that they are reported
+        self.touch('b.1.exr', 'b.0001.exr')
+        for _ in xrange(2):
+            found = self.cache.findSequencesOnDisk(self.seqdir)
+            self.assertEqual([seq.collisions() for seq in found
+                              if seq.basename() == 'b.'], [{1: ('1', '0001')}])
+        self.assertEqual(self.cache.info().hits, 1)
+        os.remove(os.path.join(self.seqdir, 'b.1.exr'))
+        os.remove(os.path.join(self.seqdir, 'b.0001.exr'))
+        self.touch()
+
+        self.cache.invalidate(self.seqdir)
+        self.assertEqual(self.cache.info().currsize, 0)
+        self.find()
+        self.cache.clear()
+        self.assertEqual(self.cache.info(), (0, 0, None, 0))
+
+        self.assertRaises(OSError, self.cache.findSequencesOnDisk,
+                          os.path.join(self.tmp, 'missing'))
+
+    def testUnusableDatabase(self):
+        self.touch('a.0001.exr')
+        cache = ScanCache(os.path.join(self.seqdir, 'a.0001.exr', 'scans.db'))
+        for _ in xrange(2):
+            found = cache.findSequencesOnDisk(self.seqdir)
+            self.assertEqual(map(str, found), [self.seqdir + '/a.1#.exr'])
+        self.assertEqual(cache.info(), (0, 2, None, 0))
+
+
+class TestSequenceWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.events = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def new_watcher(self, use_inotify):
+        events = self.events
+        return SequenceWatcher(
+            on_frames=lambda seq, frames: events.append(
+                ('frames', os.path.basename(str(seq)), str(frames))),
+            on_complete=lambda seq: events.append(
+                ('complete', os.path.basename(str(seq)))),
+            on_stall=lambda seq, missing: events.append(
+                ('stall', os.path.basename(str(seq)), str(missing))),
+            stall_timeout=0.2, interval=0.05, use_inotify=use_inotify)
+
+    def touch(self, *names):
+        for name in names:
+            open(os.path.join(self.tmp, name), 'w').close()
+
+    def poll(self, watcher, seconds=0.1):
+        # let the polled directories be listed again
+        time.sleep(seconds)
+        watcher.poll(0.05)
+
+    def check(self, use_inotify):
+        watcher = self.new_watcher(use_inotify)
+        try:
+            self.touch('b.0001.exr', 'c.exr')
+            found = watcher.watch(self.tmp)
+            self.assertEqual(sorted(os.path.basename(str(seq)) for seq in found),
+                             ['b.1#.exr', 'c.exr'])
+            self.assertEqual(watcher.uses_inotify(self.tmp), use_inotify)
+            watcher.expect(os.path.join(self.tmp, 'b.1-4#.exr'))
+
+            # directories and hidden files are not part of the sequences
+            self.touch('b.0002.exr', 'b.0003.exr', '.b.0004.exr')
+            os.mkdir(os.path.join(self.tmp, 'b.0009.exr'))
+            self.poll(watcher)
+            self.assertEqual(self.events, [('frames', 'b.1-3#.exr', '2,3')])
+
+            self.poll(watcher, 0.25)
+            self.poll(watcher)
+            self.assertEqual(self.events[1:], [('stall', 'b.1-3#.exr', '4')])
+
+            # frames are moved in and out
+            self.touch('tmp')
+            os.rename(os.path.join(self.tmp, 'tmp'),
+                      os.path.join(self.tmp, 'b.0004.exr'))
+            os.remove(os.path.join(self.tmp, 'b.0001.exr'))
+            self.poll(watcher)
+            self.assertEqual(self.events[2:], [('frames', 'b.2-4#.exr', '4')])
+            self.touch('b.0001.exr')
+            self.poll(watcher)
+            self.assertEqual(self.events[3:], [
+                ('frames', 'b.1-4#.exr', '1'), ('complete', 'b.1-4#.exr')])
+            self.assertEqual(
+                sorted(str(seq) for seq in watcher.sequences(self.tmp)),
+                [os.path.join(self.tmp, name) for name in ('b.1-4#.exr', 'c.exr')])
+
+            # a directory removed and made again is followed again
+            shutil.rmtree(self.tmp)
+            self.poll(watcher)
+            self.poll(watcher)
+            self.assertEqual(watcher.sequences(self.tmp), [])
+            os.mkdir(self.tmp)
+            self.touch('d.0001.exr')
+            self.poll(watcher)
+            self.poll(watcher)
+            self.assertEqual(map(str, watcher.sequences()),
+                             [os.path.join(self.tmp, 'd.1#.exr')])
+            # b.1-4#.exr may have stalled meanwhile, having lost its frames
+            self.assertEqual([event for event in self.events[5:]
+                              if event[0] != 'stall'],
+                             [('frames', 'd.1#.exr', '1')])
+        finally:
+            watcher.close()
+
+    def testPolling(self):
+        self.check(use_inotify=False)
+
+    @unittest.skipIf(watcher._libc is None, "inotify is not available")
+    def testInotify(self):
+        self.check(use_inotify=True)
+
+    def testLargeExpectedRange(self):
+        # the expected frames are kept as runs, not one by one
+        watcher = self.new_watcher(use_inotify=False)
+        try:
+            self.touch('big.0001.exr', 'big.0002.exr')
+            watcher.expect(os.path.join(self.tmp, 'big.1-50000000#.exr'))
+            self.touch('big.0004.exr')
+            self.poll(watcher)
+            self.poll(watcher, 0.25)
+            self.poll(watcher)
+            self.assertEqual(self.events, [
+                ('frames', 'big.1,2,4#.exr', '4'),
+                ('stall', 'big.1,2,4#.exr', '3,5-50000000')])
+        finally:
+            watcher.close()
+
+    @unittest.skipIf(watcher._libc is None, "inotify is not available")
+    def testInotifyMovedDirectory(self):
+        dirpath = os.path.join(self.tmp, 'renders')
+        moved = os.path.join(self.tmp, 'moved')
+        watcher = self.new_watcher(use_inotify=True)
+
+        def watches():
+            # the watches held by the inotify instance, one line each
+            with open('/proc/self/fdinfo/%d' % watcher._fd) as f:
+                return sum(line.startswith('inotify wd:') for line in f)
+
+        try:
+            os.mkdir(dirpath)
+            watcher.watch(dirpath)
+            self.assertEqual(watches(), 1)
+            for i in xrange(3):
+                # the moved directory is let go, its path is polled
+                os.rename(dirpath, moved)
+                self.poll(watcher)
+                self.assertFalse(watcher.uses_inotify(dirpath))
+                self.assertEqual(watches(), 0)
+                open(os.path.join(moved, 'a.0001.exr'), 'w').close()
+                self.poll(watcher)
+                self.assertEqual(watcher.sequences(dirpath), [])
+                shutil.rmtree(moved)
+
+                # and watched again once it is back
+                os.mkdir(dirpath)
+                self.poll(watcher)
+                self.assertTrue(watcher.uses_inotify(dirpath))
+                self.assertEqual(watches(), 1)
+            self.assertEqual(self.events, [])
+        finally:
+            watcher.close()
+
 
 class TestPaddingFunctions(unittest.TestCase):
     """
@@ -1626,6 +2378,38 @@ class TestPaddingFunctions(unittest.TestCase):
         self.assertEqual(padFrameRange('1--100x2', 0), '1--100x2')
         self.assertEqual(padFrameRange('1--100x2', -1), '1--100x2')
 
+class TestSplitDiskPath(unittest.TestCase):
+    """
+    Test that the string scanning splitter gives the groups of DISK_RE.
+    """
+
+    def testSplitDiskPath(self):
+        tests = [
+            ('/path/to/file.0001.exr', ('/path/to/', 'file.', '0001', '.exr')),
+            ('/path/to/file--4.exr', ('/path/to/', 'file-', '-4', '.exr')),
+            ('path/01.exr', ('path/', '', '01', '.exr')),
+            ('mixed_seqs/no_ext_10', ('mixed_seqs/', 'no_ext_', '10', None)),
+            ('/path/to/.cruft', ('/path/to/', '', None, '.cruft')),
+            ('file.tar.gz', (None, 'file.tar', None, '.gz')),
+            ('/path/to/', ('/path/to/', None, None, None)),
+            ('', (None, None, None, None)),
+        ]
+        for path, expected in tests:
+            self.assertEqual(utils.split_disk_path(path), expected)
+            self.assertEqual(DISK_RE.match(path).groups(), expected)
+
+    def testMatchesDiskRegex(self):
+        rand = random.Random(0)
+        alphabet = list('/./.-0123456789ab_ \n') + [u'\xe9', u'\u0663']
+        for _ in xrange(50000):
+            path = u''.join(rand.choice(alphabet)
+                            for _ in xrange(rand.randint(0, 16)))
+            if rand.random() < 0.5:
+                path = path.encode('utf-8')
+            match = DISK_RE.match(path)
+            self.assertEqual(utils.split_disk_path(path),
+                             match.groups() if match else None, repr(path))
+
 if __name__ == '__main__':
     unittest.main(verbosity=0)
 
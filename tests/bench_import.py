@@ -0,0 +1,109 @@
+"""
+Measure the startup cost of the asset package: the time taken to import it
+in a new interpreter, and then to read its configuration, with and without
+the configuration cache. The heavy modules pulled in by the import are
+listed as well.
+
+With python 3.7 and above, the slowest imports reported by
+python -X importtime are printed too.
+
+Usage: python tests/bench_import.py [--runs N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+test_dir = os.path.dirname(os.path.realpath(__file__))
+package_dir = os.path.dirname(test_dir)
+package_name = os.path.basename(package_dir)
+
+# Modules which should only be imported once they are needed
+heavy_modules = ['yaml', 'fileseq', 'numpy', 'subprocess', 'shutil', 'json']
+
+timing_code = '''
+import sys, time
+sys.path.insert(0, %(path)r)
+start = time.time()
+import %(name)s
+imported = time.time()
+%(name)s.asset.get_config()
+configured = time.time()
+loaded = [m for m in %(heavy)r if sys.modules.get(m) is not None]
+print('%%r %%r %%s' %% (imported - start, configured - imported, ','.join(loaded)))
+'''
+
+
+def run_once(env):
+    code = timing_code % {
+        'path': os.path.dirname(package_dir),
+        'name': package_name,
+        'heavy': heavy_modules,
+    }
+    output = subprocess.check_output([sys.executable, '-W', 'ignore', '-c', code], env=env)
+    imported, configured, loaded = (output.decode('ascii').split() + [''])[:3]
+    return float(imported), float(configured), loaded
+
+
+def bench(label, env, runs):
+    results = [run_once(env) for _ in range(runs)]
+    imported = sorted(r[0] for r in results)
+    configured = sorted(r[1] for r in results)
+    print('%s' % label)
+    print('    import:      median %.2f ms, best %.2f ms' % (
+        imported[runs // 2] * 1000, imported[0] * 1000))
+    print('    get_config:  median %.2f ms, best %.2f ms' % (
+        configured[runs // 2] * 1000, configured[0] * 1000))
+    print('    heavy modules after import and get_config: %s' % (results[-1][2] or 'none'))
+
+
+def importtime(env, top=10):
+    """
+    Print the slowest imports reported by python -X importtime
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', 'import %s' % package_name]
+    env = dict(env, PYTHONPATH=os.path.dirname(package_dir))
+    process = subprocess.Popen(cmd, env=env, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+
+    rows = []
+    for line in stderr.decode('utf-8', 'replace').splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), module.rstrip()))
+
+    print('python -X importtime, slowest cumulative imports')
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        print('    %8.2f ms  %s' % (cumulative / 1000.0, module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20,
+                        help='number of interpreters to start for each measure')
+    args = parser.parse_args()
+
+    cache_file = os.path.join(tempfile.mkdtemp(), 'config.cache')
+    try:
+        env = dict(os.environ, ASSET_CONFIG_CACHE='')
+        bench('Without the configuration cache', env, args.runs)
+
+        env = dict(os.environ, ASSET_CONFIG_CACHE=cache_file)
+        run_once(env)
+        bench('With the configuration cache', env, args.runs)
+
+        if sys.version_info >= (3, 7):
+            importtime(env)
+        else:
+            print('python -X importtime needs python 3.7 or above, skipped')
+    finally:
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        os.rmdir(os.path.dirname(cache_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,32 @@
 import os
 import unittest
+import tempfile
+import threading
+import time
 from pathlib import Path
-from asset import asset_from_path
+import asset as asset_module
+from asset import asset_from_path, asset_from_paths, get_toolchain
+from errors import BrokenSequenceError, InvalidSequenceError
 import shutil
 
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
 test_dir = os.path.dirname(os.path.realpath(__file__))
 samples_dir = Path(test_dir, 'sample_files')
 tmp_dir = Path(test_dir, 'tmp')
 
 
+def make_files(folder, *names):
+    for name in names:
+        open(str(Path(folder, name)), 'w').close()
+
+
 class AssetTests(unittest.TestCase):
 
     def test_sequence_copy_basic(self):
@@ -33,6 +51,262 @@ class AssetTests(unittest.TestCase):
         except Exception as e:
             assert(str(e) == 'Sequence broken and has missing frames: 1-3,5-10')
 
+    def test_lazy_sequence_defers_scan(self):
+        """
+        A lazy sequence is only scanned when its frames are needed
+        """
+        folder = tempfile.mkdtemp()
+        try:
+            # Nothing to find yet, which would raise if scanned
+            asset = asset_from_path(folder, lazy=True)
+            assert(asset.type == 'ImageSequence')
+            assert(asset.directory == Path(folder))
+
+            make_files(folder, 'plate.0001.exr', 'plate.0002.exr', 'plate.0003.exr')
+            assert(asset.start == 1)
+            assert(asset.end == 3)
+            assert(str(asset.path) == str(Path(folder, 'plate.%04d.exr')))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_lazy_sequence_validate(self):
+        folder = tempfile.mkdtemp()
+        try:
+            asset = asset_from_path(folder, lazy=True)
+            self.assertRaises(InvalidSequenceError, asset.validate)
+            self.assertRaises(InvalidSequenceError, lambda: asset.start)
+        finally:
+            shutil.rmtree(folder)
+
+        test_seq = Path(samples_dir, 'dpx_seq_missing_frame')
+        asset = asset_from_path(test_seq, lazy=True)
+        try:
+            asset.validate()
+        except BrokenSequenceError as e:
+            assert(str(e) == 'Sequence broken and has missing frames: 1-3,5-10')
+        else:
+            assert False, 'BrokenSequenceError not raised'
+        self.assertRaises(BrokenSequenceError, lambda: asset.frame_range)
+
+        asset = asset_from_path(test_seq, tolerant=True, lazy=True)
+        asset.validate()
+        assert(asset.is_broken)
+        report = asset.gap_report()
+        assert(str(report['missing']) == '4')
+        assert(report['gaps'] == [(4, 4)])
+        assert(report['collisions'] == {})
+
+        asset = asset_from_path(Path(samples_dir, 'dpx_seq'), lazy=True)
+        asset.validate()
+        assert(not asset.is_broken)
+        assert(str(asset.gap_report()['missing']) == '')
+
+    def test_asset_from_paths(self):
+        folder = tempfile.mkdtemp()
+        try:
+            names = ['file_%03d.txt' % i for i in range(50)]
+            make_files(folder, 'clip.mov', 'still.jpg', *names)
+            os.mkdir(os.path.join(folder, 'empty'))
+            paths = [
+                Path(samples_dir, 'dpx_seq'),
+                Path(folder, 'clip.mov'),
+                Path(folder, 'missing.txt'),
+                Path(folder, 'empty'),
+                Path(folder, 'still.jpg'),
+                Path(samples_dir, 'dpx_seq_missing_frame'),
+            ] + [Path(folder, name) for name in names]
+
+            results = list(asset_from_paths(paths, workers=4))
+            assert([path for path, _, _ in results] == paths)
+            types = [asset.type if asset else None for _, asset, _ in results]
+            assert(types[:6] == ['ImageSequence', 'VideoFile', None, None, 'ImageFile', None])
+            assert(set(types[6:]) == set(['LocalFile']))
+
+            # Errors are the ones asset_from_path raises
+            for path, asset, error in results:
+                if error is None:
+                    continue
+                try:
+                    asset_from_path(path)
+                except Exception as e:
+                    assert(type(e) is type(error))
+                    assert(str(e) == str(error))
+            assert(isinstance(results[3][2], InvalidSequenceError))
+            assert(isinstance(results[5][2], BrokenSequenceError))
+
+            unordered = list(asset_from_paths(iter(paths), workers=4, ordered=False))
+            assert(sorted(path for path, _, _ in unordered) == sorted(paths))
+            assert(dict((path, asset and asset.type) for path, asset, _ in unordered)
+                   == dict(zip(paths, types)))
+
+            # Raised by the call itself, not on iteration
+            self.assertRaises(ValueError, asset_from_paths, paths, workers=0)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_asset_from_paths_slow_path(self):
+        """
+        A slow path does not let the ordered results read ahead of it
+        """
+        release = threading.Event()
+
+        class SlowEntry(object):
+            # A DirEntry taking its time to answer
+            path = str(Path(samples_dir, 'slated_video.mov'))
+            name = 'slated_video.mov'
+
+            def inode(self):
+                return 0
+
+            def is_dir(self):
+                release.wait(10)
+                return False
+
+            def is_file(self):
+                return True
+
+        read = []
+
+        def paths():
+            yield SlowEntry()
+            for i in range(100):
+                read.append(i)
+                yield Path(samples_dir, 'slated_video.mov')
+
+        workers = 2
+        results = asset_from_paths(paths(), workers=workers)
+        first = []
+        thread = threading.Thread(target=lambda: first.append(next(results)))
+        thread.start()
+        try:
+            time.sleep(0.2)
+            assert(not first)
+            assert(len(read) < workers * 2)
+        finally:
+            release.set()
+            thread.join()
+        assert(first[0][1].type == 'VideoFile')
+        assert(len(list(results)) == 100)
+
+    def test_asset_from_paths_close(self):
+        """
+        Closing the generator early stops its threads
+        """
+        threads = threading.active_count()
+        paths = [Path(samples_dir, 'dpx_seq')] * 100
+        results = asset_from_paths(paths, workers=4)
+        next(results)
+        assert(threading.active_count() == threads + 4)
+        results.close()
+        assert(threading.active_count() == threads)
+
+    @unittest.skipIf(scandir is None, 'scandir is not available')
+    def test_asset_from_dir_entry(self):
+        folder = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(folder, 'plate'))
+            make_files(os.path.join(folder, 'plate'), 'plate.0001.exr', 'plate.0002.exr')
+            make_files(folder, 'clip.mov', 'notes.txt')
+            os.symlink(os.path.join(folder, 'nowhere.mov'), os.path.join(folder, 'broken.mov'))
+            entries = dict((entry.name, entry) for entry in scandir(folder))
+
+            assert(asset_from_path(entries['plate']).type == 'ImageSequence')
+            assert(asset_from_path(entries['clip.mov']).type == 'VideoFile')
+            asset = asset_from_path(entries['notes.txt'])
+            assert(asset.type == 'LocalFile')
+            assert(asset.path == Path(folder, 'notes.txt'))
+            assert(asset.stat() == entries['notes.txt'].stat())
+            assert(asset.size == 0)
+
+            # A broken link fails as its path does
+            path = Path(folder, 'broken.mov')
+            try:
+                asset_from_path(path)
+            except Exception as e:
+                expected = str(e)
+            else:
+                assert False, 'broken link accepted'
+            try:
+                asset_from_path(entries['broken.mov'])
+            except Exception as e:
+                assert(str(e) == expected)
+            else:
+                assert False, 'broken link entry accepted'
+
+            results = dict((entry.name, (asset, error)) for entry, asset, error
+                           in asset_from_paths(entries.values(), workers=2))
+            assert(results['clip.mov'][0].type == 'VideoFile')
+            assert(results['broken.mov'][0] is None)
+            assert(str(results['broken.mov'][1]) == expected)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_asset_from_stat(self):
+        path = Path(samples_dir, 'slated_video.mov')
+        st = os.stat(str(path))
+        asset = asset_from_path(path, stat=st)
+        assert(asset.type == 'VideoFile')
+        assert(asset.stat() is st)
+        assert(asset.size == st.st_size)
+        assert(asset.mtime == st.st_mtime)
+
+        # The stat decides the type, with no other check of the path
+        st = os.stat(str(Path(samples_dir, 'dpx_seq')))
+        asset = asset_from_path(Path(samples_dir, 'dpx_seq'), stat=st)
+        assert(asset.type == 'ImageSequence')
+        assert(asset.stat() is st)
+
+        # Made once and kept without one
+        asset = asset_from_path(path)
+        assert(asset.stat() is asset.stat())
+        assert(asset.size == os.path.getsize(str(path)))
+
+    def test_toolchain_shared(self):
+        """
+        The toolchain is resolved once and shared by all of the assets
+        """
+        toolchain = get_toolchain()
+        ffmpeg_dir = os.environ.get('FFMPEG_DIR')
+        os.environ['FFMPEG_DIR'] = os.path.join(test_dir, 'elsewhere')
+        try:
+            assert(get_toolchain() is toolchain)
+        finally:
+            if ffmpeg_dir is None:
+                del os.environ['FFMPEG_DIR']
+            else:
+                os.environ['FFMPEG_DIR'] = ffmpeg_dir
+
+        first = asset_from_path(Path(samples_dir, 'slated_video.mov'))
+        second = asset_from_path(Path(samples_dir, 'dpx_seq'))
+        assert(first.toolchain is toolchain)
+        assert(second.toolchain is toolchain)
+
+    def test_version_patterns_per_asset(self):
+        first = asset_from_path(Path(samples_dir, 'slated_video.mov'))
+        second = asset_from_path(Path(samples_dir, 'slated_video.mov'))
+        default = asset_module.get_config()['versions_regex']
+        patterns = list(default)
+
+        first.version_patterns.append('(?P<version_number>[0-9]+)')
+        assert(first.version_patterns == patterns)
+        assert(second.version_patterns == patterns)
+
+        first.version_patterns = ['take(?P<version_number>[0-9]+)']
+        first.version_patterns.append('(?P<version_number>[0-9]+)')
+        assert(first.version_patterns == ['take(?P<version_number>[0-9]+)'])
+        assert(second.version_patterns == patterns)
+        assert(default == patterns)
+
+    def test_module_config(self):
+        """
+        The module configuration variables read config.yml on use
+        """
+        config = asset_module.get_config()
+        assert(asset_module.config['versions_regex'] == config['versions_regex'])
+        assert(asset_module.config.get('video_files_formats') == config['video_files_formats'])
+        assert('mov' in asset_module.video_files_formats)
+        assert(list(asset_module.image_files_formats) == config['image_files_formats'])
+
     def test_sequence_copy_trim_slate(self):
         """
         //
@@ -1,6 +1,4 @@
-import subprocess
 import sys
-import shutil
 import logging
 
 from pathlib import Path
@@ -17,6 +15,8 @@ def system_copy(src, dst):
     show that 'xcopy' perform 10 times faster then shutil although
     'cp' gain only 0.2 times performance.
     """
+    import shutil
+    import subprocess
 
     src = Path(src)
     dst = Path(dst)